@@ -0,0 +1,57 @@
+"""MinHash signatures and LSH banding for near-duplicate text.
+
+A signature holds, for each of `num_perm` random hash functions, the minimum
+hash over the text's word 3-shingles; the share of equal positions in two
+signatures estimates the Jaccard similarity of their shingle sets. Splitting a
+signature into bands and bucketing on each band's bytes (`band_keys`) finds
+likely matches with a few dictionary or Redis lookups instead of a scan.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def shingle_hashes(text: str, size: int = 3) -> np.ndarray:
+    """32-bit hashes of the distinct word `size`-grams of `text` (the whole text when shorter)."""
+    tokens = _TOKEN.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    count = max(len(tokens) - size + 1, 1)
+    shingles = {" ".join(tokens[index : index + size]) for index in range(count)}
+    return np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        # Coefficients below 2**32 keep a * hash + b inside uint64 for 32-bit hashes.
+        self.a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, text: str) -> np.ndarray | None:
+        """(num_perm,) uint32 signature, or None when the text has no words."""
+        hashes = shingle_hashes(text)
+        if not len(hashes):
+            return None
+        values = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % _MERSENNE_PRIME
+        return (values.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def similarity(left: np.ndarray, right: np.ndarray) -> float | np.ndarray:
+    """Estimated Jaccard similarity of the texts behind two signatures (or against each row of `right`)."""
+    matches = left == right
+    return float(matches.mean()) if matches.ndim == 1 else matches.mean(axis=1)
+
+
+def band_keys(signature: np.ndarray, bands: int) -> list[bytes]:
+    """One bucket key per band; texts sharing any key are candidate duplicates."""
+    raw = signature.tobytes()
+    step = len(raw) // bands
+    return [bytes((band,)) + raw[band * step : (band + 1) * step] for band in range(bands)]
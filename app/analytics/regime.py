@@ -1,16 +1,27 @@
 from __future__ import annotations
 
+import math
+import random
+from collections import deque
+from datetime import datetime
+from typing import Any
+
 import numpy as np
 import pandas as pd
 
 
 def classify_regime(df: pd.DataFrame) -> dict:
+    """Regime of the last row, ranking its volatility against the whole frame."""
     if df.empty:
         return {"regime": "unknown", "evidence": {}}
     latest = df.iloc[-1]
     vol_percentile = df["volatility_20"].rank(pct=True).iloc[-1]
-    trend_up = latest["ema_20"] > latest["ema_50"] > latest["ema_200"]
-    trend_down = latest["ema_20"] < latest["ema_50"] < latest["ema_200"]
+    return regime_from(float(vol_percentile), latest["ema_20"], latest["ema_50"], latest["ema_200"])
+
+
+def regime_from(vol_percentile: float, ema_20: float, ema_50: float, ema_200: float) -> dict:
+    trend_up = ema_20 > ema_50 > ema_200
+    trend_down = ema_20 < ema_50 < ema_200
     if vol_percentile > 0.7:
         regime = "volatile"
     elif trend_up or trend_down:
@@ -25,3 +36,143 @@ def classify_regime(df: pd.DataFrame) -> dict:
             "trend_down": bool(trend_down),
         },
     }
+
+
+class IndexableSkiplist:
+    """Sorted multiset with O(log n) insert, remove and rank queries.
+
+    Each link stores how many bottom-level nodes it skips, so ranks are the sum
+    of link widths along the search path.
+    """
+
+    def __init__(self, expected_size: int = 1024, seed: int = 0) -> None:
+        self.size = 0
+        self.max_levels = max(1, int(math.log2(max(expected_size, 2))) + 1)
+        self._random = random.Random(seed)
+        self._head = self._node(math.inf, self.max_levels)
+        self._nil = self._node(math.inf, 0)
+        self._head["next"] = [self._nil] * self.max_levels
+        self._head["width"] = [1] * self.max_levels
+
+    @staticmethod
+    def _node(value: float, levels: int) -> dict[str, Any]:
+        return {"value": value, "next": [None] * levels, "width": [0] * levels}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def insert(self, value: float) -> None:
+        chain: list[dict[str, Any]] = [None] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node["next"][level]["value"] <= value:
+                steps_at_level[level] += node["width"][level]
+                node = node["next"][level]
+            chain[level] = node
+        levels = min(self.max_levels, 1 - int(math.log2(1.0 - self._random.random())))
+        new = self._node(value, levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new["next"][level] = previous["next"][level]
+            previous["next"][level] = new
+            new["width"][level] = previous["width"][level] - steps
+            previous["width"][level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.max_levels):
+            chain[level]["width"][level] += 1
+        self.size += 1
+
+    def remove(self, value: float) -> None:
+        chain: list[dict[str, Any]] = [None] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node["next"][level]["value"] < value:
+                node = node["next"][level]
+            chain[level] = node
+        if chain[0]["next"][0]["value"] != value:
+            raise KeyError(value)
+        target = chain[0]["next"][0]
+        for level in range(len(target["next"])):
+            previous = chain[level]
+            previous["width"][level] += target["width"][level] - 1
+            previous["next"][level] = target["next"][level]
+        for level in range(len(target["next"]), self.max_levels):
+            chain[level]["width"][level] -= 1
+        self.size -= 1
+
+    def count_below(self, value: float, inclusive: bool = False) -> int:
+        """Number of stored values `< value` (or `<= value` when inclusive)."""
+        count = 0
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while True:
+                following = node["next"][level]["value"]
+                if following < value or (inclusive and following == value):
+                    count += node["width"][level]
+                    node = node["next"][level]
+                else:
+                    break
+        return count
+
+
+class RollingPercentile:
+    """Percentile rank of values within the last `window` pushes, like `rank(pct=True)` on that window."""
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self._values: deque[float] = deque()
+        self._sorted = IndexableSkiplist(window)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def push(self, value: float) -> None:
+        self._values.append(value)
+        self._sorted.insert(value)
+        if len(self._values) > self.window:
+            self._sorted.remove(self._values.popleft())
+
+    def replace_last(self, value: float) -> None:
+        self._sorted.remove(self._values.pop())
+        self._values.append(value)
+        self._sorted.insert(value)
+
+    def percentile(self, value: float) -> float:
+        """Average-method percentile of `value` among the window (ties share their mean rank)."""
+        if not self._values:
+            return math.nan
+        below = self._sorted.count_below(value)
+        through = self._sorted.count_below(value, inclusive=True)
+        return (below + 1 + through) / 2 / len(self._values)
+
+
+class RegimeTracker:
+    """Streaming `classify_regime` over a bounded lookback, one O(log n) update per bar."""
+
+    def __init__(self, lookback: int) -> None:
+        self.lookback = lookback
+        self.volatility = RollingPercentile(lookback)
+        self.last_ts: datetime | None = None
+        self.current: dict | None = None
+
+    def update(self, ts: datetime, volatility: float, ema_20: float, ema_50: float, ema_200: float) -> dict:
+        """Add a bar (or revise the last one when `ts` repeats) and return the regime at that bar."""
+        if self.last_ts is not None and ts == self.last_ts:
+            self.volatility.replace_last(volatility)
+        else:
+            self.volatility.push(volatility)
+        self.last_ts = ts
+        self.current = regime_from(self.volatility.percentile(volatility), ema_20, ema_50, ema_200)
+        return self.current
+
+
+def volatility_percentiles(values: np.ndarray, lookback: int) -> np.ndarray:
+    """Rolling percentile of each value within its trailing `lookback` window."""
+    tracker = RollingPercentile(lookback)
+    result = np.empty(len(values))
+    for index, value in enumerate(values):
+        tracker.push(float(value))
+        result[index] = tracker.percentile(float(value))
+    return result
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNS_MEDIA_TYPE = "application/vnd.newstracker.columns+json"
+FORMAT_PATTERN = "^(rows|columns|arrow)$"
+
+_ACCEPT_FORMATS = {
+    ARROW_MEDIA_TYPE: "arrow",
+    COLUMNS_MEDIA_TYPE: "columns",
+    "application/json": "rows",
+}
+
+
+def negotiate_format(request: Request, requested: str | None = None) -> str:
+    """Pick rows/columns/arrow from an explicit `format` param or the Accept header.
+
+    Arrow degrades to columnar JSON when pyarrow is not installed on the server.
+    """
+    fmt = requested
+    if fmt is None:
+        fmt = "rows"
+        for part in request.headers.get("accept", "").split(","):
+            media_type = part.split(";")[0].strip().lower()
+            if media_type in _ACCEPT_FORMATS:
+                fmt = _ACCEPT_FORMATS[media_type]
+                break
+    if fmt == "arrow" and pa is None:
+        return "columns"
+    return fmt
+
+
+def to_columns(fields: Sequence[str], rows: Sequence[Sequence[Any]]) -> dict[str, list[Any]]:
+    """Transpose result tuples into one list per field without building per-row dicts."""
+    if not rows:
+        return {name: [] for name in fields}
+    return {name: list(values) for name, values in zip(fields, zip(*rows))}
+
+
+def tabular_response(columns: dict[str, list[Any]], fmt: str) -> Response:
+    if fmt == "arrow":
+        return Response(content=_to_arrow(columns), media_type=ARROW_MEDIA_TYPE)
+    return JSONResponse(json_columns(columns), media_type=COLUMNS_MEDIA_TYPE)
+
+
+def json_columns(columns: dict[str, list[Any]]) -> dict[str, list[Any]]:
+    return {name: _json_values(values) for name, values in columns.items()}
+
+
+def _json_values(values: list[Any]) -> list[Any]:
+    sample = next((value for value in values if value is not None), None)
+    if isinstance(sample, datetime):
+        return [value.isoformat() if value is not None else None for value in values]
+    return values
+
+
+def _to_arrow(columns: dict[str, list[Any]]) -> bytes:
+    arrays = {}
+    for name, values in columns.items():
+        sample = next((value for value in values if value is not None), None)
+        if isinstance(sample, dict):
+            # Free-form JSON objects do not map onto a stable Arrow struct type.
+            values = [json.dumps(value, default=str) if value is not None else None for value in values]
+        arrays[name] = pa.array(values)
+    table = pa.table(arrays)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
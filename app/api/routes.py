@@ -1,22 +1,68 @@
 from __future__ import annotations
 
-import asyncio
+import base64
 import json
-from datetime import datetime
+import uuid
+from datetime import datetime, timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import StreamingResponse
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import Row, and_, case, func, or_, select
 from sqlalchemy.orm import Session
 
-from app.core.cache import get_redis
+from app.api.formats import FORMAT_PATTERN, json_columns, negotiate_format, tabular_response, to_columns
+from app.core.cache import get_redis, redis_breaker_state
 from app.core.config import get_settings
+from app.core.metrics import render_metrics
+from app.core.utils import hash_text, utc_now
+from app.db.buckets import bucket_index, bucket_start
+from app.db.instrumentation import pool_stats
 from app.db.models import Instrument, MacroEvent, News, Signal, SystemHealth, TickOrBar
 from app.db.session import SessionLocal
+from app.services.events import NEWS_COMMITTED, get_event_bus
+from app.services.indicators import load_indicators, load_range_indicators
+from app.services.macro_calendar import get_macro_calendar
+from app.services.news_impact import impact_stats
+from app.services.prices import PRICE_FIELDS, PriceRange, load_price_range
+from app.services.regimes import regime_history
 
 router = APIRouter()
 
+NEWS_FIELDS = (
+    "id",
+    "published_at",
+    "source",
+    "title",
+    "summary",
+    "analysis_summary",
+    "url",
+    "sentiment",
+    "sentiment_label",
+    "impact_level",
+    "impacted_assets",
+    "rationale",
+    "topics",
+    "is_fundamental",
+    "cluster_id",
+)
+SIGNAL_FIELDS = ("ts", "timeframe", "horizon_minutes", "label", "confidence", "explanation", "model_version")
+SIGNAL_BUCKET_FIELDS = (
+    "ts",
+    "timeframe",
+    "horizon_minutes",
+    "signals",
+    "avg_confidence",
+    "bullish",
+    "bearish",
+    "neutral",
+)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PRICE_TIMEFRAME_HEADER = "X-Price-Timeframe"
+PRICE_BUCKET_HEADER = "X-Price-Bucket-Seconds"
+
 
 def get_db() -> Session:
     db = SessionLocal()
@@ -41,64 +87,339 @@ def health(db: Session = Depends(get_db)) -> dict[str, Any]:
         "status": "ok",
         "environment": settings.environment,
         "redis_ok": redis_ok,
+        "redis_breaker": redis_breaker_state(),
         "jobs": [
             {
                 "job_name": row.job_name,
                 "last_run": row.last_run,
                 "status": row.status,
                 "error": row.error,
+                "details": row.details,
             }
             for row in health_rows
         ],
     }
 
 
-@router.get("/prices")
+@router.get("/metrics")
+def metrics() -> Response:
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@router.get("/metrics/db")
+def db_metrics() -> dict[str, Any]:
+    return {"pools": pool_stats()}
+
+
+@router.get("/prices", response_model=None)
 def prices(
+    request: Request,
+    response: Response,
     instrument_id: int,
     timeframe: str = "1h",
     limit: int = 300,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    points: int | None = Query(None, ge=2),
+    shape: str = Query("ohlc", pattern="^(ohlc|line)$"),
+    fmt: str | None = Query(None, alias="format", pattern=FORMAT_PATTERN),
     db: Session = Depends(get_db),
-) -> list[dict[str, Any]]:
-    rows = (
-        db.execute(
-            select(TickOrBar)
-            .where(TickOrBar.instrument_id == instrument_id)
-            .where(TickOrBar.timeframe == timeframe)
-            .order_by(TickOrBar.ts.desc())
-            .limit(limit)
-        )
-        .scalars()
-        .all()
-    )
-    return [
-        {
-            "ts": row.ts,
-            "open": row.open,
-            "high": row.high,
-            "low": row.low,
-            "close": row.close,
-            "volume": row.volume,
+) -> list[dict[str, Any]] | Response:
+    """Latest `limit` bars, or with `start`/`end`/`points` a range downsampled to at most `points` rows.
+
+    For ranges, `timeframe` is the finest resolution wanted; the timeframe actually
+    read and the width of each returned row are sent in the `X-Price-Timeframe`
+    and `X-Price-Bucket-Seconds` headers.
+    """
+    headers = {}
+    if start is None and end is None and points is None:
+        rows = _price_rows(db, instrument_id, timeframe, limit)
+    else:
+        try:
+            price_range = _price_range(db, instrument_id, timeframe, start, end, points, shape)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        rows = price_range.rows
+        headers = {
+            PRICE_TIMEFRAME_HEADER: price_range.timeframe,
+            PRICE_BUCKET_HEADER: str(price_range.bucket_seconds),
         }
-        for row in rows
-    ][::-1]
+    fmt = negotiate_format(request, fmt)
+    if fmt != "rows":
+        result = tabular_response(to_columns(PRICE_FIELDS, rows), fmt)
+        result.headers.update(headers)
+        return result
+    response.headers.update(headers)
+    return [dict(zip(PRICE_FIELDS, row)) for row in rows]
 
 
-@router.get("/news")
+@router.get("/indicators", response_model=None)
+def indicators(
+    request: Request,
+    instrument_id: int,
+    timeframe: str = "1h",
+    names: str = "rsi_14,macd,macd_signal",
+    limit: int = 300,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    fmt: str | None = Query(None, alias="format", pattern=FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+) -> Response:
+    requested = [name.strip() for name in names.split(",") if name.strip()]
+    try:
+        columns = load_indicators(db, instrument_id, timeframe, requested, limit=limit, start=start, end=end)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    fmt = negotiate_format(request, fmt)
+    return tabular_response(columns, "arrow" if fmt == "arrow" else "columns")
+
+
+@router.get("/news", response_model=None)
 def news(
+    request: Request,
     limit: int = 50,
     instrument: str | None = None,
     impact: str | None = None,
     sentiment: str | None = None,
     q: str | None = None,
     fundamental_only: bool = False,
+    fmt: str | None = Query(None, alias="format", pattern=FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+) -> list[dict[str, Any]] | Response:
+    filtered = _news_rows(db, limit, instrument, impact, sentiment, q, fundamental_only)
+    fmt = negotiate_format(request, fmt)
+    if fmt != "rows":
+        return tabular_response(to_columns(NEWS_FIELDS, filtered), fmt)
+    return [_serialize_news(row) for row in filtered]
+
+
+@router.get("/news/impact")
+def news_impact(
+    group_by: str = Query("impact_level", pattern="^(topic|impact_level|source)$"),
+    instrument_id: int | None = None,
+    horizon_minutes: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: Session = Depends(get_db),
+) -> list[dict[str, Any]]:
+    return impact_stats(db, group_by, instrument_id, horizon_minutes, start, end)
+
+
+@router.get("/news/stream")
+async def news_stream(request: Request, instrument: str | None = None) -> StreamingResponse:
+    bus = get_event_bus()
+    group = f"sse-{uuid.uuid4().hex}"
+
+    def load(ids: list[int] | None) -> list[dict[str, Any]]:
+        with SessionLocal() as session:
+            query = select(News).order_by(News.published_at.desc())
+            query = query.limit(25) if ids is None else query.where(News.id.in_(ids))
+            rows = session.execute(query).scalars().all()
+        if instrument:
+            rows = [row for row in rows if instrument in (row.impacted_assets or [])]
+        return [_serialize_news(row) for row in rows]
+
+    async def event_generator():
+        # Join before the initial load so nothing committed in between is missed.
+        await run_in_threadpool(bus.join, group, [NEWS_COMMITTED])
+        try:
+            items = await run_in_threadpool(load, None)
+            while True:
+                if items:
+                    yield f"data: {json.dumps(items, default=str)}\n\n"
+                if await request.is_disconnected():
+                    break
+                events = await run_in_threadpool(bus.read, group, group, [NEWS_COMMITTED], 100, 1000)
+                ids = [row_id for event in events for row_id in event.ids]
+                items = await run_in_threadpool(load, ids) if ids else []
+                if events:
+                    await run_in_threadpool(bus.ack, group, events)
+        finally:
+            await run_in_threadpool(bus.close_group, group, [NEWS_COMMITTED])
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
+@router.get("/macro")
+def macro_events(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 100,
+    currency: str | None = None,
+    impact: str | None = None,
     db: Session = Depends(get_db),
 ) -> list[dict[str, Any]]:
-    rows = (
-        db.execute(select(News).order_by(News.published_at.desc()).limit(limit))
-        .scalars()
-        .all()
-    )
+    return _macro_rows(db, start, end, limit, currency, impact)
+
+
+@router.get("/macro/next")
+def macro_next(
+    at: datetime | None = None,
+    currency: str | None = None,
+    impact: str | None = None,
+    db: Session = Depends(get_db),
+) -> dict[str, Any]:
+    """The last event at or before `at` (default now) and the first one after it."""
+    calendar = get_macro_calendar(db)
+    at = at or utc_now()
+    return {
+        "at": at,
+        "previous": calendar.previous_event(at, currency, impact),
+        "next": calendar.next_event(at + timedelta(microseconds=1), currency, impact),
+    }
+
+
+@router.get("/regimes")
+def regimes(
+    instrument_id: int,
+    timeframe: str = "1m",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 500,
+    db: Session = Depends(get_db),
+) -> list[dict[str, Any]]:
+    return regime_history(db, instrument_id, timeframe, start, end, limit)
+
+
+@router.get("/signals", response_model=None)
+def signals(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1),
+    instrument_id: int | None = None,
+    timeframe: str | None = None,
+    horizon_minutes: int | None = None,
+    model_version: str | None = None,
+    label: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    bucket_minutes: int | None = Query(None, ge=1),
+    cursor: str | None = None,
+    fmt: str | None = Query(None, alias="format", pattern=FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+) -> list[dict[str, Any]] | Response:
+    """Signal history, newest first.
+
+    With `bucket_minutes` the rows are aggregated in SQL into fixed buckets per
+    timeframe and horizon (signal count, average confidence, label counts).
+    A full page sets the `X-Next-Cursor` header; pass it back as `cursor` for the
+    next (older) page.
+    """
+    filters = _signal_filters(instrument_id, timeframe, horizon_minutes, model_version, label, start, end)
+    try:
+        after = _decode_cursor(cursor, bucketed=bool(bucket_minutes))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="invalid cursor") from exc
+    if bucket_minutes:
+        fields = SIGNAL_BUCKET_FIELDS
+        rows = _signal_buckets(db, bucket_minutes * 60, limit, filters, after)
+        next_key = list(rows[-1][-1]) if len(rows) == limit else None
+    else:
+        fields = SIGNAL_FIELDS
+        rows = _signal_rows(db, limit, filters, after)
+        next_key = [rows[-1].ts.isoformat(), rows[-1].id] if len(rows) == limit else None
+    headers = {NEXT_CURSOR_HEADER: _encode_cursor(next_key)} if next_key else {}
+    fmt = negotiate_format(request, fmt)
+    if fmt != "rows":
+        result = tabular_response(to_columns(fields, rows), fmt)
+        result.headers.update(headers)
+        return result
+    response.headers.update(headers)
+    return [dict(zip(fields, row)) for row in rows]
+
+
+@router.get("/instruments")
+def instruments(db: Session = Depends(get_db)) -> list[dict[str, Any]]:
+    return _instrument_rows(db)
+
+
+@router.get("/dashboard/snapshot", response_model=None)
+def dashboard_snapshot(
+    request: Request,
+    instrument_id: int,
+    timeframe: str = "1h",
+    limit: int = 300,
+    start: datetime | None = None,
+    points: int | None = Query(None, ge=2),
+    indicator_names: str = "rsi_14,macd,macd_signal",
+    news_limit: int = 200,
+    instrument: str | None = None,
+    impact: str | None = None,
+    sentiment: str | None = None,
+    q: str | None = None,
+    fundamental_only: bool = False,
+    macro_limit: int = 50,
+    signals_limit: int = 5,
+    db: Session = Depends(get_db),
+) -> Response:
+    """Everything the dashboard renders, in one response guarded by an ETag.
+
+    The ETag is derived from each source's version plus the query, so a
+    revalidation is answered with 304 before any payload is built.
+    """
+    etag = _snapshot_etag(db, instrument_id, timeframe, sorted(request.query_params.multi_items()))
+    if etag in {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers={"ETag": etag})
+    names = [name.strip() for name in indicator_names.split(",") if name.strip()]
+    try:
+        if start is None and points is None:
+            price_rows = _price_rows(db, instrument_id, timeframe, limit)
+            indicator_columns = load_indicators(db, instrument_id, timeframe, names, limit=limit)
+        else:
+            # Indicators follow the price range so both panels cover the same span.
+            price_range = _price_range(db, instrument_id, timeframe, start, None, points, "ohlc")
+            price_rows = price_range.rows
+            indicator_columns = load_range_indicators(db, instrument_id, names, price_range)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    news_rows = _news_rows(db, news_limit, instrument, impact, sentiment, q, fundamental_only)
+    payload = {
+        "instruments": _instrument_rows(db),
+        "prices": json_columns(to_columns(PRICE_FIELDS, price_rows)),
+        "indicators": json_columns(indicator_columns),
+        "news": jsonable_encoder([_serialize_news(row) for row in news_rows]),
+        "macro": jsonable_encoder(_macro_rows(db, None, None, macro_limit)),
+        "signals": jsonable_encoder([dict(zip(SIGNAL_FIELDS, row)) for row in _signal_rows(db, signals_limit)]),
+    }
+    return JSONResponse(payload, headers={"ETag": etag})
+
+
+def _price_rows(db: Session, instrument_id: int, timeframe: str, limit: int) -> list[Row]:
+    return db.execute(
+        select(*(getattr(TickOrBar, name) for name in PRICE_FIELDS))
+        .where(TickOrBar.instrument_id == instrument_id)
+        .where(TickOrBar.timeframe == timeframe)
+        .order_by(TickOrBar.ts.desc())
+        .limit(limit)
+    ).all()[::-1]
+
+
+def _price_range(
+    db: Session,
+    instrument_id: int,
+    timeframe: str,
+    start: datetime | None,
+    end: datetime | None,
+    points: int | None,
+    shape: str,
+) -> PriceRange:
+    max_points = get_settings().price_max_points
+    return load_price_range(db, instrument_id, timeframe, min(points or max_points, max_points), start, end, shape)
+
+
+def _news_rows(
+    db: Session,
+    limit: int,
+    instrument: str | None = None,
+    impact: str | None = None,
+    sentiment: str | None = None,
+    q: str | None = None,
+    fundamental_only: bool = False,
+) -> list[Row]:
+    rows = db.execute(
+        select(*(getattr(News, name) for name in NEWS_FIELDS)).order_by(News.published_at.desc()).limit(limit)
+    ).all()
     filtered = []
     for row in rows:
         if instrument and instrument not in (row.impacted_assets or []):
@@ -114,77 +435,162 @@ def news(
             if q.lower() not in haystack:
                 continue
         filtered.append(row)
-    return [_serialize_news(row) for row in filtered]
-
+    return filtered
 
-@router.get("/news/stream")
-async def news_stream(request: Request, instrument: str | None = None) -> StreamingResponse:
-    async def event_generator():
-        last_seen: datetime | None = None
-        while True:
-            if await request.is_disconnected():
-                break
-            with SessionLocal() as session:
-                query = select(News).order_by(News.published_at.desc()).limit(25)
-                if last_seen is not None:
-                    query = select(News).where(News.published_at > last_seen).order_by(News.published_at.desc())
-                rows = session.execute(query).scalars().all()
-                if instrument:
-                    rows = [row for row in rows if instrument in (row.impacted_assets or [])]
-                if rows:
-                    last_seen = max(row.published_at for row in rows)
-                    payload = json.dumps([_serialize_news(row) for row in rows], default=str)
-                    yield f"data: {payload}\n\n"
-            await asyncio.sleep(1)
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
 
-
-@router.get("/macro")
-def macro_events(
-    start: datetime | None = None,
-    end: datetime | None = None,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+def _macro_rows(
+    db: Session,
+    start: datetime | None,
+    end: datetime | None,
+    limit: int,
+    currency: str | None = None,
+    impact: str | None = None,
 ) -> list[dict[str, Any]]:
     query = select(MacroEvent)
     if start:
         query = query.where(MacroEvent.time >= start)
     if end:
         query = query.where(MacroEvent.time <= end)
+    if currency:
+        query = query.where(MacroEvent.currency == currency)
+    if impact:
+        query = query.where(MacroEvent.impact == impact)
     rows = db.execute(query.order_by(MacroEvent.time.desc()).limit(limit)).scalars().all()
-    return [
-        {
-            "time": row.time,
-            "currency": row.currency,
-            "impact": row.impact,
-            "name": row.name,
-            "forecast": row.forecast,
-            "previous": row.previous,
-            "actual": row.actual,
-            "source": row.source,
-        }
-        for row in rows
-    ]
+    calendar = get_macro_calendar(db)
+    results = []
+    for row in rows:
+        surprise, surprise_z = calendar.surprise(row.id)
+        results.append(
+            {
+                "time": row.time,
+                "currency": row.currency,
+                "impact": row.impact,
+                "name": row.name,
+                "forecast": row.forecast,
+                "previous": row.previous,
+                "actual": row.actual,
+                "surprise": surprise,
+                "surprise_z": surprise_z,
+                "source": row.source,
+            }
+        )
+    return results
+
+
+def _signal_filters(
+    instrument_id: int | None = None,
+    timeframe: str | None = None,
+    horizon_minutes: int | None = None,
+    model_version: str | None = None,
+    label: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list:
+    filters = []
+    if instrument_id is not None:
+        filters.append(Signal.instrument_id == instrument_id)
+    if timeframe:
+        filters.append(Signal.timeframe == timeframe)
+    if horizon_minutes is not None:
+        filters.append(Signal.horizon_minutes == horizon_minutes)
+    if model_version:
+        filters.append(Signal.model_version == model_version)
+    if label:
+        filters.append(Signal.label == label)
+    if start:
+        filters.append(Signal.ts >= start)
+    if end:
+        filters.append(Signal.ts <= end)
+    return filters
+
+
+def _signal_rows(db: Session, limit: int, filters: list | None = None, after: tuple | None = None) -> list[Row]:
+    """Rows in SIGNAL_FIELDS order, with the row id last for keyset paging."""
+    query = select(
+        Signal.ts,
+        Signal.timeframe,
+        Signal.horizon_minutes,
+        Signal.label,
+        Signal.confidence,
+        Signal.explanation_json,
+        Signal.model_version,
+        Signal.id,
+    ).where(*(filters or []))
+    if after:
+        ts, row_id = after
+        query = query.where(or_(Signal.ts < ts, and_(Signal.ts == ts, Signal.id < row_id)))
+    return db.execute(query.order_by(Signal.ts.desc(), Signal.id.desc()).limit(limit)).all()
 
 
-@router.get("/signals")
-def signals(limit: int = 50, db: Session = Depends(get_db)) -> list[dict[str, Any]]:
-    rows = db.execute(select(Signal).order_by(Signal.ts.desc()).limit(limit)).scalars().all()
+def _signal_buckets(db: Session, seconds: int, limit: int, filters: list, after: tuple | None = None) -> list[tuple]:
+    """Aggregated rows in SIGNAL_BUCKET_FIELDS order, each followed by its paging key."""
+    bucket = bucket_index(db, Signal.ts, seconds).label("bucket")
+    query = select(
+        bucket,
+        Signal.timeframe,
+        Signal.horizon_minutes,
+        func.count(Signal.id).label("signals"),
+        func.avg(Signal.confidence).label("avg_confidence"),
+        *(func.sum(case((Signal.label == name, 1), else_=0)).label(name.lower()) for name in ("Bullish", "Bearish", "Neutral")),
+    ).where(*filters)
+    if after:
+        # Bound the scan by time first so the (instrument_id, ts) index does the work.
+        query = query.where(Signal.ts < bucket_start(after[0] + 1, seconds))
+    grouped = query.group_by(bucket, Signal.timeframe, Signal.horizon_minutes).subquery()
+    outer = select(grouped)
+    if after:
+        index, timeframe, horizon = after
+        outer = outer.where(
+            or_(
+                grouped.c.bucket < index,
+                and_(
+                    grouped.c.bucket == index,
+                    or_(
+                        grouped.c.timeframe > timeframe,
+                        and_(grouped.c.timeframe == timeframe, grouped.c.horizon_minutes > horizon),
+                    ),
+                ),
+            )
+        )
+    rows = db.execute(
+        outer.order_by(grouped.c.bucket.desc(), grouped.c.timeframe, grouped.c.horizon_minutes).limit(limit)
+    ).all()
     return [
-        {
-            "ts": row.ts,
-            "label": row.label,
-            "confidence": row.confidence,
-            "explanation": row.explanation_json,
-            "model_version": row.model_version,
-        }
+        (
+            bucket_start(row.bucket, seconds),
+            row.timeframe,
+            row.horizon_minutes,
+            row.signals,
+            float(row.avg_confidence),
+            int(row.bullish),
+            int(row.bearish),
+            int(row.neutral),
+            (int(row.bucket), row.timeframe, row.horizon_minutes),
+        )
         for row in rows
     ]
 
 
-@router.get("/instruments")
-def instruments(db: Session = Depends(get_db)) -> list[dict[str, Any]]:
+def _encode_cursor(key: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor: str | None, bucketed: bool) -> tuple | None:
+    """Paging key: (ts, id) for signal rows, (bucket, timeframe, horizon) for buckets."""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if bucketed:
+            index, timeframe, horizon = key
+            return int(index), str(timeframe), int(horizon)
+        ts, row_id = key
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(cursor) from exc
+
+
+def _instrument_rows(db: Session) -> list[dict[str, Any]]:
     rows = db.execute(select(Instrument).order_by(Instrument.symbol)).scalars().all()
     return [
         {
@@ -197,6 +603,32 @@ def instruments(db: Session = Depends(get_db)) -> list[dict[str, Any]]:
     ]
 
 
+def _snapshot_etag(db: Session, instrument_id: int, timeframe: str, params: list[tuple[str, str]]) -> str:
+    """Hash of the query and each source's version, cheap enough to check before building the payload.
+
+    News and macro rows carry `updated_at`, so edits count as well as inserts. The newest bar is
+    included whole because ingestion keeps rewriting it until its bucket closes.
+    """
+    latest_bar = db.execute(
+        select(*(getattr(TickOrBar, name) for name in PRICE_FIELDS))
+        .where(TickOrBar.instrument_id == instrument_id)
+        .where(TickOrBar.timeframe == timeframe)
+        .order_by(TickOrBar.ts.desc())
+        .limit(1)
+    ).first()
+    versions = db.execute(
+        select(
+            select(func.max(News.id)).scalar_subquery(),
+            select(func.max(News.updated_at)).scalar_subquery(),
+            select(func.max(MacroEvent.id)).scalar_subquery(),
+            select(func.max(MacroEvent.updated_at)).scalar_subquery(),
+            select(func.max(Signal.id)).scalar_subquery(),
+            select(func.max(Instrument.id)).scalar_subquery(),
+        )
+    ).one()
+    return f'"{hash_text(repr((tuple(latest_bar or ()), tuple(versions), params)))[:32]}"'
+
+
 def _serialize_news(row: News) -> dict[str, Any]:
     return {
         "id": row.id,
@@ -213,4 +645,5 @@ def _serialize_news(row: News) -> dict[str, Any]:
         "rationale": row.rationale,
         "topics": row.topics,
         "is_fundamental": row.is_fundamental,
+        "cluster_id": row.cluster_id,
     }
@@ -1,13 +1,231 @@
+"""Process-wide Redis client, value codecs and pipelined helpers.
+
+All Redis access goes through `get_redis()`, which hands out one client backed by
+a bounded connection pool. A circuit breaker watches connection attempts: after
+`REDIS_BREAKER_FAILURES` consecutive failures `get_redis()` returns None for
+`REDIS_BREAKER_RESET_SECONDS`, so callers take their fallback path immediately
+instead of waiting on connect timeouts. hiredis is used for reply parsing when
+installed.
+"""
 from __future__ import annotations
 
+import json
+import logging
+import threading
+import time
+from typing import Any, Iterable, Mapping
+
 import redis
 
 from app.core.config import get_settings
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
-def get_redis() -> redis.Redis | None:
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional codec
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Closed until `failure_threshold` consecutive failures, then open for `reset_seconds`.
+
+    Once the reset period passes a single trial call is let through (half-open);
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def end_trial(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Redis unreachable after %s attempts; pausing for %ss", self.failures, self.reset_seconds)
+                self.opened_at = time.monotonic()
+
+
+class _BreakerConnectionPool(redis.BlockingConnectionPool):
+    breaker: CircuitBreaker
+
+    def make_connection(self):
+        connection = super().make_connection()
+        connect = connection.connect
+        breaker = self.breaker
+
+        # Only failed connects count against the breaker; waiting on an exhausted pool does not.
+        def guarded_connect() -> None:
+            try:
+                connect()
+            except (redis.ConnectionError, redis.TimeoutError):
+                breaker.record_failure()
+                raise
+
+        connection.connect = guarded_connect
+        return connection
+
+    def get_connection(self, command_name: str, *keys, **options):
+        if not self.breaker.allow():
+            raise redis.ConnectionError("Redis circuit breaker is open")
+        try:
+            connection = super().get_connection(command_name, *keys, **options)
+        except Exception:
+            self.breaker.end_trial()
+            raise
+        self.breaker.record_success()
+        return connection
+
+
+class JsonCodec:
+    content_type = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(value, default=str).encode()
+
+    def loads(self, raw: bytes) -> Any:
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+class MsgpackCodec:
+    content_type = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True, default=str)
+
+    def loads(self, raw: bytes) -> Any:
+        return msgpack.unpackb(raw, raw=False)
+
+
+def get_codec(name: str | None = None) -> JsonCodec | MsgpackCodec:
+    name = name or get_settings().redis_codec
+    if name == "msgpack":
+        if msgpack is not None:
+            return MsgpackCodec()
+        logger.warning("msgpack is not installed; using the JSON codec")
+    return JsonCodec()
+
+
+_client: redis.Redis | None = None
+_breaker: CircuitBreaker | None = None
+_client_lock = threading.Lock()
+
+
+def _build_client() -> tuple[redis.Redis, CircuitBreaker]:
     settings = get_settings()
-    try:
-        return redis.from_url(settings.redis_url)
-    except Exception:
+    breaker = CircuitBreaker(settings.redis_breaker_failures, settings.redis_breaker_reset_seconds)
+    pool = _BreakerConnectionPool.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_socket_timeout,
+        socket_timeout=settings.redis_socket_timeout,
+        socket_connect_timeout=settings.redis_socket_timeout,
+        health_check_interval=30,
+    )
+    pool.breaker = breaker
+    return redis.Redis(connection_pool=pool), breaker
+
+
+def get_redis() -> redis.Redis | None:
+    """Shared client, or None while the circuit breaker is open."""
+    global _client, _breaker
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                try:
+                    _client, _breaker = _build_client()
+                except Exception:
+                    logger.exception("Invalid Redis configuration")
+                    return None
+    if _breaker.state == "open":
         return None
+    return _client
+
+
+def redis_breaker_state() -> str:
+    return _breaker.state if _breaker is not None else "closed"
+
+
+def close_redis() -> None:
+    """Drop the shared client and its pool; the next `get_redis()` rebuilds from settings."""
+    global _client, _breaker
+    with _client_lock:
+        if _client is not None:
+            _client.connection_pool.disconnect()
+        _client = None
+        _breaker = None
+
+
+def mget(keys: Iterable[str], codec: JsonCodec | MsgpackCodec | None = None) -> list[Any]:
+    """Decoded values for `keys` in one round trip; None for misses or when Redis is unavailable."""
+    keys = list(keys)
+    client = get_redis()
+    if client is None or not keys:
+        return [None] * len(keys)
+    codec = codec or get_codec()
+    try:
+        raw_values = client.mget(keys)
+    except redis.RedisError:
+        return [None] * len(keys)
+    return [codec.loads(raw) if raw is not None else None for raw in raw_values]
+
+
+def mset(
+    values: Mapping[str, Any],
+    ttl_seconds: int | None = None,
+    codec: JsonCodec | MsgpackCodec | None = None,
+) -> bool:
+    """Write `values` in one pipelined round trip. Returns False when Redis is unavailable."""
+    client = get_redis()
+    if client is None or not values:
+        return False
+    codec = codec or get_codec()
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, codec.dumps(value), ex=ttl_seconds)
+            pipe.execute()
+    except redis.RedisError:
+        return False
+    return True
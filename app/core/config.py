@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -11,26 +12,84 @@ class Settings(BaseSettings):
     environment: str = "development"
     database_url: str = "postgresql+psycopg2://postgres:postgres@db:5432/forex"
     redis_url: str = "redis://redis:6379/0"
+    redis_max_connections: int = 20
+    redis_socket_timeout: float = 2.0
+    redis_breaker_failures: int = 3
+    redis_breaker_reset_seconds: float = 30.0
+    redis_codec: str = "json"  # json|msgpack
+    event_bus_backend: str = "memory"  # memory|redis
+    event_bus_max_len: int = 10000
+    event_bus_claim_idle_ms: int = 60000
 
-    price_provider: str = "demo"  # demo|alphavantage
-    news_provider: str = "demo"  # demo|rss
-    macro_provider: str = "demo"  # demo|csv
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_job_pool_size: int = 3
+    db_job_max_overflow: int = 2
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_slow_query_ms: int = 500
+
+    price_provider: str = "demo"  # demo|alphavantage|simulation
+    news_provider: str = "demo"  # demo|rss|simulation
+    macro_provider: str = "demo"  # demo|csv|simulation
 
     alphavantage_api_key: str | None = None
+    alphavantage_requests_per_minute: int = 5
     news_rss_urls: str = "https://www.ecb.europa.eu/rss/press.html"
 
     poll_prices_seconds: int = 60
     poll_news_seconds: int = 300
     poll_macro_seconds: int = 1800
-    predict_seconds: int = 300
+    predict_seconds: int = 300  # fallback cadence; new bars trigger prediction immediately
+    scheduler_jitter_seconds: int = 5
+    scheduler_ingest_workers: int = 3
+    scheduler_misfire_grace_seconds: int = 30
+
+    simulation_speed: float = 60.0  # simulated seconds per wall-clock second
+    simulation_seed: int = 7
+    simulation_start: datetime | None = None
+    simulation_replay_path: str | None = None  # price CSV to replay instead of random walks
+    simulation_warmup_bars: int = 500
+    simulation_news_per_hour: float = 30.0
+    simulation_news_burst_probability: float = 0.02
+    simulation_news_burst_size: int = 8
+    simulation_macro_lookahead_hours: int = 24
+
+    feature_store_warmup_bars: int = 1000
 
-    signal_horizon_minutes: int = 60
+    signal_horizons_minutes: str = "15,60,240"  # comma-separated; each is trained per signal timeframe
+    signal_timeframes: str = "1m,5m"
+    training_jobs: int = 4
+    price_max_points: int = 2000
+    news_impact_horizons_minutes: str = "5,15,60,240"
+    news_impact_batch_size: int = 5000
+    news_dedup_backend: str = "memory"
+    news_dedup_threshold: float = 0.8
+    news_dedup_window_hours: int = 72
+    news_minhash_permutations: int = 128
+    news_lsh_bands: int = 32
+    macro_actual_lookback_hours: int = 48  # how far back ingest_macro refetches events still missing an actual
+    explanation_top_features: int = 5
+    explanation_news_hours: int = 24
+    explanation_news_limit: int = 5
+    regime_lookback_bars: int = 5000  # volatility percentile window per instrument/timeframe
     demo_mode: bool = True
 
     log_level: str = "INFO"
+    profile_jobs: str = ""  # comma-separated job names to profile once per process
+    profile_dir: str = "profiles"
+    profiler: str = "cprofile"  # cprofile|pyinstrument
     model_dir: str = "app/ml/models"
 
     alert_confidence_threshold: float = 0.65
+    alert_held_symbols: str = "XAUUSD"
+    alert_throttle_seconds: int = 900
+    alert_sinks: str = "log"  # comma-separated: log,file,webhook
+    alert_file_path: str = "alerts/alerts.jsonl"
+    alert_webhook_url: str | None = None
+    alert_batch_size: int = 50
+    alert_flush_seconds: float = 2.0
+    alert_max_retries: int = 3
 
 
 @lru_cache(maxsize=1)
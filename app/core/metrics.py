@@ -0,0 +1,153 @@
+"""Prometheus metrics for jobs, providers, analytics and the HTTP API.
+
+Collectors live in the default in-process registry. When the API runs under
+several worker processes, set PROMETHEUS_MULTIPROC_DIR (to an empty, writable
+directory) before start-up; `render_metrics` then aggregates every worker's
+samples from that directory.
+"""
+from __future__ import annotations
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from starlette.requests import Request
+
+from app.db.instrumentation import pool_stats
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+JOB_DURATION = Histogram(
+    "newstracker_job_duration_seconds",
+    "Scheduler job wall time.",
+    ["job", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+JOB_ROWS = Counter(
+    "newstracker_job_rows_total",
+    "Rows handled by scheduler jobs.",
+    ["job", "outcome"],
+)
+JOB_MISSED = Counter(
+    "newstracker_job_missed_total",
+    "Scheduled runs dropped because the job was still running or fired too late.",
+    ["job", "reason"],
+)
+SIGNAL_DELAY = Histogram(
+    "newstracker_signal_delay_seconds",
+    "Time from new bars being committed to the triggered signal being stored.",
+    buckets=_LATENCY_BUCKETS,
+)
+ALERTS_SENT = Counter(
+    "newstracker_alerts_total",
+    "Alerts handed to sinks.",
+    ["sink", "status"],
+)
+PROVIDER_FETCH_LATENCY = Histogram(
+    "newstracker_provider_fetch_seconds",
+    "Latency of provider fetch calls.",
+    ["provider", "kind"],
+    buckets=_LATENCY_BUCKETS,
+)
+NEWS_ANALYZED = Counter(
+    "newstracker_news_analyzed_total",
+    "News items run through the analyzer.",
+)
+NEWS_DUPLICATES = Counter(
+    "newstracker_news_duplicates_total",
+    "News items matched to an existing near-duplicate cluster and not re-analyzed.",
+)
+NEWS_ANALYSIS_LATENCY = Histogram(
+    "newstracker_news_analysis_seconds",
+    "Time spent analyzing a single news item.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+INFERENCE_LATENCY = Histogram(
+    "newstracker_inference_seconds",
+    "Model predict_proba latency.",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+STAGE_LATENCY = Histogram(
+    "newstracker_stage_duration_seconds",
+    "Duration of traced pipeline stages.",
+    ["job", "stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+REQUEST_LATENCY = Histogram(
+    "newstracker_http_request_duration_seconds",
+    "API request latency by route template.",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+
+def observe_job(job: str, status: str, started: float) -> None:
+    JOB_DURATION.labels(job=job, status=status).observe(time.perf_counter() - started)
+
+
+def record_rows(job: str, **counts: int) -> None:
+    for outcome, count in counts.items():
+        if count:
+            JOB_ROWS.labels(job=job, outcome=outcome).inc(count)
+
+
+async def metrics_middleware(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        ).observe(time.perf_counter() - started)
+
+
+class DbPoolCollector:
+    """Exports the connection-pool counters gathered by app.db.instrumentation."""
+
+    def collect(self):
+        gauges = {
+            "checked_out": GaugeMetricFamily("newstracker_db_pool_checked_out", "Connections in use.", labels=["pool"]),
+            "overflow": GaugeMetricFamily("newstracker_db_pool_overflow", "Overflow connections open.", labels=["pool"]),
+            "size": GaugeMetricFamily("newstracker_db_pool_size", "Configured pool size.", labels=["pool"]),
+        }
+        counters = {
+            "checkouts": CounterMetricFamily("newstracker_db_pool_checkouts", "Connection checkouts.", labels=["pool"]),
+            "timeouts": CounterMetricFamily("newstracker_db_pool_timeouts", "Checkouts that timed out.", labels=["pool"]),
+            "wait_seconds_total": CounterMetricFamily(
+                "newstracker_db_pool_wait_seconds", "Time spent waiting for connections.", labels=["pool"]
+            ),
+            "slow_queries": CounterMetricFamily("newstracker_db_slow_queries", "Queries over the slow threshold.", labels=["pool"]),
+        }
+        for row in pool_stats():
+            for key, family in {**gauges, **counters}.items():
+                if key in row:
+                    family.add_metric([row["name"]], row[key])
+        yield from gauges.values()
+        yield from counters.values()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(DbPoolCollector())
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+REGISTRY.register(DbPoolCollector())
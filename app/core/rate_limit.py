@@ -1,21 +1,187 @@
+"""Process-shared rate limiting backed by atomic Redis scripts.
+
+Limiters evaluate in a single Lua script (or `SET NX` for job gating), so
+concurrent workers cannot both pass a check. When Redis is unreachable each
+limiter falls back to an in-process equivalent, which keeps limits per process
+instead of failing open.
+"""
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import functools
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable
 
 from app.core.cache import get_redis
 
+logger = logging.getLogger(__name__)
+
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait_ms = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  wait_ms = math.ceil((cost - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, wait_ms}
+"""
+
+_SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window_ms)
+if redis.call('ZCARD', KEYS[1]) < limit then
+  redis.call('ZADD', KEYS[1], now, ARGV[3])
+  redis.call('PEXPIRE', KEYS[1], window_ms)
+  return {1, 0}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, tonumber(oldest[2]) + window_ms - now}
+"""
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class _Limiter(ABC):
+    script = ""
+
+    def __init__(self, name: str) -> None:
+        self.key = f"rate_limit:{name}"
+        self._lock = threading.Lock()
+        self._scripts: dict[int, object] = {}
+
+    def try_acquire(self) -> tuple[bool, float]:
+        """Return (allowed, seconds to wait before retrying)."""
+        client = get_redis()
+        if client is not None:
+            try:
+                script = self._scripts.get(id(client))
+                if script is None:
+                    script = self._scripts.setdefault(id(client), client.register_script(self.script))
+                allowed, wait_ms = script(keys=[self.key], args=self._args())
+                return bool(allowed), int(wait_ms) / 1000
+            except Exception:
+                logger.warning("Redis rate limiter unavailable for %s; using in-process limit", self.key)
+        with self._lock:
+            return self._acquire_local(time.monotonic())
+
+    def wait(self, timeout: float | None = None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            allowed, wait_seconds = self.try_acquire()
+            if allowed:
+                return
+            if deadline is not None and time.monotonic() + wait_seconds > deadline:
+                raise RateLimitExceeded(f"{self.key} exhausted; retry in {wait_seconds:.1f}s")
+            time.sleep(max(wait_seconds, 0.01))
+
+    @abstractmethod
+    def _args(self) -> list:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _acquire_local(self, now: float) -> tuple[bool, float]:
+        raise NotImplementedError
+
+
+class TokenBucketLimiter(_Limiter):
+    """Bursts up to `capacity` calls, refilled at `refill_per_second`."""
+
+    script = _TOKEN_BUCKET_LUA
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float) -> None:
+        super().__init__(name)
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _args(self) -> list:
+        return [self.capacity, self.refill_per_second, 1]
+
+    def _acquire_local(self, now: float) -> tuple[bool, float]:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True, 0.0
+        return False, (1 - self._tokens) / self.refill_per_second
+
+
+class SlidingWindowLimiter(_Limiter):
+    """At most `limit` calls in any trailing `window_seconds`."""
+
+    script = _SLIDING_WINDOW_LUA
+
+    def __init__(self, name: str, limit: int, window_seconds: float) -> None:
+        super().__init__(name)
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._calls: deque[float] = deque()
+
+    def _args(self) -> list:
+        return [self.limit, int(self.window_seconds * 1000), uuid.uuid4().hex]
+
+    def _acquire_local(self, now: float) -> tuple[bool, float]:
+        while self._calls and self._calls[0] <= now - self.window_seconds:
+            self._calls.popleft()
+        if len(self._calls) < self.limit:
+            self._calls.append(now)
+            return True, 0.0
+        return False, self._calls[0] + self.window_seconds - now
+
+
+def rate_limited(limiter: _Limiter, timeout: float | None = None) -> Callable:
+    """Block each call until `limiter` admits it; raise RateLimitExceeded after `timeout` seconds."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            limiter.wait(timeout)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+_local_runs: dict[str, float] = {}
+_local_runs_lock = threading.Lock()
+
 
 def allow_run(name: str, min_interval_seconds: int) -> bool:
+    """Admit at most one run of job `name` per interval across all workers sharing Redis."""
     client = get_redis()
-    if client is None:
-        return True
-    key = f"rate_limit:{name}"
-    now = datetime.now(timezone.utc).timestamp()
-    try:
-        last = client.get(key)
-        if last and now - float(last) < min_interval_seconds:
+    if client is not None:
+        try:
+            return bool(client.set(f"rate_limit:{name}", time.time(), nx=True, ex=max(int(min_interval_seconds), 1)))
+        except Exception:
+            logger.warning("Redis job gate unavailable for %s; using in-process gate", name)
+    now = time.monotonic()
+    with _local_runs_lock:
+        last = _local_runs.get(name)
+        if last is not None and now - last < min_interval_seconds:
             return False
-        client.set(key, now, ex=min_interval_seconds)
-    except Exception:
+        _local_runs[name] = now
         return True
-    return True
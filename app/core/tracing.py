@@ -0,0 +1,127 @@
+"""Per-stage timing for scheduler jobs and the prediction pipeline.
+
+A job opens a `trace`; code anywhere below it marks stages with `span` or the
+`traced` decorator. Spans outside an active trace cost a context-variable lookup.
+"""
+from __future__ import annotations
+
+import cProfile
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from app.core.metrics import STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    def __init__(self, job: str) -> None:
+        self.job = job
+        self.stages: list[dict[str, Any]] = []
+        self._started = time.perf_counter()
+        self.total_ms: float | None = None
+
+    def add(self, stage: dict[str, Any]) -> None:
+        self.stages.append(stage)
+        STAGE_LATENCY.labels(job=self.job, stage=stage["name"]).observe(stage["duration_ms"] / 1000)
+
+    def finish(self) -> None:
+        self.total_ms = round((time.perf_counter() - self._started) * 1000, 3)
+
+    def summary(self) -> dict[str, Any]:
+        """Stages merged by name in first-seen order, so per-instrument loops stay compact."""
+        merged: dict[str, dict[str, Any]] = {}
+        for stage in self.stages:
+            entry = merged.setdefault(stage["name"], {"name": stage["name"], "duration_ms": 0.0, "rows": None, "calls": 0})
+            entry["duration_ms"] = round(entry["duration_ms"] + stage["duration_ms"], 3)
+            entry["calls"] += 1
+            if stage["rows"] is not None:
+                entry["rows"] = (entry["rows"] or 0) + stage["rows"]
+        return {"total_ms": self.total_ms, "stages": list(merged.values())}
+
+
+@contextmanager
+def trace(job: str, profile_path: str | Path | None = None, profiler: str = "cprofile") -> Iterator[Trace]:
+    """Trace one job run; optionally write a cProfile (.prof) or pyinstrument (.html) profile."""
+    current = Trace(job)
+    token = _current.set(current)
+    session = _start_profiler(profiler) if profile_path else None
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+        current.finish()
+        if session is not None:
+            _stop_profiler(session, Path(profile_path))
+        logger.info(
+            "%s finished in %.1f ms: %s",
+            job,
+            current.total_ms,
+            ", ".join(f"{stage['name']}={stage['duration_ms']:.1f}ms" for stage in current.summary()["stages"]),
+        )
+
+
+@contextmanager
+def span(name: str, rows: int | None = None) -> Iterator[dict[str, Any]]:
+    """Time a stage of the active trace. Set `stage["rows"]` inside the block to record a row count."""
+    stage: dict[str, Any] = {"name": name, "rows": rows}
+    current = _current.get()
+    if current is None:
+        yield stage
+        return
+    started = time.perf_counter()
+    try:
+        yield stage
+    finally:
+        stage["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        current.add(stage)
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of `span`; records `len(result)` as the row count when available."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name) as stage:
+                result = func(*args, **kwargs)
+                if hasattr(result, "__len__"):
+                    stage["rows"] = len(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def _start_profiler(profiler: str):
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed; falling back to cProfile")
+        else:
+            session = Profiler()
+            session.start()
+            return session
+    session = cProfile.Profile()
+    session.enable()
+    return session
+
+
+def _stop_profiler(session, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(session, cProfile.Profile):
+        session.disable()
+        session.dump_stats(str(path))
+    else:
+        session.stop()
+        path.write_text(session.output_html())
+    logger.info("Profile written to %s", path)
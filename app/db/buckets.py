@@ -0,0 +1,24 @@
+"""Fixed-width time buckets computed inside the database.
+
+Bucketing is a floor of epoch seconds, which each dialect spells differently.
+`bucket_index` gives the integer bucket number so results can be grouped in
+SQL; `bucket_start` turns it back into a UTC datetime on the Python side.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+
+def bucket_index(session: Session, column: ColumnElement, seconds: int) -> ColumnElement:
+    """Integer number of the `seconds`-wide bucket holding `column`."""
+    if session.get_bind().dialect.name == "sqlite":
+        return cast(func.strftime("%s", column), Integer) // seconds
+    return cast(func.floor(func.extract("epoch", column) / seconds), Integer)
+
+
+def bucket_start(index: int, seconds: int) -> datetime:
+    return datetime.fromtimestamp(int(index) * seconds, tz=timezone.utc)
@@ -1,12 +1,13 @@
 from sqlalchemy import select
 
+from app.db import session as db_session
 from app.db.models import Base, Instrument
-from app.db.session import engine, SessionLocal
+from app.features.store import purge_stale_feature_sets
 
 
 def init_db() -> None:
-    Base.metadata.create_all(bind=engine)
-    with SessionLocal() as session:
+    Base.metadata.create_all(bind=db_session.engine)
+    with db_session.SessionLocal() as session:
         existing = session.execute(
             select(Instrument).where(Instrument.symbol == "XAUUSD")
         ).scalar_one_or_none()
@@ -18,3 +19,5 @@ def init_db() -> None:
             session.add(Instrument(symbol="AUDUSD", type="fx", pip_value=0.0001))
             session.add(Instrument(symbol="USDCAD", type="fx", pip_value=0.0001))
             session.commit()
+        purge_stale_feature_sets(session)
+        session.commit()
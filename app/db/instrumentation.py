@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolMetrics:
+    name: str
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    queries: int = 0
+    query_seconds_total: float = 0.0
+    slow_queries: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_checkout(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def record_query(self, elapsed: float, slow: bool) -> None:
+        with self._lock:
+            self.queries += 1
+            self.query_seconds_total += elapsed
+            if slow:
+                self.slow_queries += 1
+
+
+_registry: dict[str, tuple[Engine, PoolMetrics]] = {}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long callers wait for a connection."""
+
+    metrics: PoolMetrics | None = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_checkout(time.perf_counter() - started, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self) -> InstrumentedQueuePool:
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument_engine(engine: Engine, name: str, slow_query_ms: int) -> PoolMetrics:
+    """Attach pool and slow-query instrumentation to `engine` and register it under `name`."""
+    metrics = PoolMetrics(name)
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.metrics = metrics
+    threshold = slow_query_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        slow = threshold > 0 and elapsed >= threshold
+        metrics.record_query(elapsed, slow)
+        if slow:
+            logger.warning("Slow query on %s pool (%.0f ms): %s", name, elapsed * 1000, " ".join(statement.split())[:500])
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        if context.connection is not None and context.connection.info.get("query_started"):
+            context.connection.info["query_started"].pop()
+
+    _registry[name] = (engine, metrics)
+    return metrics
+
+
+def pool_stats() -> list[dict[str, Any]]:
+    stats = []
+    for name, (engine, metrics) in _registry.items():
+        pool = engine.pool
+        row: dict[str, Any] = {
+            "name": name,
+            "pool_class": type(pool).__name__,
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "wait_seconds_total": metrics.wait_seconds_total,
+            "wait_seconds_max": metrics.wait_seconds_max,
+            "queries": metrics.queries,
+            "query_seconds_total": metrics.query_seconds_total,
+            "slow_queries": metrics.slow_queries,
+        }
+        if isinstance(pool, QueuePool):
+            row.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        stats.append(row)
+    return stats
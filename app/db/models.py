@@ -8,12 +8,16 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
     UniqueConstraint,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
+from app.core.utils import utc_now
+
 
 class Base(DeclarativeBase):
     pass
@@ -53,7 +57,10 @@ class TickOrBar(Base):
 
 class News(Base):
     __tablename__ = "news"
-    __table_args__ = (UniqueConstraint("url", name="uq_news_url"),)
+    __table_args__ = (
+        UniqueConstraint("url", name="uq_news_url"),
+        Index("ix_news_impact_published", "impact_level", "published_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     source: Mapped[str] = mapped_column(String(128))
@@ -70,6 +77,13 @@ class News(Base):
     is_fundamental: Mapped[bool] = mapped_column(Boolean, default=True)
     entities: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     topics: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Near-duplicate cluster: the id of the cluster's first story (its own id for that story).
+    cluster_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    minhash: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)  # uint32 MinHash signature
+    # Bumped on every ORM insert/update so the dashboard snapshot ETag sees re-analyzed stories.
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, default=utc_now, onupdate=utc_now, index=True
+    )
 
 
 class MacroEvent(Base):
@@ -87,23 +101,85 @@ class MacroEvent(Base):
     previous: Mapped[float | None] = mapped_column(Float, nullable=True)
     actual: Mapped[float | None] = mapped_column(Float, nullable=True)
     source: Mapped[str] = mapped_column(String(128))
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, default=utc_now, onupdate=utc_now, index=True
+    )
 
 
 class Signal(Base):
     __tablename__ = "signals"
     __table_args__ = (
-        UniqueConstraint("instrument_id", "ts", "model_version", name="uq_signal"),
+        UniqueConstraint("instrument_id", "timeframe", "horizon_minutes", "ts", "model_version", name="uq_signal"),
+        Index("ix_signal_instrument_ts", "instrument_id", "ts"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     instrument_id: Mapped[int] = mapped_column(ForeignKey("instruments.id"))
     ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    timeframe: Mapped[str] = mapped_column(String(16), default="1m")
+    horizon_minutes: Mapped[int] = mapped_column(Integer, default=60)
     label: Mapped[str] = mapped_column(String(16))
     confidence: Mapped[float] = mapped_column(Float)
     explanation_json: Mapped[dict] = mapped_column(JSON)
     model_version: Mapped[str] = mapped_column(String(64))
 
 
+class FeatureRow(Base):
+    __tablename__ = "features"
+    __table_args__ = (
+        UniqueConstraint("instrument_id", "timeframe", "feature_set", "ts", name="uq_feature"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    instrument_id: Mapped[int] = mapped_column(ForeignKey("instruments.id"))
+    timeframe: Mapped[str] = mapped_column(String(16))
+    feature_set: Mapped[str] = mapped_column(String(16))
+    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    values_json: Mapped[dict] = mapped_column(JSON)
+
+
+class RegimeHistory(Base):
+    """One row per regime change; a regime lasts until the next row for the same instrument/timeframe."""
+
+    __tablename__ = "regime_history"
+    __table_args__ = (
+        UniqueConstraint("instrument_id", "timeframe", "ts", name="uq_regime"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    instrument_id: Mapped[int] = mapped_column(ForeignKey("instruments.id"))
+    timeframe: Mapped[str] = mapped_column(String(16))
+    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    regime: Mapped[str] = mapped_column(String(16))
+    volatility_percentile: Mapped[float] = mapped_column(Float)
+    trend_up: Mapped[bool] = mapped_column(Boolean, default=False)
+    trend_down: Mapped[bool] = mapped_column(Boolean, default=False)
+
+
+class NewsImpact(Base):
+    """Realized return of one instrument over a horizon after a story was published.
+
+    Story attributes are copied in so the aggregates behind `/news/impact` are plain GROUP BYs.
+    """
+
+    __tablename__ = "news_impact"
+    __table_args__ = (
+        UniqueConstraint("news_id", "instrument_id", "horizon_minutes", name="uq_news_impact"),
+        Index("ix_news_impact_instrument_published", "instrument_id", "published_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    news_id: Mapped[int] = mapped_column(ForeignKey("news.id"))
+    instrument_id: Mapped[int] = mapped_column(ForeignKey("instruments.id"))
+    horizon_minutes: Mapped[int] = mapped_column(Integer)
+    published_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    source: Mapped[str] = mapped_column(String(128))
+    impact_level: Mapped[str] = mapped_column(String(16))
+    topic: Mapped[str] = mapped_column(String(64))  # the story's most-mentioned topic, or "none"
+    sentiment: Mapped[float | None] = mapped_column(Float, nullable=True)
+    return_pct: Mapped[float] = mapped_column(Float)  # close at published_at + horizon over close at published_at, minus 1
+
+
 class SystemHealth(Base):
     __tablename__ = "system_health"
     __table_args__ = (UniqueConstraint("job_name", name="uq_health_job"),)
@@ -114,3 +190,4 @@ class SystemHealth(Base):
     status: Mapped[str] = mapped_column(String(32))
     error: Mapped[str | None] = mapped_column(String(1024), nullable=True)
     ok: Mapped[bool] = mapped_column(Boolean, default=True)
+    details: Mapped[dict | None] = mapped_column(JSON, nullable=True)
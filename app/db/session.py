@@ -1,9 +1,33 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import get_settings
+from app.db.instrumentation import InstrumentedQueuePool, instrument_engine
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+
+def build_engine(name: str, pool_size: int, max_overflow: int) -> Engine:
+    url = make_url(settings.database_url)
+    options = {"pool_pre_ping": True}
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    engine = create_engine(url, **options)
+    instrument_engine(engine, name, settings.db_slow_query_ms)
+    return engine
+
+
+# API requests and background jobs get separate pools so ingestion bursts
+# cannot starve request handling of connections.
+engine = build_engine("api", settings.db_pool_size, settings.db_max_overflow)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+job_engine = build_engine("jobs", settings.db_job_pool_size, settings.db_job_max_overflow)
+JobSessionLocal = sessionmaker(bind=job_engine, autocommit=False, autoflush=False)
@@ -3,8 +3,31 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
+from app.core.tracing import traced
 
+
+INDICATOR_COLUMNS = [
+    "log_return_1",
+    "log_return_5",
+    "log_return_60",
+    "volatility_20",
+    "ema_20",
+    "ema_50",
+    "ema_200",
+    "rsi_14",
+    "macd",
+    "macd_signal",
+    "atr_14",
+]
+
+
+@traced("compute_features")
 def compute_features(data: pd.DataFrame) -> pd.DataFrame:
+    return compute_indicators(data).dropna()
+
+
+def compute_indicators(data: pd.DataFrame) -> pd.DataFrame:
+    """Price indicators without dropping warm-up rows; shared by the model and the dashboard API."""
     df = data.copy().sort_values("ts")
     returns = df["close"].pct_change()
     df["log_return_1"] = np.log1p(returns)
@@ -18,10 +41,10 @@ def compute_features(data: pd.DataFrame) -> pd.DataFrame:
     df["macd"] = df["close"].ewm(span=12, adjust=False).mean() - df["close"].ewm(span=26, adjust=False).mean()
     df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
     df["atr_14"] = _atr(df, 14)
-    df = df.dropna()
     return df
 
 
+@traced("add_news_features")
 def add_news_features(features_df: pd.DataFrame, news_df: pd.DataFrame) -> pd.DataFrame:
     df = features_df.copy()
     if news_df.empty:
@@ -35,22 +58,47 @@ def add_news_features(features_df: pd.DataFrame, news_df: pd.DataFrame) -> pd.Da
     return df
 
 
+@traced("add_macro_features")
 def add_macro_features(features_df: pd.DataFrame, macro_df: pd.DataFrame) -> pd.DataFrame:
+    """Minutes to the next high-impact USD event and the latest such release's surprise z-score.
+
+    `usd_surprise_z_24h` is the z-score (see `app.services.macro_calendar`) of the
+    most recent scored release at or before the bar within 24 hours, else 0. Frames
+    without a `surprise_z` column score 0.
+    """
     df = features_df.copy()
-    if macro_df.empty:
-        df["minutes_to_high_impact_usd"] = 0.0
+    df["minutes_to_high_impact_usd"] = 0.0
+    df["usd_surprise_z_24h"] = 0.0
+    if macro_df.empty or df.empty:
+        return df
+    high_impact = macro_df[(macro_df["currency"] == "USD") & (macro_df["impact"] == "high")].sort_values("time")
+    if high_impact.empty:
         return df
-    macro_df = macro_df.sort_values("time")
-    high_impact = macro_df[(macro_df["currency"] == "USD") & (macro_df["impact"] == "high")]
-    def minutes_to_next(ts: pd.Timestamp) -> float:
-        future = high_impact[high_impact["time"] >= ts]
-        if future.empty:
-            return 0.0
-        return float((future.iloc[0]["time"] - ts).total_seconds() / 60)
-    df["minutes_to_high_impact_usd"] = df["ts"].apply(minutes_to_next)
+    bars = _epoch_ns(df["ts"])
+    times = _epoch_ns(high_impact["time"])
+    following = np.searchsorted(times, bars, side="left")
+    upcoming = following < len(times)
+    minutes = np.zeros(len(bars))
+    minutes[upcoming] = (times[following[upcoming]] - bars[upcoming]) / 60e9
+    df["minutes_to_high_impact_usd"] = minutes
+    if "surprise_z" in high_impact:
+        scored = high_impact["surprise_z"].notna().to_numpy()
+        released = times[scored]
+        scores = high_impact["surprise_z"].to_numpy(dtype=float)[scored]
+        latest = np.searchsorted(released, bars, side="right") - 1
+        recent = latest >= 0
+        recent[recent] = bars[recent] - released[latest[recent]] <= pd.Timedelta(hours=24).value
+        surprise = np.zeros(len(bars))
+        surprise[recent] = scores[latest[recent]]
+        df["usd_surprise_z_24h"] = surprise
     return df
 
 
+def _epoch_ns(values: pd.Series) -> np.ndarray:
+    # Naive timestamps are UTC throughout, so localize them rather than mixing.
+    return pd.to_datetime(values, utc=True).to_numpy(dtype="datetime64[ns]").view("int64")
+
+
 def _rsi(series: pd.Series, period: int) -> pd.Series:
     delta = series.diff()
     gain = delta.clip(lower=0)
@@ -0,0 +1,159 @@
+"""Persisted model features, one row per instrument/timeframe/bar.
+
+Features are computed once when bars are ingested and read back by training,
+prediction and `/indicators`. Rows are tagged with `FEATURE_SET`, a hash of
+the feature columns and `FEATURE_SET_VERSION`; bump the version whenever a
+formula in `app.features.engineering` changes so stale rows are ignored and
+rebuilt.
+
+Each update recomputes from the newest stored bar onward (aggregated bars keep
+changing until their bucket closes), with `FEATURE_STORE_WARMUP_BARS` earlier
+bars loaded to warm up the EMAs. News and macro commits can change features of
+bars that are already stored, so ingestion invalidates rows from the affected
+time onward and the next update rebuilds them.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import FeatureRow, News, TickOrBar
+from app.features.engineering import INDICATOR_COLUMNS, add_macro_features, add_news_features, compute_indicators
+from app.services.macro_calendar import get_macro_calendar
+
+FEATURE_SET_VERSION = 2
+FEATURE_COLUMNS = [*INDICATOR_COLUMNS, "news_sentiment_24h", "minutes_to_high_impact_usd", "usd_surprise_z_24h"]
+STORED_COLUMNS = ["close", *FEATURE_COLUMNS]
+FEATURE_SET = hashlib.sha1(
+    json.dumps({"version": FEATURE_SET_VERSION, "columns": STORED_COLUMNS}).encode()
+).hexdigest()[:12]
+TIMEFRAMES = ("1m", "5m", "1h", "1d")
+TIMEFRAME_MINUTES = {"1m": 1, "5m": 5, "1h": 60, "1d": 1440}
+_BAR_FIELDS = ("ts", "open", "high", "low", "close", "volume")
+# Near-duplicate copies share their representative's sentiment; count each cluster once.
+REPRESENTATIVE_NEWS = or_(News.cluster_id.is_(None), News.cluster_id == News.id)
+
+
+def update_features(session: Session, instrument_id: int, timeframe: str = "1m", warmup: int | None = None) -> int:
+    """Compute and store features for bars newer than the last stored one; returns rows written."""
+    warmup = get_settings().feature_store_warmup_bars if warmup is None else warmup
+    last = latest_feature_ts(session, instrument_id, timeframe)
+    query = (
+        select(*(getattr(TickOrBar, name) for name in _BAR_FIELDS))
+        .where(TickOrBar.instrument_id == instrument_id)
+        .where(TickOrBar.timeframe == timeframe)
+    )
+    if last is None:
+        rows = session.execute(query.order_by(TickOrBar.ts)).all()
+        history = []
+    else:
+        rows = session.execute(query.where(TickOrBar.ts >= last).order_by(TickOrBar.ts)).all()
+        history = session.execute(query.where(TickOrBar.ts < last).order_by(TickOrBar.ts.desc()).limit(warmup)).all()
+    if not rows:
+        return 0
+    frame = compute_indicators(pd.DataFrame(history[::-1] + rows, columns=list(_BAR_FIELDS))).tail(len(rows))
+    first, newest = rows[0].ts, rows[-1].ts
+    news_rows = session.execute(
+        select(News.published_at, News.sentiment)
+        .where(News.published_at >= first - timedelta(hours=24))
+        .where(News.published_at <= newest)
+        .where(REPRESENTATIVE_NEWS)
+    ).all()
+    news_df = pd.DataFrame(
+        [{"published_at": row.published_at, "sentiment": row.sentiment or 0.0} for row in news_rows]
+    )
+    macro_df = get_macro_calendar(session).events("USD", "high", start=first - timedelta(hours=24))
+    frame = add_macro_features(add_news_features(frame, news_df), macro_df)
+
+    if last is not None:
+        session.execute(
+            delete(FeatureRow)
+            .where(FeatureRow.instrument_id == instrument_id)
+            .where(FeatureRow.timeframe == timeframe)
+            .where(FeatureRow.feature_set == FEATURE_SET)
+            .where(FeatureRow.ts >= last)
+        )
+    records = frame[STORED_COLUMNS].to_dict(orient="records")
+    session.execute(
+        insert(FeatureRow),
+        [
+            {
+                "instrument_id": instrument_id,
+                "timeframe": timeframe,
+                "feature_set": FEATURE_SET,
+                "ts": row.ts,
+                "values_json": {key: _clean(value) for key, value in record.items()},
+            }
+            for row, record in zip(rows, records)
+        ],
+    )
+    return len(rows)
+
+
+def invalidate_features(session: Session, since: datetime | None = None, instrument_id: int | None = None) -> int:
+    """Drop stored rows from `since` onward (all rows when None) so the next update rebuilds them."""
+    statement = delete(FeatureRow)
+    if since is not None:
+        statement = statement.where(FeatureRow.ts >= since)
+    if instrument_id is not None:
+        statement = statement.where(FeatureRow.instrument_id == instrument_id)
+    return session.execute(statement).rowcount or 0
+
+
+def purge_stale_feature_sets(session: Session) -> int:
+    """Delete rows written by other feature-set versions."""
+    return session.execute(delete(FeatureRow).where(FeatureRow.feature_set != FEATURE_SET)).rowcount or 0
+
+
+def read_features(
+    session: Session,
+    instrument_id: int,
+    timeframe: str = "1m",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int | None = None,
+    dropna: bool = False,
+) -> pd.DataFrame:
+    """Stored features as a frame with `ts` and `STORED_COLUMNS`, oldest first.
+
+    With `limit`, only the newest `limit` rows of the range are returned.
+    `dropna=True` drops warm-up rows, matching `compute_features`.
+    """
+    query = (
+        select(FeatureRow.ts, FeatureRow.values_json)
+        .where(FeatureRow.instrument_id == instrument_id)
+        .where(FeatureRow.timeframe == timeframe)
+        .where(FeatureRow.feature_set == FEATURE_SET)
+    )
+    if start is not None:
+        query = query.where(FeatureRow.ts >= start)
+    if end is not None:
+        query = query.where(FeatureRow.ts <= end)
+    if limit is not None:
+        rows = session.execute(query.order_by(FeatureRow.ts.desc()).limit(limit)).all()[::-1]
+    else:
+        rows = session.execute(query.order_by(FeatureRow.ts)).all()
+    frame = pd.DataFrame.from_records([row.values_json for row in rows], columns=STORED_COLUMNS).astype(float)
+    frame.insert(0, "ts", pd.to_datetime([row.ts for row in rows]))
+    return frame.dropna().reset_index(drop=True) if dropna else frame
+
+
+def latest_feature_ts(session: Session, instrument_id: int, timeframe: str) -> datetime | None:
+    return session.execute(
+        select(func.max(FeatureRow.ts))
+        .where(FeatureRow.instrument_id == instrument_id)
+        .where(FeatureRow.timeframe == timeframe)
+        .where(FeatureRow.feature_set == FEATURE_SET)
+    ).scalar()
+
+
+def _clean(value: float) -> float | None:
+    # JSON has no NaN; warm-up rows store nulls and read back as NaN.
+    return None if value is None or math.isnan(value) else float(value)
@@ -0,0 +1,401 @@
+"""Bulk historical backfill from large CSV or Parquet files.
+
+Usage:
+    python -m app.ingestion.backfill prices history/xauusd_1m.parquet
+    python -m app.ingestion.backfill news archive/news.csv --chunk-size 20000
+    python -m app.ingestion.backfill macro calendar.csv --restart
+
+Files are streamed in chunks, normalized to the table layout and bulk-loaded
+(`COPY` through a staging table on Postgres, `INSERT OR IGNORE` executemany on
+SQLite). Rows that already exist are skipped via the tables' unique
+constraints. Progress is checkpointed after every committed chunk to
+`<file>.backfill.json`; re-running the same command resumes from there.
+Once loading finishes, higher timeframes are aggregated for the loaded range
+(prices) or pending items are analyzed in batches (news).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import logging
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterator
+
+import pandas as pd
+from sqlalchemy import Table, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.analytics.news_analysis import RuleBasedNewsAnalyzer
+from app.core.logging import configure_logging
+from app.core.utils import utc_now
+from app.db.models import Instrument, MacroEvent, News, TickOrBar
+from app.db.session import JobSessionLocal
+from app.features.store import invalidate_features
+from app.services.news_clusters import InProcessNewsIndex, cluster_analysis, get_news_index, news_signature
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_RULES = {"5m": "5min", "1h": "1h", "1d": "1D"}
+AGGREGATE_WINDOW = timedelta(days=30)
+ANALYSIS_BATCH = 1000
+
+# Target columns per kind and the defaults applied when a file omits them.
+LAYOUTS: dict[str, dict[str, Any]] = {
+    "prices": {
+        "table": TickOrBar.__table__,
+        "columns": ["instrument_id", "timeframe", "ts", "open", "high", "low", "close", "volume", "bid", "ask"],
+        "required": ["symbol", "ts", "open", "high", "low", "close"],
+        "defaults": {"timeframe": "1m", "volume": 0.0, "bid": None, "ask": None},
+        "times": ["ts"],
+    },
+    "news": {
+        "table": News.__table__,
+        "columns": [
+            "source",
+            "published_at",
+            "title",
+            "summary",
+            "analysis_summary",
+            "url",
+            "sentiment_label",
+            "impact_level",
+            "rationale",
+            "is_fundamental",
+            "updated_at",
+        ],
+        "required": ["published_at", "title", "url"],
+        "defaults": {
+            "source": "backfill",
+            "summary": "",
+            "analysis_summary": "",
+            "sentiment_label": "neutral",
+            "impact_level": "low",
+            "rationale": "",
+            "is_fundamental": False,
+        },
+        "times": ["published_at"],
+    },
+    "macro": {
+        "table": MacroEvent.__table__,
+        "columns": ["time", "currency", "impact", "name", "forecast", "previous", "actual", "source", "updated_at"],
+        "required": ["time", "currency", "name"],
+        "defaults": {"impact": "medium", "forecast": None, "previous": None, "actual": None, "source": "backfill"},
+        "times": ["time"],
+    },
+}
+
+
+def read_chunks(path: Path, chunk_size: int, skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of at most `chunk_size` rows, starting after `skip_rows` data rows."""
+    if path.suffix.lower() in (".parquet", ".pq"):
+        yield from _read_parquet_chunks(path, chunk_size, skip_rows)
+        return
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        # Skip whole records, not lines, so quoted fields with newlines stay intact.
+        records = csv.reader(handle)
+        header = next(records)
+        for _ in islice(records, skip_rows):
+            pass
+        yield from pd.read_csv(handle, names=header, header=None, chunksize=chunk_size)
+
+
+def _read_parquet_chunks(path: Path, chunk_size: int, skip_rows: int) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    first_group, offset = 0, skip_rows
+    while first_group < parquet.num_row_groups and offset >= parquet.metadata.row_group(first_group).num_rows:
+        offset -= parquet.metadata.row_group(first_group).num_rows
+        first_group += 1
+    groups = list(range(first_group, parquet.num_row_groups))
+    if not groups:
+        return
+    for batch in parquet.iter_batches(batch_size=chunk_size, row_groups=groups):
+        if offset >= batch.num_rows:
+            offset -= batch.num_rows
+            continue
+        if offset:
+            batch, offset = batch.slice(offset), 0
+        yield batch.to_pandas()
+
+
+def normalize(kind: str, chunk: pd.DataFrame, symbols: dict[str, int]) -> tuple[pd.DataFrame, int]:
+    """Map a raw chunk onto the target columns. Returns the frame and the number of rows dropped."""
+    layout = LAYOUTS[kind]
+    missing = [column for column in layout["required"] if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"{kind} file is missing columns: {', '.join(missing)}")
+    frame = chunk.copy()
+    for column, default in layout["defaults"].items():
+        if column not in frame.columns:
+            frame[column] = default
+        elif default is not None:
+            frame[column] = frame[column].fillna(default)
+    for column in layout["times"]:
+        frame[column] = pd.to_datetime(frame[column], utc=True, errors="coerce")
+    if "updated_at" in layout["columns"]:
+        # A Python-side default, so bulk paths (COPY in particular) must set it themselves.
+        frame["updated_at"] = pd.Timestamp(utc_now())
+    if kind == "prices":
+        frame["instrument_id"] = frame["symbol"].map(symbols)
+    before = len(frame)
+    keys = [column for column in layout["required"] if column in layout["columns"]]
+    frame = frame.dropna(subset=keys + (["instrument_id"] if kind == "prices" else []))
+    if kind == "prices":
+        frame["instrument_id"] = frame["instrument_id"].astype(int)
+    frame = frame[layout["columns"]].astype(object).where(frame[layout["columns"]].notna(), None)
+    return frame, before - len(frame)
+
+
+def bulk_insert(session: Session, table: Table, frame: pd.DataFrame) -> int:
+    """Insert rows, skipping ones that violate a unique constraint. Returns rows inserted."""
+    if frame.empty:
+        return 0
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return _copy_insert(session, table, frame)
+    statement = insert(table)
+    if dialect == "sqlite":
+        statement = statement.prefix_with("OR IGNORE")
+    result = session.execute(statement, frame.to_dict(orient="records"))
+    return max(result.rowcount, 0)
+
+
+def _copy_insert(session: Session, table: Table, frame: pd.DataFrame) -> int:
+    columns = list(frame.columns)
+    column_list = ", ".join(columns)
+    text_columns = [column for column in columns if not table.c[column].nullable and frame[column].map(type).eq(str).any()]
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor = session.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS backfill_stage (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP")
+        force_not_null = f", FORCE_NOT_NULL ({', '.join(text_columns)})" if text_columns else ""
+        cursor.copy_expert(f"COPY backfill_stage ({column_list}) FROM STDIN WITH (FORMAT csv{force_not_null})", buffer)
+        cursor.execute(
+            f"INSERT INTO {table.name} ({column_list}) SELECT {column_list} FROM backfill_stage ON CONFLICT DO NOTHING"
+        )
+        inserted = cursor.rowcount
+        cursor.execute("TRUNCATE backfill_stage")
+    finally:
+        cursor.close()
+    return max(inserted, 0)
+
+
+def upsert(session: Session, table: Table, rows: list[dict[str, Any]], keys: list[str]) -> None:
+    """Insert rows, overwriting existing rows with the same `keys`."""
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        session.execute(insert(table), rows)
+        return
+    statement = dialect_insert(table)
+    updates = {column: statement.excluded[column] for column in rows[0] if column not in keys}
+    session.execute(statement.on_conflict_do_update(index_elements=keys, set_=updates), rows)
+
+
+def aggregate_range(session: Session, instrument_id: int, start: datetime, end: datetime) -> int:
+    """Rebuild 5m/1h/1d bars from stored 1m bars between `start` and `end`, in day-aligned windows."""
+    written = 0
+    window_start = pd.Timestamp(start).floor("1D")
+    end = pd.Timestamp(end)
+    while window_start <= end:
+        window_end = window_start + AGGREGATE_WINDOW
+        rows = session.execute(
+            select(TickOrBar.ts, TickOrBar.open, TickOrBar.high, TickOrBar.low, TickOrBar.close, TickOrBar.volume)
+            .where(
+                TickOrBar.instrument_id == instrument_id,
+                TickOrBar.timeframe == "1m",
+                TickOrBar.ts >= window_start.to_pydatetime(),
+                TickOrBar.ts < window_end.to_pydatetime(),
+            )
+            .order_by(TickOrBar.ts)
+        ).all()
+        if rows:
+            bars = pd.DataFrame(rows, columns=["ts", "open", "high", "low", "close", "volume"])
+            bars["ts"] = pd.to_datetime(bars["ts"], utc=True)
+            bars = bars.set_index("ts")
+            for timeframe, rule in AGGREGATE_RULES.items():
+                agg = bars.resample(rule).agg(
+                    {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+                ).dropna()
+                agg = agg.reset_index().assign(instrument_id=instrument_id, timeframe=timeframe)
+                upsert(session, TickOrBar.__table__, agg.to_dict(orient="records"), ["instrument_id", "timeframe", "ts"])
+                written += len(agg)
+            session.commit()
+        window_start = window_end
+    return written
+
+
+def analyze_pending_news(session: Session, batch_size: int = ANALYSIS_BATCH) -> int:
+    """Run the analyzer over news that has never been analyzed (sentiment is NULL).
+
+    Near-duplicates of an already analyzed story join its cluster and copy its analysis.
+    """
+    analyzer = RuleBasedNewsAnalyzer()
+    index = get_news_index(session)
+    analyzed = 0
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(News.id, News.title, News.summary, News.source, News.published_at)
+            .where(News.sentiment.is_(None), News.id > last_id)
+            .order_by(News.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return analyzed
+        updates = []
+        # Representatives analyzed in this batch are not written yet, so they are matched and
+        # kept here; the shared index only learns about a batch once it is committed.
+        batch_index = InProcessNewsIndex(index.bands, index.threshold, index.window)
+        batch_fields: dict[int, dict[str, Any]] = {}
+        indexed = []
+        for row in rows:
+            signature = news_signature(row.title, row.summary or "")
+            cluster_id = index.match(signature)
+            fields = cluster_analysis(session, cluster_id)
+            if fields is None:
+                cluster_id = batch_index.match(signature)
+                fields = batch_fields.get(cluster_id)
+            if fields is None:
+                cluster_id = row.id
+                analysis = analyzer.analyze(title=row.title, summary=row.summary or "", source=row.source)
+                fields = {
+                    "analysis_summary": analysis.summary,
+                    "sentiment": analysis.sentiment_score,
+                    "sentiment_label": analysis.sentiment_label,
+                    "impact_level": analysis.impact_level,
+                    "impacted_assets": analysis.impacted_assets,
+                    "rationale": analysis.rationale,
+                    "entities": {"symbols": analysis.impacted_assets},
+                    "topics": analysis.topics,
+                    "is_fundamental": analysis.is_fundamental,
+                }
+                batch_fields[row.id] = fields
+                batch_index.add(row.id, row.id, signature, row.published_at)
+            indexed.append((row.id, cluster_id, signature, row.published_at))
+            updates.append(
+                {
+                    "id": row.id,
+                    "cluster_id": cluster_id,
+                    "minhash": signature.tobytes() if signature is not None else None,
+                    **fields,
+                }
+            )
+        session.execute(update(News), updates)
+        session.commit()
+        for entry in indexed:
+            index.add(*entry)
+        analyzed += len(updates)
+        last_id = rows[-1].id
+
+
+class Checkpoint:
+    """Progress for one source file, invalidated when the file changes."""
+
+    def __init__(self, path: Path, source: Path, kind: str) -> None:
+        self.path = path
+        stat = source.stat()
+        self.identity = {"source": str(source.resolve()), "kind": kind, "size": stat.st_size, "mtime": stat.st_mtime}
+        self.state: dict[str, Any] = {"rows_done": 0, "inserted": 0, "dropped": 0, "ranges": {}, "phase": "load"}
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        saved = json.loads(self.path.read_text())
+        if saved.get("identity") != self.identity:
+            logger.warning("Checkpoint %s belongs to a different or modified file; starting over", self.path)
+            return False
+        self.state = saved["state"]
+        return True
+
+    def save(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"identity": self.identity, "state": self.state}, default=str))
+        tmp.replace(self.path)
+
+    def extend_range(self, instrument_id: int, start: datetime, end: datetime) -> None:
+        key = str(instrument_id)
+        current = self.state["ranges"].get(key)
+        if current:
+            start = min(start, datetime.fromisoformat(current[0]))
+            end = max(end, datetime.fromisoformat(current[1]))
+        self.state["ranges"][key] = [start.isoformat(), end.isoformat()]
+
+
+def backfill(
+    kind: str,
+    path: Path,
+    chunk_size: int = 50000,
+    checkpoint_path: Path | None = None,
+    restart: bool = False,
+    post_process: bool = True,
+) -> dict[str, Any]:
+    checkpoint = Checkpoint(checkpoint_path or path.with_name(path.name + ".backfill.json"), path, kind)
+    if not restart and checkpoint.load():
+        logger.info("Resuming %s backfill of %s at row %s", kind, path, checkpoint.state["rows_done"])
+    layout = LAYOUTS[kind]
+    with JobSessionLocal() as session:
+        symbols = dict(session.execute(select(Instrument.symbol, Instrument.id)).all())
+        if checkpoint.state["phase"] == "load":
+            for chunk in read_chunks(path, chunk_size, checkpoint.state["rows_done"]):
+                frame, dropped = normalize(kind, chunk, symbols)
+                checkpoint.state["inserted"] += bulk_insert(session, layout["table"], frame)
+                session.commit()
+                checkpoint.state["rows_done"] += len(chunk)
+                checkpoint.state["dropped"] += dropped
+                if kind == "prices":
+                    for instrument_id, group in frame.groupby("instrument_id"):
+                        checkpoint.extend_range(int(instrument_id), min(group["ts"]), max(group["ts"]))
+                checkpoint.save()
+                logger.info("%s: %s rows read, %s inserted", path.name, checkpoint.state["rows_done"], checkpoint.state["inserted"])
+            checkpoint.state["phase"] = "post"
+            checkpoint.save()
+        if checkpoint.state["phase"] == "post" and post_process:
+            if kind == "prices":
+                aggregated = 0
+                for instrument_id, (start, end) in checkpoint.state["ranges"].items():
+                    aggregated += aggregate_range(
+                        session, int(instrument_id), datetime.fromisoformat(start), datetime.fromisoformat(end)
+                    )
+                    invalidate_features(session, datetime.fromisoformat(start), int(instrument_id))
+                checkpoint.state["aggregated"] = aggregated
+            elif kind == "news":
+                checkpoint.state["analyzed"] = analyze_pending_news(session)
+            if kind != "prices":
+                # Historical news or releases can touch any stored bar; rebuild features on the next ingest.
+                invalidate_features(session)
+            session.commit()
+            checkpoint.state["phase"] = "done"
+            checkpoint.save()
+    return checkpoint.state
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=sorted(LAYOUTS))
+    parser.add_argument("path", type=Path, help="CSV or Parquet file")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--checkpoint", type=Path, default=None, help="default: <path>.backfill.json")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--skip-post", action="store_true", help="skip aggregation / news analysis after loading")
+    args = parser.parse_args(argv)
+    configure_logging("INFO")
+    state = backfill(args.kind, args.path, args.chunk_size, args.checkpoint, args.restart, not args.skip_post)
+    print(json.dumps(state, indent=2, default=str))
+    return state
+
+
+if __name__ == "__main__":
+    main()
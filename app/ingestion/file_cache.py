@@ -0,0 +1,133 @@
+"""Parsed, time-sorted views of CSV files shared by the file-backed providers.
+
+A file is parsed once and kept in memory, keyed by its size and mtime. When a
+file only grew and its previous tail is unchanged, just the appended bytes are
+parsed (tailing from the last byte offset); any other change triggers a full
+re-read. Rows are kept sorted by the time column so `since` filtering is a
+binary search, and per-key slices (e.g. one symbol) are cached between polls.
+"""
+from __future__ import annotations
+
+import io
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_TAIL_CHECK_BYTES = 256
+
+
+class CachedCsv:
+    def __init__(self, path: Path, time_column: str) -> None:
+        self.path = path
+        self.time_column = time_column
+        self._lock = threading.Lock()
+        self._frame: pd.DataFrame | None = None
+        self._signature: tuple[int, int] | None = None
+        self._offset = 0
+        self._tail = b""
+        self._header: list[str] = []
+        self._groups: dict[tuple[str, object], pd.DataFrame] = {}
+
+    def frame(self) -> pd.DataFrame | None:
+        """The whole file, sorted by time; None when the file does not exist."""
+        with self._lock:
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                self._reset()
+                return None
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if signature != self._signature:
+                if self._appendable(stat.st_size):
+                    self._append()
+                else:
+                    self._load()
+                self._signature = signature
+                self._groups.clear()
+            return self._frame
+
+    def since(self, since: datetime | None, column: str | None = None, value: object = None) -> pd.DataFrame:
+        """Rows strictly after `since`, optionally restricted to rows where `column == value`."""
+        data = self.frame()
+        if data is None:
+            return pd.DataFrame()
+        if column is not None:
+            with self._lock:
+                key = (column, value)
+                if key not in self._groups:
+                    self._groups[key] = data[data[column] == value] if column in data.columns else data.iloc[0:0]
+                data = self._groups[key]
+        if since is None:
+            return data
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        times = data[self.time_column].to_numpy(dtype="datetime64[ns]")
+        start = np.searchsorted(times, np.datetime64(pd.Timestamp(since).tz_convert(None)), side="right")
+        return data.iloc[start:]
+
+    def _reset(self) -> None:
+        self._frame = None
+        self._signature = None
+        self._offset = 0
+        self._tail = b""
+        self._groups.clear()
+
+    def _appendable(self, size: int) -> bool:
+        """True when the file grew past a complete last line that is still in place."""
+        if self._frame is None or size <= self._offset or not self._tail.endswith(b"\n"):
+            return False
+        start = max(self._offset - len(self._tail), 0)
+        with self.path.open("rb") as handle:
+            handle.seek(start)
+            return handle.read(self._offset - start) == self._tail
+
+    def _load(self) -> None:
+        raw = self.path.read_bytes()
+        frame = pd.read_csv(io.BytesIO(raw))
+        self._header = list(frame.columns)
+        self._frame = self._sorted(self._parse(frame))
+        self._tail = b""
+        self._mark(raw, len(raw))
+
+    def _append(self) -> None:
+        with self.path.open("rb") as handle:
+            handle.seek(self._offset)
+            raw = handle.read()
+        end = raw.rfind(b"\n") + 1
+        if end == 0:
+            return  # only a partial line so far
+        new = self._parse(pd.read_csv(io.BytesIO(raw[:end]), names=self._header, header=None))
+        if not new.empty:
+            combined = pd.concat([self._frame, new], ignore_index=True)
+            last = self._frame[self.time_column].iloc[-1] if len(self._frame) else None
+            if last is not None and new[self.time_column].min() < last:
+                combined = self._sorted(combined)
+            self._frame = combined
+        self._mark(raw[:end], self._offset + end)
+
+    def _mark(self, consumed: bytes, offset: int) -> None:
+        self._offset = offset
+        self._tail = (self._tail + consumed)[-_TAIL_CHECK_BYTES:]
+
+    def _parse(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame[self.time_column] = pd.to_datetime(frame[self.time_column], utc=True)
+        return frame
+
+    def _sorted(self, frame: pd.DataFrame) -> pd.DataFrame:
+        return frame.sort_values(self.time_column, kind="mergesort").reset_index(drop=True)
+
+
+_cache: dict[tuple[str, str], CachedCsv] = {}
+_cache_lock = threading.Lock()
+
+
+def cached_csv(path: str | Path, time_column: str) -> CachedCsv:
+    """Process-wide cache entry; providers are rebuilt every poll but share parsed files."""
+    key = (str(Path(path).resolve()), time_column)
+    with _cache_lock:
+        if key not in _cache:
+            _cache[key] = CachedCsv(Path(path), time_column)
+        return _cache[key]
@@ -3,9 +3,8 @@ from __future__ import annotations
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
-
 from app.ingestion.base import MacroProvider
+from app.ingestion.file_cache import cached_csv
 
 
 class CsvMacroProvider(MacroProvider):
@@ -13,9 +12,4 @@ class CsvMacroProvider(MacroProvider):
         self.csv_path = Path(csv_path)
 
     def fetch_events(self, since: datetime | None) -> list[dict]:
-        if not self.csv_path.exists():
-            return []
-        data = pd.read_csv(self.csv_path, parse_dates=["time"])
-        if since is not None:
-            data = data[data["time"] > since]
-        return data.sort_values("time").to_dict(orient="records")
+        return cached_csv(self.csv_path, "time").since(since).to_dict(orient="records")
@@ -5,14 +5,20 @@ from datetime import datetime
 import requests
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from app.core.config import get_settings
+from app.core.rate_limit import SlidingWindowLimiter, rate_limited
 from app.ingestion.base import PriceProvider
 
+# Shared by every worker through Redis, so the free-tier quota holds across processes.
+_quota = SlidingWindowLimiter("alphavantage", get_settings().alphavantage_requests_per_minute, 60)
+
 
 class AlphaVantagePriceProvider(PriceProvider):
     def __init__(self, api_key: str) -> None:
         self.api_key = api_key
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10))
+    @rate_limited(_quota, timeout=60)
     def fetch_bars(self, symbol: str, timeframe: str, start: datetime | None) -> list[dict]:
         interval = "1min" if timeframe == "1m" else "5min"
         params = {
@@ -3,9 +3,8 @@ from __future__ import annotations
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
-
 from app.ingestion.base import PriceProvider
+from app.ingestion.file_cache import cached_csv
 
 
 class DemoPriceProvider(PriceProvider):
@@ -13,12 +12,7 @@ class DemoPriceProvider(PriceProvider):
         self.data_path = Path(data_path)
 
     def fetch_bars(self, symbol: str, timeframe: str, start: datetime | None) -> list[dict]:
-        if not self.data_path.exists():
-            return []
-        data = pd.read_csv(self.data_path, parse_dates=["ts"])
-        data = data[data["symbol"] == symbol]
-        if start is not None:
-            data = data[data["ts"] > start]
-        if timeframe != "1m":
+        data = cached_csv(self.data_path, "ts").since(start, "symbol", symbol)
+        if timeframe != "1m" and not data.empty:
             data = data[data["timeframe"] == timeframe]
-        return data.sort_values("ts").to_dict(orient="records")
+        return data.to_dict(orient="records")
@@ -0,0 +1,236 @@
+"""Offline simulation providers for soak and load testing.
+
+A single `Simulation` (built from settings, shared by every provider instance)
+owns a clock that runs `SIMULATION_SPEED` times faster than wall time. Prices
+either replay a historical CSV file or follow seeded random walks for
+any number of symbols; news arrives as a Poisson stream with occasional
+bursts; macro releases follow a fixed daily calendar and are published
+`SIMULATION_MACRO_LOOKAHEAD_HOURS` ahead. News and macro items for a given
+simulated minute/day are derived from the seed alone, so repeated or
+overlapping fetches return identical rows.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import get_settings
+from app.ingestion.base import MacroProvider, NewsProvider, PriceProvider
+from app.ingestion.file_cache import cached_csv
+
+_BASE_PRICES = {"XAUUSD": 2350.0, "EURUSD": 1.09, "GBPUSD": 1.27, "USDJPY": 148.0, "AUDUSD": 0.66, "USDCAD": 1.35}
+_HEADLINES = [
+    ("US CPI beats forecasts as core prices stay firm", "Inflation pressures complicate the FOMC rate path."),
+    ("ECB holds policy rate, signals patience", "Guidance points to data dependence on wage growth."),
+    ("Gold climbs on geopolitical tension", "Safe-haven demand lifts bullion as conflict headlines spread."),
+    ("Dollar slips after weak retail sales", "Growth concerns weigh on yields and the greenback."),
+    ("BoJ minutes show debate over yield curve control", "Some members favour an earlier exit from easing."),
+    ("Oil rallies as supply cuts extend", "Crude gains feed into inflation expectations."),
+    ("Risk-on mood lifts equities and commodity FX", "Stocks rise while volatility drops to multi-month lows."),
+    ("Jobs report surprises to the upside", "NFP strength pushes back expectations of a rate cut."),
+]
+_CALENDAR = [
+    ("08:30", "EUR", "medium", "German Ifo Business Climate", 87.0, 1.5),
+    ("12:30", "USD", "high", "Non-Farm Payrolls", 180000.0, 25000.0),
+    ("14:00", "USD", "high", "CPI m/m", 0.3, 0.1),
+    ("23:50", "JPY", "medium", "Tankan Index", 12.0, 3.0),
+]
+
+
+class SimulationClock:
+    def __init__(self, origin: datetime, speed: float) -> None:
+        self.origin = origin
+        self.speed = speed
+        self._wall_origin = time.monotonic()
+
+    def now(self) -> datetime:
+        return self.origin + timedelta(seconds=(time.monotonic() - self._wall_origin) * self.speed)
+
+
+class Simulation:
+    def __init__(self, settings=None) -> None:
+        settings = settings or get_settings()
+        self.settings = settings
+        self.seed = settings.simulation_seed
+        self._lock = threading.Lock()
+        self._walks: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self.replay = Path(settings.simulation_replay_path) if settings.simulation_replay_path else None
+        origin = settings.simulation_start
+        if origin is None and self.replay is not None:
+            frame = cached_csv(self.replay, "ts").frame() if self.replay.suffix == ".csv" else None
+            origin = frame["ts"].iloc[0].to_pydatetime() if frame is not None and len(frame) else None
+        origin = origin or datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        if origin.tzinfo is None:
+            origin = origin.replace(tzinfo=timezone.utc)
+        self.clock = SimulationClock(origin, settings.simulation_speed)
+
+    def bars(self, symbol: str, start: datetime | None) -> list[dict]:
+        now = pd.Timestamp(self.clock.now())
+        if self.replay is not None:
+            frame = self._replay_frame().since(start, "symbol", symbol)
+            return frame[frame["ts"] <= now].to_dict(orient="records")
+        ts, close = self._walk(symbol, now)
+        lower = 0 if start is None else np.searchsorted(ts, _as_ns(start), side="right")
+        if lower >= len(ts):
+            return []
+        rng = np.random.default_rng([self.seed, _symbol_key(symbol), int(ts[lower] // 60_000_000_000)])
+        closes = close[lower:]
+        opens = close[lower - 1 : len(close) - 1] if lower else np.concatenate([[closes[0]], closes[:-1]])
+        spread = np.abs(rng.normal(0, 0.0002, len(closes))) * closes
+        frame = pd.DataFrame(
+            {
+                "symbol": symbol,
+                "timeframe": "1m",
+                "ts": pd.to_datetime(ts[lower:], utc=True),
+                "open": opens,
+                "high": np.maximum(opens, closes) + spread,
+                "low": np.minimum(opens, closes) - spread,
+                "close": closes,
+                "volume": rng.integers(100, 5000, len(closes)).astype(float),
+            }
+        )
+        return frame.to_dict(orient="records")
+
+    def news(self, since: datetime | None) -> list[dict]:
+        settings = self.settings
+        now = self.clock.now()
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)  # SQLite hands back naive UTC
+        start = max(since, now - timedelta(hours=1)) if since is not None else now - timedelta(hours=1)
+        items = []
+        minute = start.replace(second=0, microsecond=0)
+        rate = settings.simulation_news_per_hour / 60
+        while minute <= now:
+            minute_key = int(minute.timestamp() // 60)
+            rng = np.random.default_rng([self.seed, 1, minute_key])
+            regular = int(rng.poisson(rate))
+            burst = settings.simulation_news_burst_size if rng.random() < settings.simulation_news_burst_probability else 0
+            # Bursts reuse one story so they cluster like wire re-posts of the same event.
+            story = int(rng.integers(0, len(_HEADLINES)))
+            for index in range(regular + burst):
+                # Draw every value before the window check so the stream does not depend on `since`.
+                published = minute + timedelta(seconds=float(rng.uniform(0, 60)))
+                pick = story if index >= regular else int(rng.integers(0, len(_HEADLINES)))
+                source = str(rng.choice(["SimWire", "SimDesk", "SimFX"]))
+                if not (start < published <= now):
+                    continue
+                title, summary = _HEADLINES[pick]
+                items.append(
+                    {
+                        "source": source,
+                        "published_at": published,
+                        "title": title,
+                        "summary": summary,
+                        "url": f"https://sim.local/news/{minute_key}/{index}",
+                    }
+                )
+            minute += timedelta(minutes=1)
+        return sorted(items, key=lambda item: item["published_at"])
+
+    def macro(self, since: datetime | None) -> list[dict]:
+        now = self.clock.now()
+        horizon = now + timedelta(hours=self.settings.simulation_macro_lookahead_hours)
+        start = since if since is not None else now - timedelta(days=1)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        events = []
+        day = start.date()
+        while day <= horizon.date():
+            rng = np.random.default_rng([self.seed, 2, day.toordinal()])
+            for clock, currency, impact, name, forecast, scale in _CALENDAR:
+                hour, minute = map(int, clock.split(":"))
+                when = datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc)
+                surprise = float(rng.normal(0, scale))
+                previous = forecast + float(rng.normal(0, scale))
+                if not (start < when <= horizon):
+                    continue
+                events.append(
+                    {
+                        "time": when,
+                        "currency": currency,
+                        "impact": impact,
+                        "name": name,
+                        "forecast": forecast,
+                        "previous": previous,
+                        "actual": forecast + surprise if when <= now else None,
+                        "source": "SimCalendar",
+                    }
+                )
+            day += timedelta(days=1)
+        return events
+
+    def _replay_frame(self):
+        if self.replay.suffix == ".csv":
+            return cached_csv(self.replay, "ts")
+        raise ValueError("Replay files must be CSV; convert Parquet history with the backfill command first")
+
+    def _walk(self, symbol: str, now: pd.Timestamp) -> tuple[np.ndarray, np.ndarray]:
+        """Minute timestamps (ns) and closes for `symbol`, extended up to `now`."""
+        with self._lock:
+            ts, close = self._walks.get(symbol, (None, None))
+            end = _as_ns(now) // 60_000_000_000
+            if ts is None:
+                first = _as_ns(self.clock.origin) // 60_000_000_000 - self.settings.simulation_warmup_bars
+                rng = np.random.default_rng([self.seed, _symbol_key(symbol), 0])
+                minutes = np.arange(first, end + 1)
+                base = _BASE_PRICES.get(symbol, 100.0)
+                close = base * np.exp(np.cumsum(rng.normal(0, 0.0004, len(minutes))))
+                ts = minutes * 60_000_000_000
+            elif ts[-1] // 60_000_000_000 < end:
+                last = ts[-1] // 60_000_000_000
+                rng = np.random.default_rng([self.seed, _symbol_key(symbol), int(last)])
+                minutes = np.arange(last + 1, end + 1)
+                steps = close[-1] * np.exp(np.cumsum(rng.normal(0, 0.0004, len(minutes))))
+                ts = np.concatenate([ts, minutes * 60_000_000_000])
+                close = np.concatenate([close, steps])
+            self._walks[symbol] = (ts, close)
+            return ts, close
+
+
+def _as_ns(value: datetime) -> int:
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize("UTC")
+    return int(stamp.value)
+
+
+def _symbol_key(symbol: str) -> int:
+    return int.from_bytes(symbol.encode()[:8].ljust(8, b"\0"), "little")
+
+
+_simulation: Simulation | None = None
+_simulation_lock = threading.Lock()
+
+
+def get_simulation() -> Simulation:
+    global _simulation
+    with _simulation_lock:
+        if _simulation is None:
+            _simulation = Simulation()
+        return _simulation
+
+
+def reset_simulation() -> None:
+    global _simulation
+    with _simulation_lock:
+        _simulation = None
+
+
+class SimulatedPriceProvider(PriceProvider):
+    def fetch_bars(self, symbol: str, timeframe: str, start: datetime | None) -> list[dict]:
+        return get_simulation().bars(symbol, start)
+
+
+class SimulatedNewsProvider(NewsProvider):
+    def fetch_news(self, since: datetime | None) -> list[dict]:
+        return get_simulation().news(since)
+
+
+class SimulatedMacroProvider(MacroProvider):
+    def fetch_events(self, since: datetime | None) -> list[dict]:
+        return get_simulation().macro(since)
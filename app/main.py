@@ -3,6 +3,7 @@ from fastapi import FastAPI
 from app.api.routes import router
 from app.core.config import get_settings
 from app.core.logging import configure_logging
+from app.core.metrics import metrics_middleware
 from app.db.init_db import init_db
 from app.services.scheduler import start_scheduler
 
@@ -11,6 +12,7 @@ settings = get_settings()
 configure_logging(settings.log_level)
 
 app = FastAPI(title=settings.app_name)
+app.middleware("http")(metrics_middleware)
 app.include_router(router)
 
 
@@ -0,0 +1,92 @@
+"""NumPy-only scoring for the calibrated logistic model.
+
+`CalibratedClassifierCV` with sigmoid calibration averages one calibrated
+logistic regression per CV fold. `compile_model` copies each fold's
+coefficients and per-class sigmoid parameters into stacked arrays so a batch
+of feature vectors is scored with one einsum, with no pandas input validation
+or per-fold Python loops. Probabilities match `predict_proba` of the source
+model (see tests/test_compiled_model.py). The same arrays, together with
+the training means, give per-feature contributions for explanations.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+
+
+@dataclass
+class CompiledModel:
+    classes: np.ndarray  # (n_classes,)
+    features: list[str]
+    weights: np.ndarray  # (folds, outputs, n_features)
+    intercepts: np.ndarray  # (folds, outputs)
+    slopes: np.ndarray  # (folds, outputs); calibrated p = expit(-(slope * score + offset))
+    offsets: np.ndarray  # (folds, outputs)
+    targets: np.ndarray  # (folds, outputs, n_classes) one-hot; all-zero rows are padding
+    means: np.ndarray | None = None  # (n_features,) training means, the baseline for contributions
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        scores = np.einsum("nf,kof->kno", X, self.weights) + self.intercepts[:, None, :]
+        calibrated = _sigmoid(-(self.slopes[:, None, :] * scores + self.offsets[:, None, :]))
+        proba = np.einsum("kno,koc->knc", calibrated, self.targets)
+        if len(self.classes) == 2:
+            proba[..., 0] = 1.0 - proba[..., 1]
+        else:
+            total = proba.sum(axis=2, keepdims=True)
+            proba = np.divide(proba, total, out=np.full_like(proba, 1 / len(self.classes)), where=total != 0)
+        proba[(1.0 < proba) & (proba <= 1.0 + 1e-5)] = 1.0
+        return proba.mean(axis=0)
+
+    def class_weights(self) -> np.ndarray:
+        """(n_classes, n_features) fold-averaged slopes of each class's calibrated log-odds."""
+        effective = -self.slopes[:, :, None] * self.weights
+        weights = np.einsum("kof,koc->cf", effective, self.targets) / len(self.weights)
+        if len(self.classes) == 2:
+            weights[0] = -weights[1]
+        return weights
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """(n_rows, n_classes, n_features) contribution of each feature's deviation from its training mean."""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        centered = X - self.means if self.means is not None else X
+        return centered[:, None, :] * self.class_weights()[None, :, :]
+
+
+def compile_model(
+    model: CalibratedClassifierCV, features: list[str], means: np.ndarray | None = None
+) -> CompiledModel:
+    """Flatten a fitted sigmoid-calibrated linear model; raises ValueError for anything else."""
+    classes = np.asarray(model.classes_)
+    binary = len(classes) == 2
+    folds = model.calibrated_classifiers_
+    outputs = 1 if binary else len(classes)
+    shape = (len(folds), outputs)
+    weights = np.zeros(shape + (len(features),))
+    intercepts = np.zeros(shape)
+    slopes = np.zeros(shape)
+    offsets = np.zeros(shape)
+    targets = np.zeros(shape + (len(classes),))
+    for k, fold in enumerate(folds):
+        estimator = fold.estimator
+        # Sigmoid calibrators expose their fitted slope and offset as `a_` and `b_`.
+        sigmoid = model.method == "sigmoid" and all(hasattr(c, "a_") and hasattr(c, "b_") for c in fold.calibrators)
+        if not hasattr(estimator, "coef_") or not sigmoid:
+            raise ValueError("Only sigmoid-calibrated linear models can be compiled")
+        seen = np.searchsorted(classes, estimator.classes_)
+        weights[k, : len(estimator.coef_)] = estimator.coef_
+        intercepts[k, : len(estimator.intercept_)] = estimator.intercept_
+        for output, calibrator in enumerate(fold.calibrators):
+            slopes[k, output] = calibrator.a_
+            offsets[k, output] = calibrator.b_
+            # Binary models score only the positive class, which is classes[1].
+            targets[k, output, 1 if binary else seen[output]] = 1.0
+    means = None if means is None else np.asarray(means, dtype=float)
+    return CompiledModel(classes, list(features), weights, intercepts, slopes, offsets, targets, means)
+
+
+def _sigmoid(values: np.ndarray) -> np.ndarray:
+    # tanh form of 1 / (1 + exp(-x)); it cannot overflow for large |x|.
+    return 0.5 * (1.0 + np.tanh(0.5 * values))
@@ -1,24 +1,90 @@
+"""Signal explanations from model contributions.
+
+A feature's contribution to a class is its deviation from the training mean
+times that class's fold-averaged log-odds weight (`CompiledModel.contributions`),
+so features are ranked by how much they moved this prediction rather than by
+their raw magnitude. Everything is computed for a batch of rows at once.
+"""
 from __future__ import annotations
 
-from typing import Any
+import bisect
+from datetime import datetime, timedelta
+from typing import Any, Sequence
 
 import numpy as np
 import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import News
+from app.ml.compiled import CompiledModel
+
+
+def top_contributions(model: CompiledModel, X: np.ndarray, k: int = 5) -> list[list[dict[str, Any]]]:
+    """Top-k features by absolute contribution to each row's most probable class."""
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    predicted = model.predict_proba(X).argmax(axis=1)
+    contributions = model.contributions(X)[np.arange(len(X)), predicted]  # (n_rows, n_features)
+    k = min(k, contributions.shape[1])
+    order = np.argsort(-np.abs(contributions), axis=1)[:, :k]
+    return [
+        [
+            {"name": model.features[index], "value": float(X[row, index]), "contribution": float(contributions[row, index])}
+            for index in order[row]
+        ]
+        for row in range(len(X))
+    ]
+
 
+def recent_high_impact_news(
+    session: Session, symbol: str, timestamps: Sequence[datetime], hours: int = 24, limit: int = 5
+) -> list[list[int]]:
+    """Ids of the newest high-impact news touching `symbol` in the `hours` before each timestamp.
 
-def build_explanation(latest_row: pd.Series, probabilities: dict[str, float], regime: dict) -> dict[str, Any]:
-    top_features = []
-    for name, value in latest_row.items():
-        if name in {"ts", "open", "high", "low", "close", "volume"}:
-            continue
-        top_features.append({"name": name, "value": float(value)})
-    top_features = sorted(top_features, key=lambda item: abs(item["value"]), reverse=True)[:5]
+    One range query over `ix_news_impact_published` serves the whole batch;
+    each timestamp's window is then a binary search over the sorted rows.
+    """
+    if not len(timestamps):
+        return []
+    window = timedelta(hours=hours)
+    rows = session.execute(
+        select(News.id, News.published_at, News.impacted_assets)
+        .where(News.impact_level == "high")
+        .where(News.published_at >= min(timestamps) - window)
+        .where(News.published_at <= max(timestamps))
+        .order_by(News.published_at)
+    ).all()
+    rows = [row for row in rows if symbol in (row.impacted_assets or [])]
+    published = [_naive(row.published_at) for row in rows]
+    result = []
+    for ts in timestamps:
+        end = bisect.bisect_right(published, _naive(ts))
+        start = bisect.bisect_left(published, _naive(ts - window))
+        result.append([rows[index].id for index in range(end - 1, max(start, end - limit) - 1, -1)])
+    return result
+
+
+def build_explanation(
+    latest_row: pd.Series,
+    probabilities: dict[str, float],
+    regime: dict,
+    top_features: list[dict[str, Any]] | None = None,
+    recent_news: list[int] | None = None,
+) -> dict[str, Any]:
     return {
-        "top_features": top_features,
+        "top_features": top_features or [],
         "probabilities": probabilities,
         "regime": regime,
         "sentiment_score": float(latest_row.get("news_sentiment_24h", 0.0)),
         "macro_risk_minutes": float(latest_row.get("minutes_to_high_impact_usd", 0.0)),
-        "recent_news": [],
+        "macro_surprise_z": float(latest_row.get("usd_surprise_z_24h", 0.0)),
+        "recent_news": recent_news or [],
         "disclaimer": "Signals are probabilistic analytics, not financial advice.",
     }
+
+
+def _naive(value: datetime) -> datetime:
+    # SQLite hands back naive UTC datetimes; compare everything in naive UTC.
+    if value.tzinfo is None:
+        return value
+    return pd.Timestamp(value).tz_convert("UTC").tz_localize(None).to_pydatetime()
@@ -1,23 +1,34 @@
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
 
 import joblib
-import numpy as np
-import pandas as pd
 from sqlalchemy import select
 
-from app.analytics.regime import classify_regime
 from app.analytics.signals import build_confidence, confidence_reason, label_from_probability
 from app.core.config import get_settings
+from app.core.metrics import INFERENCE_LATENCY
+from app.core.tracing import span, trace
 from app.core.utils import utc_now
-from app.db.models import Instrument, MacroEvent, News, Signal, TickOrBar
-from app.db.session import SessionLocal
-from app.features.engineering import add_macro_features, add_news_features, compute_features
-from app.ml.explain import build_explanation
+from app.db.models import Instrument, Signal
+from app.db.session import JobSessionLocal
+from app.features.store import read_features, update_features
+from app.ml.compiled import compile_model
+from app.ml.explain import build_explanation, recent_high_impact_news, top_contributions
+from app.services.regimes import current_regime
+from app.services.events import SIGNAL_CREATED, get_event_bus
+
+
+# Artifacts written before multi-horizon training hold one 1m model for this horizon.
+LEGACY_TARGET = ("1m", 60)
+MIN_BARS = 250
+
+_loaded: dict[str, tuple[int, dict]] = {}
 
 
 def latest_model() -> tuple[str, dict] | None:
+    """Newest model artifact, loaded once per file, with every target given a compiled scorer."""
     settings = get_settings()
     model_dir = Path(settings.model_dir)
     if not model_dir.exists():
@@ -26,82 +37,112 @@ def latest_model() -> tuple[str, dict] | None:
     if not models:
         return None
     latest = models[-1]
-    payload = joblib.load(latest)
-    return latest.stem, payload
+    mtime = latest.stat().st_mtime_ns
+    cached = _loaded.get(str(latest))
+    if cached is None or cached[0] != mtime:
+        payload = joblib.load(latest)
+        if "models" not in payload:
+            payload["models"] = {LEGACY_TARGET: {"model": payload["model"], "compiled": payload.get("compiled")}}
+        for entry in payload["models"].values():
+            if entry.get("compiled") is None:
+                entry["compiled"] = compile_model(entry["model"], payload["features"])
+        _loaded.clear()
+        _loaded[str(latest)] = (mtime, payload)
+        cached = _loaded[str(latest)]
+    return latest.stem, cached[1]
 
 
 def predict_and_store() -> dict:
+    """Score the latest bar of every trained timeframe for all of its horizons and store the signals."""
     model_info = latest_model()
     if not model_info:
         return {"status": "no_model"}
     model_version, payload = model_info
-    model = payload["model"]
     feature_cols = payload["features"]
-    with SessionLocal() as session:
+    by_timeframe: dict[str, list[int]] = {}
+    for timeframe, horizon in sorted(payload["models"]):
+        by_timeframe.setdefault(timeframe, []).append(horizon)
+    settings = get_settings()
+    signals: list[Signal] = []
+    skipped: dict[str, str] = {}
+    with JobSessionLocal() as session:
         instrument = session.execute(select(Instrument).where(Instrument.symbol == "XAUUSD")).scalar_one()
-        rows = (
-            session.query(TickOrBar)
-            .filter(TickOrBar.instrument_id == instrument.id, TickOrBar.timeframe == "1m")
-            .order_by(TickOrBar.ts)
-            .all()
-        )
-        news_rows = session.query(News).order_by(News.published_at).all()
-        macro_rows = session.query(MacroEvent).order_by(MacroEvent.time).all()
-        if len(rows) < 250:
-            return {"status": "insufficient_data"}
-        data = pd.DataFrame(
-            [
-                {
-                    "ts": row.ts,
-                    "open": row.open,
-                    "high": row.high,
-                    "low": row.low,
-                    "close": row.close,
-                    "volume": row.volume,
-                }
-                for row in rows
-            ]
-        )
-        feats = compute_features(data)
-        news_df = pd.DataFrame(
-            [
-                {"published_at": row.published_at, "sentiment": row.sentiment or 0.0}
-                for row in news_rows
-            ]
-        )
-        macro_df = pd.DataFrame(
-            [
-                {"time": row.time, "currency": row.currency, "impact": row.impact}
-                for row in macro_rows
-            ]
-        )
-        feats = add_news_features(feats, news_df)
-        feats = add_macro_features(feats, macro_df)
-        latest = feats.iloc[-1:]
-        probs = model.predict_proba(latest[feature_cols])[0]
-        classes = model.classes_
-        probabilities = {cls: float(prob) for cls, prob in zip(classes, probs)}
-        prob_bull = probabilities.get("Bullish", 0.0)
-        prob_bear = probabilities.get("Bearish", 0.0)
-        label = label_from_probability(prob_bull, prob_bear)
-        confidence = build_confidence(probabilities)
-        regime = classify_regime(feats)
-        explanation = build_explanation(latest.iloc[-1], probabilities, regime)
-        explanation["confidence_reason"] = confidence_reason(
-            regime["regime"], explanation.get("sentiment_score", 0.0), regime["evidence"].get("volatility_percentile", 0.0)
-        )
-        signal = Signal(
-            instrument_id=instrument.id,
-            ts=utc_now(),
-            label=label,
-            confidence=confidence,
-            explanation_json=explanation,
-            model_version=model_version,
-        )
-        session.add(signal)
-        session.commit()
-    return {"status": "ok", "label": label, "confidence": confidence}
+        now = utc_now()
+        for timeframe, horizons in by_timeframe.items():
+            with span("load") as stage:
+                update_features(session, instrument.id, timeframe)
+                session.commit()
+                feats = read_features(session, instrument.id, timeframe, limit=MIN_BARS)
+                stage["rows"] = len(feats)
+            if len(feats) < MIN_BARS:
+                skipped[timeframe] = f"{len(feats)} of {MIN_BARS} bars"
+                continue
+            latest = feats.dropna().iloc[-1:]
+            if latest.empty:
+                skipped[timeframe] = "no bar with a complete feature vector"
+                continue
+            vector = latest[feature_cols].to_numpy(dtype=float)
+            with span("classify_regime"):
+                regime = current_regime(session, instrument.id, timeframe)
+            with span("recent_news"):
+                news_ids = recent_high_impact_news(
+                    session,
+                    instrument.symbol,
+                    [latest["ts"].iloc[-1].to_pydatetime()],
+                    hours=settings.explanation_news_hours,
+                    limit=settings.explanation_news_limit,
+                )[0]
+            for horizon in horizons:
+                model = payload["models"][(timeframe, horizon)]["compiled"]
+                with span("predict_proba", rows=1), INFERENCE_LATENCY.time():
+                    probs = model.predict_proba(vector)[0]
+                probabilities = {str(cls): float(prob) for cls, prob in zip(model.classes, probs)}
+                label = label_from_probability(probabilities.get("Bullish", 0.0), probabilities.get("Bearish", 0.0))
+                with span("build_explanation", rows=1):
+                    top = top_contributions(model, vector, k=settings.explanation_top_features)[0]
+                    explanation = build_explanation(latest.iloc[-1], probabilities, regime, top, news_ids)
+                explanation["confidence_reason"] = confidence_reason(
+                    regime["regime"],
+                    explanation.get("sentiment_score", 0.0),
+                    regime["evidence"].get("volatility_percentile", 0.0),
+                )
+                signals.append(
+                    Signal(
+                        instrument_id=instrument.id,
+                        ts=now,
+                        timeframe=timeframe,
+                        horizon_minutes=horizon,
+                        label=label,
+                        confidence=build_confidence(probabilities),
+                        explanation_json=explanation,
+                        model_version=model_version,
+                    )
+                )
+        if not signals:
+            session.commit()  # regime transitions
+            return {"status": "insufficient_data", "skipped": skipped}
+        with span("insert", rows=len(signals)):
+            session.add_all(signals)
+            session.commit()
+        get_event_bus().publish(SIGNAL_CREATED, [signal.id for signal in signals], instrument_id=instrument.id)
+        results = [
+            {
+                "timeframe": signal.timeframe,
+                "horizon_minutes": signal.horizon_minutes,
+                "label": signal.label,
+                "confidence": signal.confidence,
+            }
+            for signal in signals
+        ]
+    return {"status": "ok", "signals": results, "skipped": skipped}
 
 
 if __name__ == "__main__":
-    print(predict_and_store())
+    parser = argparse.ArgumentParser(description="Score the latest bars and store signals.")
+    parser.add_argument("--profile", help="write a profile of this run to the given path")
+    parser.add_argument("--profiler", default=get_settings().profiler, choices=["cprofile", "pyinstrument"])
+    args = parser.parse_args()
+    with trace("predict", profile_path=args.profile, profiler=args.profiler) as run:
+        result = predict_and_store()
+    print(result)
+    print(run.summary())
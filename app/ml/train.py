@@ -1,97 +1,102 @@
 from __future__ import annotations
 
-from datetime import timedelta
 from pathlib import Path
 
 import joblib
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from sklearn.calibration import CalibratedClassifierCV
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import classification_report
+from sqlalchemy import select
 
 from app.core.config import get_settings
-from app.db.models import MacroEvent, News, TickOrBar
-from app.db.session import SessionLocal
-from app.features.engineering import add_macro_features, add_news_features, compute_features
+from app.db.models import TickOrBar
+from app.db.session import JobSessionLocal
+from app.features.store import FEATURE_COLUMNS, TIMEFRAME_MINUTES, read_features, update_features
+from app.ml.compiled import compile_model
+
+CV_FOLDS = 3
+
+
+def signal_targets(settings) -> list[tuple[str, int]]:
+    """(timeframe, horizon_minutes) pairs to train; horizons shorter than one bar are skipped."""
+    horizons = [int(value) for value in settings.signal_horizons_minutes.split(",") if value.strip()]
+    timeframes = [value.strip() for value in settings.signal_timeframes.split(",") if value.strip()]
+    return [
+        (timeframe, horizon)
+        for timeframe in timeframes
+        for horizon in horizons
+        if horizon >= TIMEFRAME_MINUTES[timeframe]
+    ]
 
 
 def train_model() -> dict:
     settings = get_settings()
-    with SessionLocal() as session:
-        rows = session.query(TickOrBar).filter(TickOrBar.timeframe == "1m").order_by(TickOrBar.ts).all()
-        news_rows = session.query(News).order_by(News.published_at).all()
-        macro_rows = session.query(MacroEvent).order_by(MacroEvent.time).all()
-    if not rows:
+    targets = signal_targets(settings)
+    matrices: dict[str, pd.DataFrame] = {}
+    with JobSessionLocal() as session:
+        instrument_ids = session.execute(
+            select(TickOrBar.instrument_id).where(TickOrBar.timeframe == "1m").distinct()
+        ).scalars().all()
+        for timeframe in dict.fromkeys(timeframe for timeframe, _ in targets):
+            frames = []
+            for instrument_id in instrument_ids:
+                update_features(session, instrument_id, timeframe)
+                session.commit()
+                frame = read_features(session, instrument_id, timeframe, dropna=True)
+                # Labels look ahead within one instrument's series only.
+                for target_timeframe, horizon in targets:
+                    if target_timeframe == timeframe:
+                        bars = horizon // TIMEFRAME_MINUTES[timeframe]
+                        frame[f"future_return_{horizon}"] = frame["close"].pct_change(periods=bars).shift(-bars)
+                frames.append(frame)
+            if frames:
+                matrices[timeframe] = pd.concat(frames, ignore_index=True).sort_values("ts", kind="mergesort")
+    jobs = [(timeframe, horizon) for timeframe, horizon in targets if timeframe in matrices]
+    if not jobs:
         return {"status": "no_data"}
-    data = pd.DataFrame(
-        [
-            {
-                "ts": row.ts,
-                "open": row.open,
-                "high": row.high,
-                "low": row.low,
-                "close": row.close,
-                "volume": row.volume,
-            }
-            for row in rows
-        ]
-    )
-    feats = compute_features(data)
-    news_df = pd.DataFrame(
-        [
-            {"published_at": row.published_at, "sentiment": row.sentiment or 0.0}
-            for row in news_rows
-        ]
+    fitted = Parallel(n_jobs=min(settings.training_jobs, len(jobs)), prefer="threads")(
+        delayed(_fit_horizon)(matrices[timeframe], f"future_return_{horizon}") for timeframe, horizon in jobs
     )
-    macro_df = pd.DataFrame(
-        [
-            {"time": row.time, "currency": row.currency, "impact": row.impact}
-            for row in macro_rows
-        ]
-    )
-    feats = add_news_features(feats, news_df)
-    feats = add_macro_features(feats, macro_df)
-    horizon = settings.signal_horizon_minutes
-    feats["future_return"] = feats["close"].pct_change(periods=horizon).shift(-horizon)
-    feats = feats.dropna()
-    threshold = feats["future_return"].std() * 0.5
-    feats["label"] = np.where(
-        feats["future_return"] > threshold,
-        "Bullish",
-        np.where(feats["future_return"] < -threshold, "Bearish", "Neutral"),
-    )
-    feature_cols = [
-        "log_return_1",
-        "log_return_5",
-        "log_return_60",
-        "volatility_20",
-        "ema_20",
-        "ema_50",
-        "ema_200",
-        "rsi_14",
-        "macd",
-        "macd_signal",
-        "atr_14",
-        "news_sentiment_24h",
-        "minutes_to_high_impact_usd",
-    ]
+    models = {target: result for target, result in zip(jobs, fitted) if result is not None}
+    skipped = [f"{timeframe}/{horizon}m" for (timeframe, horizon), result in zip(jobs, fitted) if result is None]
+    if not models:
+        return {"status": "no_data", "skipped": skipped}
+    model_dir = Path(settings.model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    model_version = f"lr_{pd.Timestamp.utcnow().strftime('%Y%m%d%H%M%S')}"
+    model_path = model_dir / f"{model_version}.joblib"
+    joblib.dump({"models": models, "features": list(FEATURE_COLUMNS)}, model_path)
+    return {
+        "status": "trained",
+        "model_version": model_version,
+        "report": {f"{timeframe}/{horizon}m": result["report"] for (timeframe, horizon), result in models.items()},
+        "skipped": skipped,
+    }
+
+
+def _fit_horizon(matrix: pd.DataFrame, target: str) -> dict | None:
+    """Fit one horizon's calibrated model; None when the labels cannot support a fit."""
+    feats = matrix.dropna(subset=[target])
+    threshold = feats[target].std() * 0.5
+    labels = np.where(feats[target] > threshold, "Bullish", np.where(feats[target] < -threshold, "Bearish", "Neutral"))
+    feature_cols = list(FEATURE_COLUMNS)
     X = feats[feature_cols]
-    y = feats["label"]
+    y = pd.Series(labels, index=feats.index)
     split_idx = int(len(feats) * 0.8)
     X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
     y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
+    counts = y_train.value_counts()
+    if len(counts) < 2 or counts.min() < CV_FOLDS:
+        return None
     base = LogisticRegression(max_iter=200)
-    calibrated = CalibratedClassifierCV(base, cv=3)
+    calibrated = CalibratedClassifierCV(base, cv=CV_FOLDS)
     calibrated.fit(X_train, y_train)
-    preds = calibrated.predict(X_test)
-    report = classification_report(y_test, preds, output_dict=True)
-    model_dir = Path(settings.model_dir)
-    model_dir.mkdir(parents=True, exist_ok=True)
-    model_version = f"lr_{pd.Timestamp.utcnow().strftime('%Y%m%d%H%M%S')}"
-    model_path = model_dir / f"{model_version}.joblib"
-    joblib.dump({"model": calibrated, "features": feature_cols}, model_path)
-    return {"status": "trained", "model_version": model_version, "report": report}
+    report = classification_report(y_test, calibrated.predict(X_test), output_dict=True) if len(X_test) else {}
+    compiled = compile_model(calibrated, feature_cols, X_train.mean().to_numpy())
+    return {"model": calibrated, "compiled": compiled, "report": report}
 
 
 if __name__ == "__main__":
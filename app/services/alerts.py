@@ -1,7 +1,411 @@
+"""Alert rules over committed signals and news, with batched delivery to sinks.
+
+`AlertEngine` consumes `signal_created` and `news_committed` events. Rules are
+indexed by event type and symbol, so an event only reaches the rules scoped to
+it and evaluation cost does not grow with history. Each rule dedupes on the
+triggering row and throttles per symbol. Matches are queued to an
+`AlertDispatcher`, which batches them on a background thread and delivers to
+every sink with retries.
+"""
 from __future__ import annotations
 
-from typing import Any
+import json
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import requests
+from sqlalchemy import select
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from app.core.config import get_settings
+from app.core.metrics import ALERTS_SENT
+from app.core.utils import utc_now
+from app.db.models import Instrument, News, Signal
+from app.db.session import JobSessionLocal
+from app.services.events import NEWS_COMMITTED, SIGNAL_CREATED, Event, get_event_bus
+
+logger = logging.getLogger(__name__)
 
 
 def format_alert(message: str, payload: dict[str, Any]) -> str:
     return f"{message}: {payload}"
+
+
+@dataclass
+class Alert:
+    rule: str
+    symbol: str | None
+    message: str
+    payload: dict[str, Any]
+    ts: datetime = field(default_factory=utc_now)
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["ts"] = self.ts.isoformat()
+        return data
+
+
+@dataclass
+class Context:
+    """Rows behind an event, loaded once and shared by every rule it reaches."""
+
+    event: Event
+    signal: dict[str, Any] | None = None
+    previous_label: str | None = None
+    news: dict[str, Any] | None = None
+
+
+class Rule(ABC):
+    name = "rule"
+    event_type = SIGNAL_CREATED
+
+    def __init__(self, symbols: Iterable[str] | None = None, throttle_seconds: float = 0) -> None:
+        self.symbols = sorted(set(symbols)) if symbols else None
+        self.throttle_seconds = throttle_seconds
+
+    @abstractmethod
+    def evaluate(self, context: Context) -> Alert | None:
+        raise NotImplementedError
+
+
+class ConfidenceRule(Rule):
+    name = "confidence"
+
+    def __init__(self, threshold: float, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.threshold = threshold
+
+    def evaluate(self, context: Context) -> Alert | None:
+        signal = context.signal
+        if signal["label"] == "Neutral" or signal["confidence"] < self.threshold:
+            return None
+        return Alert(
+            rule=self.name,
+            symbol=signal["symbol"],
+            message=(
+                f"{signal['symbol']} {signal['timeframe']}/{signal['horizon_minutes']}m {signal['label']} signal "
+                f"at {signal['confidence']:.0%} confidence"
+            ),
+            payload=signal,
+        )
+
+
+class LabelFlipRule(Rule):
+    name = "label_flip"
+
+    def evaluate(self, context: Context) -> Alert | None:
+        signal = context.signal
+        if context.previous_label in (None, signal["label"]):
+            return None
+        return Alert(
+            rule=self.name,
+            symbol=signal["symbol"],
+            message=(
+                f"{signal['symbol']} {signal['timeframe']}/{signal['horizon_minutes']}m signal flipped "
+                f"from {context.previous_label} to {signal['label']}"
+            ),
+            payload={**signal, "previous_label": context.previous_label},
+        )
+
+
+class HighImpactNewsRule(Rule):
+    name = "high_impact_news"
+    event_type = NEWS_COMMITTED
+
+    def evaluate(self, context: Context) -> Alert | None:
+        news = context.news
+        if news["impact_level"] != "high":
+            return None
+        held = [symbol for symbol in news["impacted_assets"] if self.symbols is None or symbol in self.symbols]
+        if not held:
+            return None
+        return Alert(
+            rule=self.name,
+            symbol=held[0],
+            message=f"High-impact news for {', '.join(held)}: {news['title']}",
+            payload=news,
+        )
+
+
+class LogSink:
+    name = "log"
+
+    def send(self, alerts: list[Alert]) -> None:
+        for alert in alerts:
+            logger.warning(format_alert(alert.message, alert.payload))
+
+
+class FileSink:
+    """Appends alerts as JSON lines."""
+
+    name = "file"
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def send(self, alerts: list[Alert]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as handle:
+            for alert in alerts:
+                handle.write(json.dumps(alert.to_dict(), default=str) + "\n")
+
+
+class WebhookSink:
+    """POSTs each batch as `{"alerts": [...]}`."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 10) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, alerts: list[Alert]) -> None:
+        payload = {"alerts": [alert.to_dict() for alert in alerts]}
+        response = self.session.post(
+            self.url,
+            data=json.dumps(payload, default=str),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+
+class AlertDispatcher:
+    """Batches alerts on a background thread and delivers each batch to every sink."""
+
+    def __init__(self, sinks: list, batch_size: int = 50, flush_seconds: float = 2.0, max_retries: int = 3) -> None:
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._send = retry(
+            stop=stop_after_attempt(max_retries), wait=wait_exponential(min=1, max=30), reraise=True
+        )(self._send_once)
+        self._queue: queue.Queue[Alert] = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, alerts: Iterable[Alert]) -> None:
+        for alert in alerts:
+            self._queue.put(alert)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 1)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> None:
+        while not self._queue.empty():
+            self._deliver(self._next_batch(block=False))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch(block=True)
+            if batch:
+                self._deliver(batch)
+
+    def _next_batch(self, block: bool) -> list[Alert]:
+        batch: list[Alert] = []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, batch: list[Alert]) -> None:
+        for sink in self.sinks:
+            try:
+                self._send(sink, batch)
+            except Exception:
+                logger.exception("Alert sink %s failed after retries; dropped %s alerts", sink.name, len(batch))
+                ALERTS_SENT.labels(sink=sink.name, status="failed").inc(len(batch))
+            else:
+                ALERTS_SENT.labels(sink=sink.name, status="sent").inc(len(batch))
+
+    @staticmethod
+    def _send_once(sink, batch: list[Alert]) -> None:
+        sink.send(batch)
+
+
+class AlertEngine:
+    def __init__(
+        self,
+        rules: Iterable[Rule],
+        submit: Callable[[list[Alert]], None],
+        session_factory: Callable = JobSessionLocal,
+        dedupe_size: int = 10000,
+    ) -> None:
+        self.submit = submit
+        self.session_factory = session_factory
+        self._index: dict[str, dict[str | None, list[Rule]]] = defaultdict(lambda: defaultdict(list))
+        self._last_fired: dict[tuple, float] = {}
+        self._seen: OrderedDict[tuple[str, str, int], None] = OrderedDict()
+        self._dedupe_size = dedupe_size
+        self._last_label: dict[tuple[int, str, int], str] = {}
+        for rule in rules:
+            self.add_rule(rule)
+
+    def add_rule(self, rule: Rule) -> None:
+        for symbol in rule.symbols or [None]:
+            self._index[rule.event_type][symbol].append(rule)
+
+    def handle(self, event: Event) -> list[Alert]:
+        if event.type not in self._index:
+            return []
+        if event.type == SIGNAL_CREATED:
+            contexts = self._signal_contexts(event)
+        else:
+            contexts = self._news_contexts(event)
+        alerts = []
+        for row_id, symbols, context in contexts:
+            alerts.extend(self._evaluate(event.type, row_id, symbols, context))
+        if alerts:
+            self.submit(alerts)
+        return alerts
+
+    def _evaluate(self, event_type: str, row_id: int, symbols: list[str], context: Context) -> list[Alert]:
+        rules_by_symbol = self._index[event_type]
+        candidates: dict[int, Rule] = {}
+        for symbol in [None, *symbols]:
+            for rule in rules_by_symbol.get(symbol, []):
+                candidates[id(rule)] = rule
+        alerts = []
+        now = time.monotonic()
+        for rule in candidates.values():
+            dedupe_key = (rule.name, event_type, row_id)
+            if dedupe_key in self._seen:
+                continue
+            alert = rule.evaluate(context)
+            if alert is None:
+                continue
+            self._remember(dedupe_key)
+            throttle_key = (rule.name, alert.symbol, alert.payload.get("timeframe"), alert.payload.get("horizon_minutes"))
+            last = self._last_fired.get(throttle_key)
+            if last is not None and now - last < rule.throttle_seconds:
+                continue
+            self._last_fired[throttle_key] = now
+            alerts.append(alert)
+        return alerts
+
+    def _remember(self, key: tuple[str, str, int]) -> None:
+        self._seen[key] = None
+        if len(self._seen) > self._dedupe_size:
+            self._seen.popitem(last=False)
+
+    def _signal_contexts(self, event: Event) -> list[tuple[int, list[str], Context]]:
+        contexts = []
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(Signal, Instrument.symbol)
+                .join(Instrument, Instrument.id == Signal.instrument_id)
+                .where(Signal.id.in_(event.ids))
+                .order_by(Signal.id)
+            ).all()
+            for signal, symbol in rows:
+                series = (signal.instrument_id, signal.timeframe, signal.horizon_minutes)
+                previous = self._last_label.get(series)
+                if previous is None:
+                    previous = session.execute(
+                        select(Signal.label)
+                        .where(
+                            Signal.instrument_id == signal.instrument_id,
+                            Signal.timeframe == signal.timeframe,
+                            Signal.horizon_minutes == signal.horizon_minutes,
+                            Signal.id < signal.id,
+                        )
+                        .order_by(Signal.id.desc())
+                        .limit(1)
+                    ).scalar_one_or_none()
+                self._last_label[series] = signal.label
+                data = {
+                    "signal_id": signal.id,
+                    "instrument_id": signal.instrument_id,
+                    "symbol": symbol,
+                    "ts": signal.ts,
+                    "timeframe": signal.timeframe,
+                    "horizon_minutes": signal.horizon_minutes,
+                    "label": signal.label,
+                    "confidence": signal.confidence,
+                    "model_version": signal.model_version,
+                }
+                contexts.append((signal.id, [symbol], Context(event=event, signal=data, previous_label=previous)))
+        return contexts
+
+    def _news_contexts(self, event: Event) -> list[tuple[int, list[str], Context]]:
+        contexts = []
+        with self.session_factory() as session:
+            for row in session.execute(select(News).where(News.id.in_(event.ids))).scalars():
+                data = {
+                    "news_id": row.id,
+                    "published_at": row.published_at,
+                    "source": row.source,
+                    "title": row.title,
+                    "url": row.url,
+                    "impact_level": row.impact_level,
+                    "impacted_assets": list(row.impacted_assets or []),
+                    "sentiment": row.sentiment,
+                }
+                contexts.append((row.id, data["impacted_assets"], Context(event=event, news=data)))
+        return contexts
+
+
+def build_sinks(settings=None) -> list:
+    settings = settings or get_settings()
+    sinks = []
+    for name in (name.strip() for name in settings.alert_sinks.split(",") if name.strip()):
+        if name == "log":
+            sinks.append(LogSink())
+        elif name == "file":
+            sinks.append(FileSink(settings.alert_file_path))
+        elif name == "webhook" and settings.alert_webhook_url:
+            sinks.append(WebhookSink(settings.alert_webhook_url))
+        else:
+            logger.warning("Ignoring alert sink %r", name)
+    return sinks
+
+
+def default_rules(settings=None) -> list[Rule]:
+    settings = settings or get_settings()
+    held = [symbol.strip() for symbol in settings.alert_held_symbols.split(",") if symbol.strip()]
+    throttle = settings.alert_throttle_seconds
+    return [
+        ConfidenceRule(settings.alert_confidence_threshold, throttle_seconds=throttle),
+        LabelFlipRule(throttle_seconds=throttle),
+        HighImpactNewsRule(symbols=held, throttle_seconds=throttle),
+    ]
+
+
+def start_alerting() -> AlertDispatcher:
+    """Wire the default rules and configured sinks to the event bus."""
+    settings = get_settings()
+    dispatcher = AlertDispatcher(
+        build_sinks(settings),
+        batch_size=settings.alert_batch_size,
+        flush_seconds=settings.alert_flush_seconds,
+        max_retries=settings.alert_max_retries,
+    )
+    dispatcher.start()
+    engine = AlertEngine(default_rules(settings), dispatcher.submit)
+    get_event_bus().start_consumer("alerts", [SIGNAL_CREATED, NEWS_COMMITTED], engine.handle)
+    return dispatcher
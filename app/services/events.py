@@ -0,0 +1,300 @@
+"""Internal event bus between ingestion, prediction and downstream consumers.
+
+Producers publish typed events carrying the ids of rows they just committed.
+Consumers read through a named group: each event is delivered to one consumer
+per group and stays pending until acknowledged, so a consumer that fails or
+dies mid-event gets it redelivered once `claim_idle_ms` has passed
+(at-least-once). Use one group per logical subscriber (for example one per SSE
+connection) to fan events out.
+
+Two backends are available: an in-process log (the default, for single-process
+deployments and tests) and Redis Streams (`EVENT_BUS_BACKEND=redis`) for
+multi-worker deployments.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+from app.core.cache import get_redis
+from app.core.config import get_settings
+from app.core.utils import utc_now
+
+logger = logging.getLogger(__name__)
+
+BARS_COMMITTED = "bars_committed"
+NEWS_COMMITTED = "news_committed"
+MACRO_COMMITTED = "macro_committed"
+SIGNAL_CREATED = "signal_created"
+EVENT_TYPES = (BARS_COMMITTED, NEWS_COMMITTED, MACRO_COMMITTED, SIGNAL_CREATED)
+
+
+@dataclass
+class Event:
+    type: str
+    ids: list[int]
+    payload: dict[str, Any] = field(default_factory=dict)
+    ts: datetime = field(default_factory=utc_now)
+    id: str | None = None
+
+
+class EventBus(ABC):
+    def __init__(self, max_len: int = 10000, claim_idle_ms: int = 60000) -> None:
+        self.max_len = max_len
+        self.claim_idle_ms = claim_idle_ms
+
+    def publish(self, event_type: str, ids: Iterable[int], **payload: Any) -> Event | None:
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type: {event_type}")
+        event = Event(type=event_type, ids=[int(row_id) for row_id in ids], payload=payload)
+        if not event.ids:
+            return None
+        try:
+            self._publish(event)
+        except Exception:
+            logger.exception("Failed to publish %s", event_type)
+            return None
+        return event
+
+    @abstractmethod
+    def _publish(self, event: Event) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def join(self, group: str, types: Iterable[str]) -> None:
+        """Create `group` at the tail of each stream if it does not exist yet."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def read(
+        self, group: str, consumer: str, types: Iterable[str], count: int = 100, block_ms: int = 1000
+    ) -> list[Event]:
+        """Events for `group`: stale unacknowledged ones first, then new ones, waiting up to `block_ms`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def ack(self, group: str, events: Iterable[Event]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def close_group(self, group: str, types: Iterable[str]) -> None:
+        """Forget a group's cursor and pending events (e.g. when an SSE client disconnects)."""
+        raise NotImplementedError
+
+    def consume(
+        self,
+        group: str,
+        consumer: str,
+        types: Iterable[str],
+        handler: Callable[[Event], None],
+        stop: threading.Event,
+    ) -> None:
+        """Dispatch events to `handler` until `stop` is set; events are acked only after it returns."""
+        types = list(types)
+        while not stop.is_set():
+            try:
+                events = self.read(group, consumer, types)
+            except Exception:
+                logger.exception("Event read failed for group %s", group)
+                stop.wait(1)
+                continue
+            for event in events:
+                try:
+                    handler(event)
+                except Exception:
+                    logger.exception("Handler for %s in group %s failed; event will be redelivered", event.type, group)
+                    continue
+                self.ack(group, [event])
+
+    def start_consumer(
+        self, group: str, types: Iterable[str], handler: Callable[[Event], None], consumer: str | None = None
+    ) -> threading.Event:
+        """Run `consume` on a daemon thread; set the returned event to stop it."""
+        stop = threading.Event()
+        consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        thread = threading.Thread(
+            target=self.consume, args=(group, consumer, list(types), handler, stop), name=f"events-{group}", daemon=True
+        )
+        thread.start()
+        return stop
+
+
+class InProcessEventBus(EventBus):
+    def __init__(self, max_len: int = 10000, claim_idle_ms: int = 60000) -> None:
+        super().__init__(max_len, claim_idle_ms)
+        self._condition = threading.Condition()
+        self._logs: dict[str, deque[Event]] = {event_type: deque(maxlen=max_len) for event_type in EVENT_TYPES}
+        self._sequence = 0
+        self._cursors: dict[tuple[str, str], int] = {}
+        self._pending: dict[str, dict[str, tuple[Event, float]]] = {}
+
+    def _publish(self, event: Event) -> None:
+        with self._condition:
+            self._sequence += 1
+            event.id = str(self._sequence)
+            self._logs[event.type].append(event)
+            self._condition.notify_all()
+
+    def read(
+        self, group: str, consumer: str, types: Iterable[str], count: int = 100, block_ms: int = 1000
+    ) -> list[Event]:
+        types = list(types)
+        deadline = time.monotonic() + block_ms / 1000
+        self.join(group, types)
+        with self._condition:
+            pending = self._pending.setdefault(group, {})
+            while True:
+                now = time.monotonic()
+                events = [
+                    event
+                    for event, delivered in pending.values()
+                    if event.type in types and (now - delivered) * 1000 >= self.claim_idle_ms
+                ][:count]
+                for event_type in types:
+                    cursor = self._cursors[(group, event_type)]
+                    fresh = []
+                    for event in reversed(self._logs[event_type]):
+                        if int(event.id) <= cursor:
+                            break
+                        fresh.append(event)
+                    fresh.reverse()
+                    for event in fresh[: max(count - len(events), 0)]:
+                        events.append(event)
+                        self._cursors[(group, event_type)] = int(event.id)
+                if events:
+                    for event in events:
+                        pending[event.id] = (event, now)
+                    return sorted(events, key=lambda event: int(event.id))
+                remaining = deadline - now
+                if remaining <= 0:
+                    return []
+                self._condition.wait(remaining)
+
+    def join(self, group: str, types: Iterable[str]) -> None:
+        with self._condition:
+            for event_type in types:
+                # New groups start at the tail, like XGROUP CREATE ... $.
+                self._cursors.setdefault((group, event_type), self._sequence)
+
+    def ack(self, group: str, events: Iterable[Event]) -> None:
+        with self._condition:
+            pending = self._pending.get(group, {})
+            for event in events:
+                pending.pop(event.id, None)
+
+    def close_group(self, group: str, types: Iterable[str]) -> None:
+        with self._condition:
+            for event_type in types:
+                self._cursors.pop((group, event_type), None)
+            self._pending.pop(group, None)
+
+
+class RedisEventBus(EventBus):
+    """One stream per event type (`events:<type>`), trimmed to roughly `max_len` entries."""
+
+    def __init__(self, max_len: int = 10000, claim_idle_ms: int = 60000) -> None:
+        super().__init__(max_len, claim_idle_ms)
+        self._joined: set[tuple[str, tuple[str, ...]]] = set()
+
+    def _key(self, event_type: str) -> str:
+        return f"events:{event_type}"
+
+    def _client(self):
+        client = get_redis()
+        if client is None:
+            raise ConnectionError("Redis is unavailable")
+        return client
+
+    def _publish(self, event: Event) -> None:
+        fields = {"ids": json.dumps(event.ids), "payload": json.dumps(event.payload, default=str), "ts": event.ts.isoformat()}
+        event.id = self._client().xadd(self._key(event.type), fields, maxlen=self.max_len, approximate=True).decode()
+
+    def join(self, group: str, types: Iterable[str]) -> None:
+        client = self._client()
+        for event_type in types:
+            try:
+                client.xgroup_create(self._key(event_type), group, id="$", mkstream=True)
+            except Exception as exc:
+                if "BUSYGROUP" not in str(exc):
+                    raise
+
+    def _decode(self, event_type: str, message_id: bytes, fields: dict) -> Event:
+        return Event(
+            type=event_type,
+            ids=json.loads(fields[b"ids"]),
+            payload=json.loads(fields[b"payload"]),
+            ts=datetime.fromisoformat(fields[b"ts"].decode()),
+            id=message_id.decode(),
+        )
+
+    def read(
+        self, group: str, consumer: str, types: Iterable[str], count: int = 100, block_ms: int = 1000
+    ) -> list[Event]:
+        client = self._client()
+        types = list(types)
+        events: list[Event] = []
+        if (group, tuple(types)) not in self._joined:
+            self.join(group, types)
+            self._joined.add((group, tuple(types)))
+        for event_type in types:
+            _, claimed, *_ = client.xautoclaim(
+                self._key(event_type), group, consumer, min_idle_time=self.claim_idle_ms, count=count
+            )
+            events.extend(self._decode(event_type, message_id, fields) for message_id, fields in claimed if fields)
+        if events:
+            return events
+        streams = {self._key(event_type): ">" for event_type in types}
+        response = client.xreadgroup(group, consumer, streams, count=count, block=block_ms) or []
+        for key, messages in response:
+            event_type = key.decode().split(":", 1)[1]
+            events.extend(self._decode(event_type, message_id, fields) for message_id, fields in messages)
+        return events
+
+    def ack(self, group: str, events: Iterable[Event]) -> None:
+        client = self._client()
+        with client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xack(self._key(event.type), group, event.id)
+            pipe.execute()
+
+    def close_group(self, group: str, types: Iterable[str]) -> None:
+        types = list(types)
+        self._joined.discard((group, tuple(types)))
+        client = get_redis()
+        if client is None:
+            return
+        for event_type in types:
+            try:
+                client.xgroup_destroy(self._key(event_type), group)
+            except Exception:
+                logger.debug("Could not destroy group %s on %s", group, event_type)
+
+
+_bus: EventBus | None = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                settings = get_settings()
+                backend = RedisEventBus if settings.event_bus_backend == "redis" else InProcessEventBus
+                _bus = backend(settings.event_bus_max_len, settings.event_bus_claim_idle_ms)
+    return _bus
+
+
+def reset_event_bus() -> None:
+    global _bus
+    with _bus_lock:
+        _bus = None
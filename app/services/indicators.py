@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Row, select
+from sqlalchemy.orm import Session
+
+from app.db.models import TickOrBar
+from app.features.engineering import INDICATOR_COLUMNS, compute_indicators
+from app.features.store import TIMEFRAME_MINUTES, read_features
+from app.services.prices import PriceRange
+
+# Bars loaded ahead of the requested window so EMAs and rolling windows are warmed up.
+INDICATOR_WARMUP_BARS = 250
+_CACHE_SIZE = 128
+_BAR_FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+_cache: OrderedDict[tuple, tuple[tuple | None, dict[str, list[Any]]]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def load_indicators(
+    session: Session,
+    instrument_id: int,
+    timeframe: str,
+    names: list[str],
+    limit: int = 300,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> dict[str, list[Any]]:
+    """Return `{"ts": [...], name: [...]}` for the requested window.
+
+    Results are cached per query and keyed on the newest stored bar, all of its
+    values and not only its timestamp, because ingestion keeps rewriting an
+    aggregated bar until its bucket closes. When the feature store holds that
+    same bar, values are read from it instead of being recomputed.
+    """
+    _check_names(names)
+    key = (instrument_id, timeframe, tuple(names), limit, start, end)
+    latest = session.execute(
+        select(*(getattr(TickOrBar, name) for name in _BAR_FIELDS))
+        .where(TickOrBar.instrument_id == instrument_id)
+        .where(TickOrBar.timeframe == timeframe)
+        .order_by(TickOrBar.ts.desc())
+        .limit(1)
+    ).first()
+    version = tuple(latest) if latest is not None else None
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == version:
+            _cache.move_to_end(key)
+            return cached[1]
+    if latest is not None and _store_is_current(session, instrument_id, timeframe, latest):
+        payload = _from_store(session, instrument_id, timeframe, names, limit, start, end)
+    else:
+        payload = _compute(session, instrument_id, timeframe, names, limit, start, end)
+    with _cache_lock:
+        _cache[key] = (version, payload)
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return payload
+
+
+def load_range_indicators(
+    session: Session, instrument_id: int, names: list[str], price_range: PriceRange
+) -> dict[str, list[Any]]:
+    """Indicators over the same span and timeframe as `price_range`, one row per price row.
+
+    Indicators are computed on the timeframe the range was read from. When the prices
+    were merged into wider buckets, each row takes the value at its bucket's last bar,
+    like the bucket's close.
+    """
+    _check_names(names)
+    rows = price_range.rows
+    if not rows:
+        return {"ts": [], **{name: [] for name in names}}
+    bar_seconds = TIMEFRAME_MINUTES[price_range.timeframe] * 60
+    first, last = rows[0][0], rows[-1][0]
+    bars = int((last - first).total_seconds()) // bar_seconds + price_range.bucket_seconds // bar_seconds + 1
+    columns = load_indicators(session, instrument_id, price_range.timeframe, names, limit=bars, start=first)
+    if len(columns["ts"]) <= len(rows):
+        return columns
+    bar_times = _epoch_ns(columns["ts"])
+    bucket_ends = _epoch_ns([row[0] for row in rows]) + price_range.bucket_seconds * 10**9
+    positions = np.searchsorted(bar_times, bucket_ends, side="left") - 1
+    kept = [(row[0], position) for row, position in zip(rows, positions) if position >= 0]
+    payload: dict[str, list[Any]] = {"ts": [ts for ts, _ in kept]}
+    for name in names:
+        payload[name] = [columns[name][position] for _, position in kept]
+    return payload
+
+
+def clear_indicator_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def _check_names(names: list[str]) -> None:
+    unknown = sorted(set(names) - set(INDICATOR_COLUMNS))
+    if unknown:
+        raise ValueError(f"Unknown indicators: {', '.join(unknown)}")
+
+
+def _store_is_current(session: Session, instrument_id: int, timeframe: str, latest: Row) -> bool:
+    """Whether the newest stored feature row was computed from the newest bar as it is now."""
+    stored = read_features(session, instrument_id, timeframe, limit=1)
+    if len(stored) != 1:
+        return False
+    return stored["ts"].iloc[0] == pd.Timestamp(latest.ts) and stored["close"].iloc[0] == latest.close
+
+
+def _from_store(
+    session: Session,
+    instrument_id: int,
+    timeframe: str,
+    names: list[str],
+    limit: int,
+    start: datetime | None,
+    end: datetime | None,
+) -> dict[str, list[Any]]:
+    if not limit:
+        return {"ts": [], **{name: [] for name in names}}
+    frame = read_features(session, instrument_id, timeframe, start=start, end=end, limit=limit)
+    return _payload(frame, names)
+
+
+def _compute(
+    session: Session,
+    instrument_id: int,
+    timeframe: str,
+    names: list[str],
+    limit: int,
+    start: datetime | None,
+    end: datetime | None,
+) -> dict[str, list[Any]]:
+    query = (
+        select(*(getattr(TickOrBar, name) for name in _BAR_FIELDS))
+        .where(TickOrBar.instrument_id == instrument_id)
+        .where(TickOrBar.timeframe == timeframe)
+    )
+    if end is not None:
+        query = query.where(TickOrBar.ts <= end)
+    if start is not None:
+        window = session.execute(
+            query.where(TickOrBar.ts >= start).order_by(TickOrBar.ts.desc()).limit(limit)
+        ).all()
+        warmup = session.execute(
+            query.where(TickOrBar.ts < start).order_by(TickOrBar.ts.desc()).limit(INDICATOR_WARMUP_BARS)
+        ).all()
+        rows = warmup[::-1] + window[::-1]
+    else:
+        rows = session.execute(query.order_by(TickOrBar.ts.desc()).limit(limit + INDICATOR_WARMUP_BARS)).all()[::-1]
+        window = rows[-limit:] if limit else []
+    if not window:
+        return {"ts": [], **{name: [] for name in names}}
+    frame = compute_indicators(pd.DataFrame(rows, columns=list(_BAR_FIELDS))).tail(len(window))
+    return _payload(frame, names)
+
+
+def _epoch_ns(values: list[datetime]) -> np.ndarray:
+    # Naive timestamps are UTC throughout.
+    return pd.to_datetime(values, utc=True).to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def _payload(frame: pd.DataFrame, names: list[str]) -> dict[str, list[Any]]:
+    payload: dict[str, list[Any]] = {"ts": [ts.to_pydatetime() for ts in frame["ts"]]}
+    for name in names:
+        payload[name] = [None if math.isnan(value) else value for value in frame[name].tolist()]
+    return payload
@@ -0,0 +1,189 @@
+"""In-memory macro calendar with bisect lookups and surprise z-scores.
+
+Events are kept in time-sorted lists per (currency, impact), with `None`
+standing for "any", so next/previous-event queries are one bisect. A release's
+surprise is `actual - forecast`. Its z-score uses the mean and standard
+deviation of the earlier surprises of the same event name, kept with Welford's
+algorithm. Only earlier releases are used, so the score never looks ahead. A
+release that arrives in time order costs O(1); an out-of-order one
+recomputes that event name only.
+
+`refresh` compares a cheap version query against what is loaded and reads
+only new rows plus pending events whose `actual` has since been filled in.
+`ingest_macro` refreshes after each commit. Other processes pick up changes
+on their next lookup.
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+import pandas as pd
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.models import MacroEvent
+
+# Earlier releases an event name needs before its surprises get a z-score.
+MIN_SURPRISE_HISTORY = 3
+EVENT_FIELDS = ("id", "time", "currency", "impact", "name", "forecast", "previous", "actual", "source")
+
+
+@dataclass
+class _SurpriseStats:
+    """Welford running moments over one event name's surprises, in release order."""
+
+    releases: list[tuple[datetime, int, float]] = field(default_factory=list)
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def z(self, surprise: float) -> float | None:
+        if self.count < MIN_SURPRISE_HISTORY:
+            return None
+        std = math.sqrt(self.m2 / (self.count - 1))
+        return (surprise - self.mean) / std if std > 0 else None
+
+    def push(self, surprise: float) -> None:
+        self.count += 1
+        delta = surprise - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (surprise - self.mean)
+
+    def add(self, ts: datetime, event_id: int, surprise: float) -> dict[int, float | None]:
+        """Record a release; returns the z-scores that were set or changed."""
+        release = (ts, event_id, surprise)
+        if not self.releases or release > self.releases[-1]:
+            z = self.z(surprise)
+            self.push(surprise)
+            self.releases.append(release)
+            return {event_id: z}
+        bisect.insort(self.releases, release)
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        scores = {}
+        for _, release_id, value in self.releases:
+            scores[release_id] = self.z(value)
+            self.push(value)
+        return scores
+
+
+class MacroCalendar:
+    def __init__(self) -> None:
+        self._series: dict[tuple[str | None, str | None], list[tuple[datetime, int]]] = {}
+        self._events: dict[int, dict[str, Any]] = {}
+        self._stats: dict[str, _SurpriseStats] = {}
+        self._pending: set[int] = set()  # events without an actual yet
+        self._version: tuple | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self, session: Session) -> bool:
+        """Load what changed since the last refresh; returns True when anything did."""
+        url = str(session.get_bind().url)
+        count, last_id, released = session.execute(
+            select(func.count(MacroEvent.id), func.max(MacroEvent.id), func.count(MacroEvent.actual))
+        ).one()
+        version = (url, count, last_id or 0, released)
+        with self._lock:
+            if version == self._version:
+                return False
+            if self._version is None or self._version[0] != url or count < self._version[1]:
+                self._clear()
+                query = select(MacroEvent)
+            else:
+                query = select(MacroEvent).where(
+                    or_(MacroEvent.id > self._version[2], MacroEvent.id.in_(self._pending) & MacroEvent.actual.is_not(None))
+                )
+            for row in session.execute(query.order_by(MacroEvent.time, MacroEvent.id)).scalars():
+                self._apply({name: getattr(row, name) for name in EVENT_FIELDS})
+            self._version = version
+            return True
+
+    def _clear(self) -> None:
+        self._series.clear()
+        self._events.clear()
+        self._stats.clear()
+        self._pending.clear()
+
+    def _apply(self, event: dict[str, Any]) -> None:
+        event["time"] = _naive(event["time"])
+        known = self._events.get(event["id"])
+        if known is None:
+            event["surprise"] = event["surprise_z"] = None
+            self._events[event["id"]] = event
+            for key in {(None, None), (event["currency"], None), (None, event["impact"]), (event["currency"], event["impact"])}:
+                bisect.insort(self._series.setdefault(key, []), (event["time"], event["id"]))
+        else:
+            known.update(actual=event["actual"], forecast=event["forecast"])
+            event = known
+        if pd.isna(event["actual"]) or pd.isna(event["forecast"]):
+            self._pending.add(event["id"])
+            return
+        self._pending.discard(event["id"])
+        event["surprise"] = float(event["actual"] - event["forecast"])
+        stats = self._stats.setdefault(event["name"], _SurpriseStats())
+        for event_id, z in stats.add(event["time"], event["id"], event["surprise"]).items():
+            self._events[event_id]["surprise_z"] = z
+
+    def next_event(self, ts: datetime, currency: str | None = None, impact: str | None = None) -> dict | None:
+        """First event at or after `ts`."""
+        with self._lock:
+            series = self._series.get((currency, impact), [])
+            index = bisect.bisect_left(series, (_naive(ts),))
+            return dict(self._events[series[index][1]]) if index < len(series) else None
+
+    def previous_event(self, ts: datetime, currency: str | None = None, impact: str | None = None) -> dict | None:
+        """Last event at or before `ts`."""
+        with self._lock:
+            series = self._series.get((currency, impact), [])
+            index = bisect.bisect_right(series, (_naive(ts), math.inf)) - 1
+            return dict(self._events[series[index][1]]) if index >= 0 else None
+
+    def surprise(self, event_id: int) -> tuple[float | None, float | None]:
+        with self._lock:
+            event = self._events.get(event_id)
+            return (event["surprise"], event["surprise_z"]) if event else (None, None)
+
+    def events(
+        self, currency: str | None = None, impact: str | None = None, start: datetime | None = None
+    ) -> pd.DataFrame:
+        """Time-sorted events (time, currency, impact, name, surprise_z) from `start` onward."""
+        with self._lock:
+            series = self._series.get((currency, impact), [])
+            first = bisect.bisect_left(series, (_naive(start),)) if start is not None else 0
+            rows = [self._events[event_id] for _, event_id in series[first:]]
+            return pd.DataFrame(
+                [(row["time"], row["currency"], row["impact"], row["name"], row["surprise_z"]) for row in rows],
+                columns=["time", "currency", "impact", "name", "surprise_z"],
+            )
+
+
+_calendar: MacroCalendar | None = None
+_calendar_lock = threading.Lock()
+
+
+def get_macro_calendar(session: Session | None = None) -> MacroCalendar:
+    """Shared calendar, refreshed first when a session is given."""
+    global _calendar
+    if _calendar is None:
+        with _calendar_lock:
+            if _calendar is None:
+                _calendar = MacroCalendar()
+    if session is not None:
+        _calendar.refresh(session)
+    return _calendar
+
+
+def reset_macro_calendar() -> None:
+    global _calendar
+    with _calendar_lock:
+        _calendar = None
+
+
+def _naive(value: datetime) -> datetime:
+    # SQLite hands back naive UTC datetimes; index everything in naive UTC.
+    value = pd.Timestamp(value).to_pydatetime()
+    return value if value.tzinfo is None else value.astimezone(timezone.utc).replace(tzinfo=None)
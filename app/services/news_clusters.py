@@ -0,0 +1,230 @@
+"""Near-duplicate clustering of news stories.
+
+Each story gets a MinHash signature of its title and summary. An LSH index over
+recent signatures returns candidates that share a band with the new story; the
+most similar candidate at or above `NEWS_DEDUP_THRESHOLD` names the cluster.
+The first story of a cluster is its representative (`cluster_id == id`), and
+later copies reuse its analysis. Lookups cost one bucket probe per band,
+however many stories are indexed.
+
+Two backends mirror the event bus: an in-process index (the default), warmed
+from the signatures stored on `news` rows, and Redis (`NEWS_DEDUP_BACKEND=redis`),
+shared by every worker. Both only keep stories from the last
+`NEWS_DEDUP_WINDOW_HOURS`.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import redis
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.analytics.minhash import MinHasher, band_keys, similarity
+from app.core.cache import get_redis
+from app.core.config import get_settings
+from app.db.models import News
+
+logger = logging.getLogger(__name__)
+
+# Columns a near-duplicate copies from its cluster's representative instead of re-analyzing.
+ANALYSIS_FIELDS = (
+    "analysis_summary",
+    "sentiment",
+    "sentiment_label",
+    "impact_level",
+    "impacted_assets",
+    "rationale",
+    "entities",
+    "topics",
+    "is_fundamental",
+)
+
+
+class NewsIndex(ABC):
+    def __init__(self, bands: int, threshold: float, window: timedelta) -> None:
+        self.bands = bands
+        self.threshold = threshold
+        self.window = window
+
+    def match(self, signature: np.ndarray | None) -> int | None:
+        """Cluster id of the most similar indexed story at or above the threshold."""
+        if signature is None:
+            return None
+        candidates = self._candidates(band_keys(signature, self.bands))
+        if not candidates:
+            return None
+        scores = similarity(signature, np.stack([candidate for _, candidate in candidates]))
+        best = int(scores.argmax())
+        return candidates[best][0] if scores[best] >= self.threshold else None
+
+    @abstractmethod
+    def _candidates(self, keys: list[bytes]) -> list[tuple[int, np.ndarray]]:
+        """(cluster_id, signature) of stories sharing at least one band key."""
+
+    @abstractmethod
+    def add(self, news_id: int, cluster_id: int, signature: np.ndarray | None, published_at: datetime) -> None:
+        ...
+
+    def warm(self, session: Session) -> None:
+        """Load recent stored signatures; only needed by indexes that do not persist."""
+
+
+class InProcessNewsIndex(NewsIndex):
+    def __init__(self, bands: int, threshold: float, window: timedelta) -> None:
+        super().__init__(bands, threshold, window)
+        self._buckets: dict[bytes, set[int]] = defaultdict(set)
+        self._entries: dict[int, tuple[int, np.ndarray, list[bytes]]] = {}
+        self._order: deque[tuple[datetime, int]] = deque()
+        self._newest: datetime | None = None
+        self._warmed = False
+        self._lock = threading.Lock()
+
+    def _candidates(self, keys: list[bytes]) -> list[tuple[int, np.ndarray]]:
+        with self._lock:
+            ids = set().union(*(self._buckets.get(key, ()) for key in keys))
+            return [self._entries[news_id][:2] for news_id in ids]
+
+    def add(self, news_id: int, cluster_id: int, signature: np.ndarray | None, published_at: datetime) -> None:
+        if signature is None:
+            return
+        published_at = _naive(published_at)
+        keys = band_keys(signature, self.bands)
+        with self._lock:
+            if news_id in self._entries:
+                return
+            self._entries[news_id] = (cluster_id, signature, keys)
+            for key in keys:
+                self._buckets[key].add(news_id)
+            self._order.append((published_at, news_id))
+            self._newest = max(self._newest or published_at, published_at)
+            # Stories arrive roughly in time order, so expiry is checked from the oldest insert.
+            while self._order and self._order[0][0] < self._newest - self.window:
+                self._evict(self._order.popleft()[1])
+
+    def _evict(self, news_id: int) -> None:
+        _, _, keys = self._entries.pop(news_id)
+        for key in keys:
+            bucket = self._buckets[key]
+            bucket.discard(news_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def warm(self, session: Session) -> None:
+        if self._warmed:
+            return
+        newest = session.execute(select(func.max(News.published_at))).scalar()
+        if newest is not None:
+            rows = session.execute(
+                select(News.id, News.cluster_id, News.minhash, News.published_at)
+                .where(News.published_at >= newest - self.window)
+                .where(News.minhash.is_not(None))
+                .order_by(News.published_at)
+            ).all()
+            for row in rows:
+                self.add(row.id, row.cluster_id or row.id, np.frombuffer(row.minhash, dtype=np.uint32), row.published_at)
+        self._warmed = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisNewsIndex(NewsIndex):
+    """Band buckets are sets of news ids (`news:lsh:<band key>`); entries hold cluster id plus signature.
+
+    When Redis is unreachable, lookups find nothing and stories become their own clusters.
+    """
+
+    def _candidates(self, keys: list[bytes]) -> list[tuple[int, np.ndarray]]:
+        client = get_redis()
+        if client is None:
+            return []
+        try:
+            with client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.smembers(b"news:lsh:" + key)
+                ids = sorted(set().union(*pipe.execute()))
+            if not ids:
+                return []
+            entries = client.mget([b"news:lsh:entry:" + news_id for news_id in ids])
+        except redis.RedisError:
+            logger.warning("News index lookup failed; treating story as new")
+            return []
+        return [
+            (int(np.frombuffer(entry[:8], dtype=np.int64)[0]), np.frombuffer(entry[8:], dtype=np.uint32))
+            for entry in entries
+            if entry is not None
+        ]
+
+    def add(self, news_id: int, cluster_id: int, signature: np.ndarray | None, published_at: datetime) -> None:
+        client = get_redis()
+        if signature is None or client is None:
+            return
+        ttl = int(self.window.total_seconds())
+        member = str(news_id).encode()
+        try:
+            with client.pipeline(transaction=False) as pipe:
+                pipe.set(b"news:lsh:entry:" + member, np.int64(cluster_id).tobytes() + signature.tobytes(), ex=ttl)
+                for key in band_keys(signature, self.bands):
+                    pipe.sadd(b"news:lsh:" + key, member)
+                    pipe.expire(b"news:lsh:" + key, ttl)
+                pipe.execute()
+        except redis.RedisError:
+            logger.warning("Could not index news %s", news_id)
+
+
+_hasher: MinHasher | None = None
+_index: NewsIndex | None = None
+_index_lock = threading.Lock()
+
+
+def news_signature(title: str, summary: str) -> np.ndarray | None:
+    global _hasher
+    if _hasher is None:
+        _hasher = MinHasher(get_settings().news_minhash_permutations)
+    return _hasher.signature(f"{title} {summary}")
+
+
+def get_news_index(session: Session | None = None) -> NewsIndex:
+    """Shared index; pass a session on first use so the in-process index can warm up."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                settings = get_settings()
+                backend = RedisNewsIndex if settings.news_dedup_backend == "redis" else InProcessNewsIndex
+                _index = backend(
+                    settings.news_lsh_bands,
+                    settings.news_dedup_threshold,
+                    timedelta(hours=settings.news_dedup_window_hours),
+                )
+    if session is not None:
+        _index.warm(session)
+    return _index
+
+
+def reset_news_index() -> None:
+    global _index, _hasher
+    with _index_lock:
+        _index = None
+        _hasher = None
+
+
+def cluster_analysis(session: Session, cluster_id: int | None) -> dict | None:
+    """Analysis columns of a cluster's representative, or None when it is missing or unanalyzed."""
+    if cluster_id is None:
+        return None
+    representative = session.get(News, cluster_id)
+    if representative is None or representative.sentiment is None:
+        return None
+    return {name: getattr(representative, name) for name in ANALYSIS_FIELDS}
+
+
+def _naive(value: datetime) -> datetime:
+    # SQLite hands back naive UTC datetimes; keep the expiry clock in naive UTC.
+    return value if value.tzinfo is None else value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,174 @@
+"""Realized price moves after news, computed incrementally as bars arrive.
+
+For every story that names an instrument in `impacted_assets`, one
+`NewsImpact` row per horizon records the return from the last 1m close at or
+before `published_at` to the last close at or before `published_at + horizon`.
+A row is written once that horizon has fully elapsed, so each price ingest
+only touches stories whose horizons were completed by the new bars. Stories
+whose analysis changes are dropped and recomputed. Near-duplicate copies are
+skipped so a story carried by several feeds is counted once. `impact_stats` aggregates
+the rows by topic, impact level or source in SQL.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, cast, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import News, NewsImpact, TickOrBar
+from app.features.store import REPRESENTATIVE_NEWS
+
+GROUPS = {"topic": NewsImpact.topic, "impact_level": NewsImpact.impact_level, "source": NewsImpact.source}
+
+
+def impact_horizons(settings=None) -> list[int]:
+    settings = settings or get_settings()
+    return sorted({int(value) for value in settings.news_impact_horizons_minutes.split(",") if value.strip()})
+
+
+def update_news_impact(session: Session, instrument_id: int, symbol: str, batch_size: int | None = None) -> int:
+    """Add impact rows for horizons completed since the last run; returns rows added (caller commits)."""
+    settings = get_settings()
+    horizons = impact_horizons(settings)
+    batch_size = batch_size or settings.news_impact_batch_size
+    bars = (
+        select(TickOrBar.ts, TickOrBar.close)
+        .where(TickOrBar.instrument_id == instrument_id)
+        .where(TickOrBar.timeframe == "1m")
+    )
+    first, latest = session.execute(
+        select(func.min(TickOrBar.ts), func.max(TickOrBar.ts))
+        .where(TickOrBar.instrument_id == instrument_id)
+        .where(TickOrBar.timeframe == "1m")
+    ).one()
+    if latest is None or not horizons:
+        return 0
+    complete = (
+        select(NewsImpact.news_id)
+        .where(NewsImpact.instrument_id == instrument_id)
+        .where(NewsImpact.horizon_minutes.in_(horizons))
+        .group_by(NewsImpact.news_id)
+        .having(func.count() >= len(horizons))
+    )
+    stories = session.execute(
+        select(News.id, News.published_at, News.source, News.impact_level, News.topics, News.sentiment)
+        .where(News.published_at >= first)
+        .where(News.published_at <= latest - timedelta(minutes=horizons[0]))
+        # JSON lists serialize each symbol in quotes on every backend.
+        .where(cast(News.impacted_assets, String).like(f'%"{symbol}"%'))
+        .where(News.id.not_in(complete))
+        .where(REPRESENTATIVE_NEWS)
+        .order_by(News.published_at)
+        .limit(batch_size)
+    ).all()
+    if not stories:
+        return 0
+    done = set(
+        session.execute(
+            select(NewsImpact.news_id, NewsImpact.horizon_minutes)
+            .where(NewsImpact.instrument_id == instrument_id)
+            .where(NewsImpact.news_id.in_([story.id for story in stories]))
+        ).all()
+    )
+    earliest = stories[0].published_at
+    # Start from the last bar at or before the earliest story so every story has a base price.
+    base_start = session.execute(
+        select(func.max(TickOrBar.ts))
+        .where(TickOrBar.instrument_id == instrument_id)
+        .where(TickOrBar.timeframe == "1m")
+        .where(TickOrBar.ts <= earliest)
+    ).scalar()
+    window = session.execute(
+        bars.where(TickOrBar.ts >= base_start)
+        .where(TickOrBar.ts <= stories[-1].published_at + timedelta(minutes=horizons[-1]))
+        .order_by(TickOrBar.ts)
+    ).all()
+    ts = _epoch_ns([row.ts for row in window])
+    closes = np.array([row.close for row in window], dtype=float)
+    published = _epoch_ns([story.published_at for story in stories])
+    base = closes[np.searchsorted(ts, published, side="right") - 1]
+    last_ts = _epoch_ns([latest])[0]
+    added = []
+    for horizon in horizons:
+        target = published + horizon * 60 * 10**9
+        moved = closes[np.searchsorted(ts, target, side="right") - 1] / base - 1.0
+        for index, story in enumerate(stories):
+            if target[index] > last_ts or (story.id, horizon) in done:
+                continue
+            added.append(
+                NewsImpact(
+                    news_id=story.id,
+                    instrument_id=instrument_id,
+                    horizon_minutes=horizon,
+                    published_at=story.published_at,
+                    source=story.source,
+                    impact_level=story.impact_level,
+                    topic=_dominant_topic(story.topics),
+                    sentiment=story.sentiment,
+                    return_pct=float(moved[index]),
+                )
+            )
+    session.add_all(added)
+    return len(added)
+
+
+def invalidate_news_impact(session: Session, news_ids: list[int]) -> None:
+    """Drop impact rows of re-analyzed stories; the next price ingest recomputes them."""
+    if news_ids:
+        session.execute(delete(NewsImpact).where(NewsImpact.news_id.in_(news_ids)))
+
+
+def impact_stats(
+    session: Session,
+    group_by: str,
+    instrument_id: int | None = None,
+    horizon_minutes: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Count, mean return and mean absolute return per group and horizon."""
+    if group_by not in GROUPS:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUPS)}")
+    group = GROUPS[group_by]
+    query = select(
+        group.label("group"),
+        NewsImpact.horizon_minutes,
+        func.count().label("stories"),
+        func.avg(NewsImpact.return_pct).label("mean_return"),
+        func.avg(func.abs(NewsImpact.return_pct)).label("mean_abs_return"),
+    )
+    if instrument_id is not None:
+        query = query.where(NewsImpact.instrument_id == instrument_id)
+    if horizon_minutes is not None:
+        query = query.where(NewsImpact.horizon_minutes == horizon_minutes)
+    if start is not None:
+        query = query.where(NewsImpact.published_at >= start)
+    if end is not None:
+        query = query.where(NewsImpact.published_at <= end)
+    rows = session.execute(query.group_by(group, NewsImpact.horizon_minutes).order_by(group, NewsImpact.horizon_minutes))
+    return [
+        {
+            group_by: row.group,
+            "horizon_minutes": row.horizon_minutes,
+            "stories": row.stories,
+            "mean_return": float(row.mean_return),
+            "mean_abs_return": float(row.mean_abs_return),
+        }
+        for row in rows
+    ]
+
+
+def _dominant_topic(topics: dict | None) -> str:
+    if not topics:
+        return "none"
+    return max(sorted(topics), key=lambda name: topics[name])
+
+
+def _epoch_ns(values: list[datetime]) -> np.ndarray:
+    # SQLite returns naive UTC datetimes; treat both kinds as UTC.
+    return pd.to_datetime(values, utc=True).asi8
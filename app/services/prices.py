@@ -0,0 +1,125 @@
+"""Price history for chart ranges, bounded to a point budget.
+
+`load_price_range` picks the coarsest stored timeframe that is still at least as
+fine as one point per `span / points`. If that timeframe has more bars than the
+budget, they are merged into wider OHLC buckets in SQL (`shape="ohlc"`) or
+thinned with LTTB on the close (`shape="line"`). The response never exceeds
+`points` rows, however long the range is.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Row, and_, func, select
+from sqlalchemy.orm import Session, aliased
+
+from app.analytics.downsample import lttb_indices
+from app.db.buckets import bucket_index
+from app.db.models import TickOrBar
+from app.features.store import TIMEFRAME_MINUTES
+
+PRICE_FIELDS = ("ts", "open", "high", "low", "close", "volume")
+
+
+@dataclass
+class PriceRange:
+    rows: list[Any]  # tuples in PRICE_FIELDS order
+    timeframe: str  # stored timeframe the rows were read from
+    bucket_seconds: int  # width of each returned row
+
+
+def load_price_range(
+    session: Session,
+    instrument_id: int,
+    timeframe: str,
+    points: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    shape: str = "ohlc",
+) -> PriceRange:
+    """Bars in [start, end] no finer than `timeframe`, downsampled to at most `points` rows."""
+    if timeframe not in TIMEFRAME_MINUTES:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    if points < 2:
+        raise ValueError("points must be at least 2")
+    candidates = [name for name, minutes in TIMEFRAME_MINUTES.items() if minutes >= TIMEFRAME_MINUTES[timeframe]]
+    range_filters = _range_filters(instrument_id, start, end)
+    stats = {
+        row.timeframe: row
+        for row in session.execute(
+            select(
+                TickOrBar.timeframe,
+                func.count().label("bars"),
+                func.min(TickOrBar.ts).label("first"),
+                func.max(TickOrBar.ts).label("last"),
+            )
+            .where(*range_filters)
+            .where(TickOrBar.timeframe.in_(candidates))
+            .group_by(TickOrBar.timeframe)
+        ).all()
+    }
+    available = [name for name in candidates if name in stats]
+    if not available:
+        return PriceRange([], timeframe, TIMEFRAME_MINUTES[timeframe] * 60)
+    span = max((stats[name].last - stats[name].first).total_seconds() for name in available)
+    # Buckets of span / (points - 1) seconds cover the range in at most `points` rows.
+    needed = span / (points - 1)
+    fine_enough = [name for name in available if TIMEFRAME_MINUTES[name] * 60 <= needed]
+    source = fine_enough[-1] if fine_enough else available[0]
+    width = TIMEFRAME_MINUTES[source] * 60
+    filters = [*range_filters, TickOrBar.timeframe == source]
+    if stats[source].bars <= points:
+        return PriceRange(_raw_rows(session, filters), source, width)
+    if shape == "line":
+        rows = _raw_rows(session, filters)
+        x = np.array([row.ts.timestamp() for row in rows])
+        y = np.array([row.close for row in rows])
+        return PriceRange([rows[index] for index in lttb_indices(x, y, points)], source, width)
+    seconds = math.ceil(needed / width) * width
+    return PriceRange(_ohlc_buckets(session, instrument_id, source, filters, seconds), source, seconds)
+
+
+def _range_filters(instrument_id: int, start: datetime | None, end: datetime | None) -> list:
+    filters = [TickOrBar.instrument_id == instrument_id]
+    if start is not None:
+        filters.append(TickOrBar.ts >= start)
+    if end is not None:
+        filters.append(TickOrBar.ts <= end)
+    return filters
+
+
+def _raw_rows(session: Session, filters: list) -> list[Row]:
+    return session.execute(
+        select(*(getattr(TickOrBar, name) for name in PRICE_FIELDS)).where(*filters).order_by(TickOrBar.ts)
+    ).all()
+
+
+def _ohlc_buckets(session: Session, instrument_id: int, timeframe: str, filters: list, seconds: int) -> list[Row]:
+    """OHLC per bucket: open of the first bar, close of the last, extremes and total volume."""
+    bucket = bucket_index(session, TickOrBar.ts, seconds).label("bucket")
+    grouped = (
+        select(
+            bucket,
+            func.min(TickOrBar.ts).label("first_ts"),
+            func.max(TickOrBar.ts).label("last_ts"),
+            func.max(TickOrBar.high).label("high"),
+            func.min(TickOrBar.low).label("low"),
+            func.sum(TickOrBar.volume).label("volume"),
+        )
+        .where(*filters)
+        .group_by(bucket)
+        .subquery()
+    )
+    first = aliased(TickOrBar)
+    last = aliased(TickOrBar)
+    return session.execute(
+        select(first.ts, first.open, grouped.c.high, grouped.c.low, last.close, grouped.c.volume)
+        .select_from(grouped)
+        .join(first, and_(first.instrument_id == instrument_id, first.timeframe == timeframe, first.ts == grouped.c.first_ts))
+        .join(last, and_(last.instrument_id == instrument_id, last.timeframe == timeframe, last.ts == grouped.c.last_ts))
+        .order_by(grouped.c.bucket)
+    ).all()
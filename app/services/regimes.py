@@ -0,0 +1,118 @@
+"""Incremental regime classification backed by the feature store.
+
+One `RegimeTracker` per instrument/timeframe is kept in memory and advanced
+through the stored feature rows it has not seen yet, so each prediction costs
+O(log n) per new bar instead of ranking the whole history. Regime changes are
+written to `regime_history`, which `/regimes` serves for charting.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.analytics.regime import RegimeTracker
+from app.core.config import get_settings
+from app.db.models import RegimeHistory
+from app.features.store import read_features
+
+_trackers: dict[tuple[int, str], RegimeTracker] = {}
+_recorded: dict[tuple[int, str], str | None] = {}
+_lock = threading.Lock()
+
+
+def current_regime(session: Session, instrument_id: int, timeframe: str, lookback: int | None = None) -> dict:
+    """Regime at the newest stored bar, recording any transitions since the last call (caller commits)."""
+    lookback = lookback or get_settings().regime_lookback_bars
+    key = (instrument_id, timeframe)
+    with _lock:
+        tracker = _trackers.get(key)
+        warming = tracker is None or tracker.lookback != lookback
+        if warming:
+            tracker = RegimeTracker(lookback)
+            frame = read_features(session, instrument_id, timeframe, limit=lookback, dropna=True)
+            _recorded[key] = _last_recorded(session, instrument_id, timeframe)
+        else:
+            # Re-read the last bar too: aggregated bars keep changing until their bucket closes.
+            frame = read_features(session, instrument_id, timeframe, start=tracker.last_ts, dropna=True)
+        for row in frame.itertuples(index=False):
+            regime = tracker.update(row.ts.to_pydatetime(), row.volatility_20, row.ema_20, row.ema_50, row.ema_200)
+            if not warming and regime["regime"] != _recorded[key]:
+                _record(session, instrument_id, timeframe, tracker.last_ts, regime)
+                _recorded[key] = regime["regime"]
+        if tracker.current is None:
+            return {"regime": "unknown", "evidence": {}}
+        if warming:
+            _trackers[key] = tracker
+            # While warming up only the final bar has a full window behind it, so only it is recorded.
+            if tracker.current["regime"] != _recorded[key]:
+                _record(session, instrument_id, timeframe, tracker.last_ts, tracker.current)
+                _recorded[key] = tracker.current["regime"]
+        return tracker.current
+
+
+def regime_history(
+    session: Session,
+    instrument_id: int,
+    timeframe: str = "1m",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 500,
+) -> list[dict[str, Any]]:
+    """Regime changes in the range, oldest first, newest `limit` kept."""
+    query = (
+        select(RegimeHistory)
+        .where(RegimeHistory.instrument_id == instrument_id)
+        .where(RegimeHistory.timeframe == timeframe)
+    )
+    if start is not None:
+        query = query.where(RegimeHistory.ts >= start)
+    if end is not None:
+        query = query.where(RegimeHistory.ts <= end)
+    rows = session.execute(query.order_by(RegimeHistory.ts.desc()).limit(limit)).scalars().all()[::-1]
+    return [
+        {
+            "ts": row.ts,
+            "regime": row.regime,
+            "volatility_percentile": row.volatility_percentile,
+            "trend_up": row.trend_up,
+            "trend_down": row.trend_down,
+        }
+        for row in rows
+    ]
+
+
+def reset_regime_trackers() -> None:
+    with _lock:
+        _trackers.clear()
+        _recorded.clear()
+
+
+def _last_recorded(session: Session, instrument_id: int, timeframe: str) -> str | None:
+    return session.execute(
+        select(RegimeHistory.regime)
+        .where(RegimeHistory.instrument_id == instrument_id)
+        .where(RegimeHistory.timeframe == timeframe)
+        .order_by(RegimeHistory.ts.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+def _record(session: Session, instrument_id: int, timeframe: str, ts: datetime, regime: dict) -> None:
+    evidence = regime["evidence"]
+    row = session.execute(
+        select(RegimeHistory)
+        .where(RegimeHistory.instrument_id == instrument_id)
+        .where(RegimeHistory.timeframe == timeframe)
+        .where(RegimeHistory.ts == ts)
+    ).scalar_one_or_none()
+    if row is None:
+        row = RegimeHistory(instrument_id=instrument_id, timeframe=timeframe, ts=ts)
+        session.add(row)
+    row.regime = regime["regime"]
+    row.volatility_percentile = evidence["volatility_percentile"]
+    row.trend_up = evidence["trend_up"]
+    row.trend_down = evidence["trend_down"]
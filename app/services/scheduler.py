@@ -1,39 +1,81 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterator
 
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, JobEvent
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 import pandas as pd
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from app.core.config import get_settings
+from app.core.metrics import (
+    JOB_MISSED,
+    NEWS_ANALYSIS_LATENCY,
+    NEWS_ANALYZED,
+    NEWS_DUPLICATES,
+    PROVIDER_FETCH_LATENCY,
+    SIGNAL_DELAY,
+    observe_job,
+    record_rows,
+)
 from app.core.rate_limit import allow_run
+from app.core.tracing import Trace, span, trace
 from app.core.utils import utc_now
 from app.db.models import Instrument, MacroEvent, News, SystemHealth, TickOrBar
-from app.db.session import SessionLocal
+from app.db.session import JobSessionLocal
 from app.analytics.news_analysis import RuleBasedNewsAnalyzer
+from app.features.store import TIMEFRAMES, invalidate_features, update_features
+from app.ingestion.backfill import AGGREGATE_RULES
 from app.ingestion.macro_provider_csv import CsvMacroProvider
 from app.ingestion.macro_provider_demo import DemoMacroProvider
 from app.ingestion.news_provider_demo import DemoNewsProvider
 from app.ingestion.news_provider_rss import RssNewsProvider
 from app.ingestion.prices_provider_alphavantage import AlphaVantagePriceProvider
 from app.ingestion.prices_provider_demo import DemoPriceProvider
+from app.ingestion.simulation import SimulatedMacroProvider, SimulatedNewsProvider, SimulatedPriceProvider
 from app.ml.predict import predict_and_store
+from app.services.alerts import start_alerting
+from app.services.events import BARS_COMMITTED, MACRO_COMMITTED, NEWS_COMMITTED, Event, get_event_bus
+from app.services.macro_calendar import get_macro_calendar
+from app.services.news_clusters import (
+    ANALYSIS_FIELDS,
+    InProcessNewsIndex,
+    cluster_analysis,
+    get_news_index,
+    news_signature,
+)
+from app.services.news_impact import invalidate_news_impact, update_news_impact
 
 logger = logging.getLogger(__name__)
 
 scheduler = BackgroundScheduler()
+_profiled_jobs: set[str] = set()
 
+# Held while a price batch (all instruments plus aggregation) is being written, so a
+# prediction never reads some instruments' new bars without the rest.
+_prices_batch_lock = threading.Lock()
+# Only one prediction runs at a time; requests arriving meanwhile are folded into a rerun.
+_prediction_lock = threading.Lock()
+_prediction_requested = threading.Event()
+_prediction_requested_at: float | None = None
 
-def _update_health(job_name: str, status: str, error: str | None = None) -> None:
-    with SessionLocal() as session:
+
+def _update_health(job_name: str, status: str, error: str | None = None, details: dict | None = None) -> None:
+    with JobSessionLocal() as session:
         row = session.execute(select(SystemHealth).where(SystemHealth.job_name == job_name)).scalar_one_or_none()
         if row:
             row.last_run = utc_now()
             row.status = status
             row.error = error
             row.ok = status == "success"
+            row.details = details
         else:
             session.add(
                 SystemHealth(
@@ -42,18 +84,41 @@ def _update_health(job_name: str, status: str, error: str | None = None) -> None
                     status=status,
                     error=error,
                     ok=status == "success",
+                    details=details,
                 )
             )
         session.commit()
 
 
+@contextmanager
+def _job_trace(job_name: str) -> Iterator[Trace]:
+    """Trace a job run, profiling its first run in this process when listed in PROFILE_JOBS."""
+    settings = get_settings()
+    profile_path = None
+    wanted = {name.strip() for name in settings.profile_jobs.split(",") if name.strip()}
+    if job_name in wanted and job_name not in _profiled_jobs:
+        _profiled_jobs.add(job_name)
+        suffix = "html" if settings.profiler == "pyinstrument" else "prof"
+        profile_path = Path(settings.profile_dir) / f"{job_name}-{utc_now():%Y%m%d%H%M%S}.{suffix}"
+    with trace(job_name, profile_path=profile_path, profiler=settings.profiler) as run:
+        yield run
+
+
+def _details(run: Trace | None) -> dict | None:
+    return run.summary() if run is not None else None
+
+
 def _get_price_provider(settings):
+    if settings.price_provider == "simulation":
+        return SimulatedPriceProvider()
     if settings.price_provider == "alphavantage" and settings.alphavantage_api_key:
         return AlphaVantagePriceProvider(settings.alphavantage_api_key)
     return DemoPriceProvider()
 
 
 def _get_news_provider(settings):
+    if settings.news_provider == "simulation":
+        return SimulatedNewsProvider()
     if settings.news_provider == "rss":
         urls = [url.strip() for url in settings.news_rss_urls.split(",") if url.strip()]
         return RssNewsProvider(urls)
@@ -61,6 +126,8 @@ def _get_news_provider(settings):
 
 
 def _get_macro_provider(settings):
+    if settings.macro_provider == "simulation":
+        return SimulatedMacroProvider()
     if settings.macro_provider == "csv":
         return CsvMacroProvider("data/macro_events.csv")
     return DemoMacroProvider()
@@ -69,10 +136,15 @@ def _get_macro_provider(settings):
 def ingest_prices() -> None:
     settings = get_settings()
     provider = _get_price_provider(settings)
+    started = time.perf_counter()
+    inserted = skipped = 0
+    committed_ids: dict[int, list[int]] = {}
+    run = None
     try:
         if not allow_run("prices", settings.poll_prices_seconds):
+            observe_job("prices", "skipped", started)
             return
-        with SessionLocal() as session:
+        with _job_trace("prices") as run, _prices_batch_lock, JobSessionLocal() as session:
             instruments = session.execute(select(Instrument)).scalars().all()
             for instrument in instruments:
                 last_bar = (
@@ -87,21 +159,28 @@ def ingest_prices() -> None:
                     .first()
                 )
                 start = last_bar.ts if last_bar else None
-                bars = provider.fetch_bars(instrument.symbol, "1m", start)
-                for bar in bars:
-                    exists = (
-                        session.query(TickOrBar)
-                        .filter(
-                            TickOrBar.instrument_id == instrument.id,
-                            TickOrBar.timeframe == bar.get("timeframe", "1m"),
-                            TickOrBar.ts == bar["ts"],
+                with span("fetch") as stage, PROVIDER_FETCH_LATENCY.labels(
+                    provider=type(provider).__name__, kind="prices"
+                ).time():
+                    bars = provider.fetch_bars(instrument.symbol, "1m", start)
+                    stage["rows"] = len(bars)
+                with span("insert", rows=len(bars)):
+                    new_rows: list[TickOrBar] = []
+                    for bar in bars:
+                        exists = (
+                            session.query(TickOrBar)
+                            .filter(
+                                TickOrBar.instrument_id == instrument.id,
+                                TickOrBar.timeframe == bar.get("timeframe", "1m"),
+                                TickOrBar.ts == bar["ts"],
+                            )
+                            .first()
                         )
-                        .first()
-                    )
-                    if exists:
-                        continue
-                    session.add(
-                        TickOrBar(
+                        if exists:
+                            skipped += 1
+                            continue
+                        inserted += 1
+                        row = TickOrBar(
                             instrument_id=instrument.id,
                             timeframe=bar.get("timeframe", "1m"),
                             ts=bar["ts"],
@@ -113,89 +192,187 @@ def ingest_prices() -> None:
                             bid=bar.get("bid"),
                             ask=bar.get("ask"),
                         )
-                    )
-                session.commit()
-                _aggregate_timeframes(session, instrument.id)
-        _update_health("prices", "success")
+                        session.add(row)
+                        new_rows.append(row)
+                    session.flush()
+                    new_ids = [row.id for row in new_rows]
+                    session.commit()
+                    if new_ids:
+                        committed_ids[instrument.id] = new_ids
+                with span("aggregate"):
+                    _aggregate_timeframes(session, instrument.id)
+                with span("features") as stage:
+                    stage["rows"] = sum(update_features(session, instrument.id, timeframe) for timeframe in TIMEFRAMES)
+                    session.commit()
+                with span("news_impact") as stage:
+                    stage["rows"] = update_news_impact(session, instrument.id, instrument.symbol)
+                    session.commit()
+        _update_health("prices", "success", details=_details(run))
+        observe_job("prices", "success", started)
     except Exception as exc:
         logger.exception("Price ingestion failed")
-        _update_health("prices", "failed", str(exc))
+        _update_health("prices", "failed", str(exc), details=_details(run))
+        observe_job("prices", "failed", started)
+    finally:
+        record_rows("prices", inserted=inserted, skipped=skipped)
+        # Published after the batch lock is released, so consumers see every instrument's bars.
+        bus = get_event_bus()
+        for instrument_id, ids in committed_ids.items():
+            bus.publish(BARS_COMMITTED, ids, instrument_id=instrument_id, timeframe="1m")
 
 
 def ingest_news() -> None:
     settings = get_settings()
     provider = _get_news_provider(settings)
     analyzer = RuleBasedNewsAnalyzer()
+    started = time.perf_counter()
+    inserted = updated = 0
+    new_news: list[News] = []
+    changed_news: list[News] = []
+    run = None
     try:
         if not allow_run("news", settings.poll_news_seconds):
+            observe_job("news", "skipped", started)
             return
-        with SessionLocal() as session:
+        with _job_trace("news") as run, JobSessionLocal() as session:
             last_news = session.execute(select(News).order_by(News.published_at.desc()).limit(1)).scalar_one_or_none()
             since = last_news.published_at if last_news else None
-            try:
-                items = provider.fetch_news(since)
-            except Exception:
-                logger.exception("Primary news provider failed, falling back to demo feed")
-                items = DemoNewsProvider().fetch_news(since)
+            with span("fetch") as stage:
+                try:
+                    with PROVIDER_FETCH_LATENCY.labels(provider=type(provider).__name__, kind="news").time():
+                        items = provider.fetch_news(since)
+                except Exception:
+                    logger.exception("Primary news provider failed, falling back to demo feed")
+                    items = DemoNewsProvider().fetch_news(since)
+                stage["rows"] = len(items)
+            index = get_news_index(session)
+            batch_index = InProcessNewsIndex(index.bands, index.threshold, index.window)
+            clusters: list[tuple[int | None, int | None, Any]] = []
             for item in items:
                 url = item.get("url", "")
                 title = item.get("title", "")
                 summary = item.get("summary", "")
-                analysis = analyzer.analyze(title=title, summary=summary, source=item.get("source", ""))
+                with span("dedupe", rows=1):
+                    signature = news_signature(title, summary)
                 exists = session.query(News).filter(News.url == url).first()
                 if exists:
+                    fields = _analyze(analyzer, title, summary, item.get("source", ""))
                     if exists.title != title or exists.summary != summary:
                         exists.title = title
                         exists.summary = summary
-                    exists.analysis_summary = analysis.summary
-                    exists.sentiment = analysis.sentiment_score
-                    exists.sentiment_label = analysis.sentiment_label
-                    exists.impact_level = analysis.impact_level
-                    exists.impacted_assets = analysis.impacted_assets
-                    exists.rationale = analysis.rationale
-                    exists.entities = {"symbols": analysis.impacted_assets}
-                    exists.topics = analysis.topics
-                    exists.is_fundamental = analysis.is_fundamental
+                        exists.minhash = signature.tobytes() if signature is not None else None
+                    for name, value in fields.items():
+                        setattr(exists, name, value)
+                    changed_news.append(exists)
+                    updated += 1
                     continue
-                session.add(
+                inserted += 1
+                cluster_id = index.match(signature)
+                fields = cluster_analysis(session, cluster_id)
+                if fields is None:
+                    cluster_id = None  # the match is gone or not analyzed yet
+                # Copies within this batch have no ids yet; they point at their representative's position.
+                batch_cluster = batch_index.match(signature) if fields is None else None
+                if batch_cluster is not None:
+                    representative = new_news[batch_cluster]
+                    fields = {name: getattr(representative, name) for name in ANALYSIS_FIELDS}
+                if fields is None:
+                    fields = _analyze(analyzer, title, summary, item.get("source", ""))
+                    batch_index.add(len(new_news), len(new_news), signature, item["published_at"])
+                else:
+                    NEWS_DUPLICATES.inc()
+                new_news.append(
                     News(
                         source=item.get("source", "unknown"),
                         published_at=item["published_at"],
                         title=title,
                         summary=summary,
-                        analysis_summary=analysis.summary,
                         url=url,
-                        sentiment=analysis.sentiment_score,
-                        sentiment_label=analysis.sentiment_label,
-                        impact_level=analysis.impact_level,
-                        impacted_assets=analysis.impacted_assets,
-                        rationale=analysis.rationale,
-                        entities={"symbols": analysis.impacted_assets},
-                        topics=analysis.topics,
-                        is_fundamental=analysis.is_fundamental,
+                        minhash=signature.tobytes() if signature is not None else None,
+                        **fields,
                     )
                 )
-            session.commit()
-        _update_health("news", "success")
+                clusters.append((cluster_id, batch_cluster, signature))
+                session.add(new_news[-1])
+            with span("commit", rows=inserted + updated):
+                session.flush()
+                for news, (cluster_id, batch_cluster, signature) in zip(new_news, clusters):
+                    if cluster_id is None:
+                        cluster_id = new_news[batch_cluster].id if batch_cluster is not None else news.id
+                    news.cluster_id = cluster_id
+                session.flush()
+                new_ids = [row.id for row in new_news]
+                updated_ids = [row.id for row in changed_news]
+                touched = [row.published_at for row in new_news + changed_news]
+                if touched:
+                    # Sentiment windows of bars from the earliest touched story onward have changed.
+                    invalidate_features(session, min(touched))
+                invalidate_news_impact(session, updated_ids)
+                session.commit()
+            # Index only committed stories so a failed commit cannot leave phantom ids behind.
+            for news, (_, _, signature) in zip(new_news, clusters):
+                index.add(news.id, news.cluster_id, signature, news.published_at)
+        get_event_bus().publish(NEWS_COMMITTED, new_ids, updated_ids=updated_ids)
+        _update_health("news", "success", details=_details(run))
+        observe_job("news", "success", started)
     except Exception as exc:
         logger.exception("News ingestion failed")
-        _update_health("news", "failed", str(exc))
+        _update_health("news", "failed", str(exc), details=_details(run))
+        observe_job("news", "failed", started)
+    finally:
+        record_rows("news", inserted=inserted, updated=updated)
+
+
+def _analyze(analyzer: RuleBasedNewsAnalyzer, title: str, summary: str, source: str) -> dict:
+    with span("analyze", rows=1), NEWS_ANALYSIS_LATENCY.time():
+        analysis = analyzer.analyze(title=title, summary=summary, source=source)
+    NEWS_ANALYZED.inc()
+    return {
+        "analysis_summary": analysis.summary,
+        "sentiment": analysis.sentiment_score,
+        "sentiment_label": analysis.sentiment_label,
+        "impact_level": analysis.impact_level,
+        "impacted_assets": analysis.impacted_assets,
+        "rationale": analysis.rationale,
+        "entities": {"symbols": analysis.impacted_assets},
+        "topics": analysis.topics,
+        "is_fundamental": analysis.is_fundamental,
+    }
 
 
 def ingest_macro() -> None:
     settings = get_settings()
     provider = _get_macro_provider(settings)
+    started = time.perf_counter()
+    inserted = updated = skipped = 0
+    new_events: list[MacroEvent] = []
+    released: list[MacroEvent] = []
+    run = None
     try:
         if not allow_run("macro", settings.poll_macro_seconds):
+            observe_job("macro", "skipped", started)
             return
-        with SessionLocal() as session:
+        with _job_trace("macro") as run, JobSessionLocal() as session:
             last_event = (
                 session.execute(select(MacroEvent).order_by(MacroEvent.time.desc()).limit(1))
                 .scalars()
                 .first()
             )
             since = last_event.time if last_event else None
-            events = provider.fetch_events(since)
+            if since is not None:
+                # Refetch from the oldest recent event still waiting for its actual so releases get recorded.
+                pending = session.execute(
+                    select(func.min(MacroEvent.time))
+                    .where(MacroEvent.actual.is_(None))
+                    .where(MacroEvent.time >= since - timedelta(hours=settings.macro_actual_lookback_hours))
+                ).scalar()
+                if pending is not None:
+                    since = pending - timedelta(microseconds=1)  # providers return rows strictly after `since`
+            with span("fetch") as stage, PROVIDER_FETCH_LATENCY.labels(
+                provider=type(provider).__name__, kind="macro"
+            ).time():
+                events = provider.fetch_events(since)
+                stage["rows"] = len(events)
             for event in events:
                 exists = (
                     session.query(MacroEvent)
@@ -208,8 +385,18 @@ def ingest_macro() -> None:
                     .first()
                 )
                 if exists:
+                    # CSV providers hand over NaN for blank cells.
+                    if pd.notna(event.get("actual")) and exists.actual != event["actual"]:
+                        exists.actual = event["actual"]
+                        if pd.notna(event.get("forecast")):
+                            exists.forecast = event["forecast"]
+                        released.append(exists)
+                        updated += 1
+                    else:
+                        skipped += 1
                     continue
-                session.add(
+                inserted += 1
+                new_events.append(
                     MacroEvent(
                         time=event["time"],
                         currency=event.get("currency", "USD"),
@@ -221,42 +408,171 @@ def ingest_macro() -> None:
                         source=event.get("source", "demo"),
                     )
                 )
-            session.commit()
-        _update_health("macro", "success")
+                session.add(new_events[-1])
+            with span("commit", rows=inserted + updated):
+                session.flush()
+                new_ids = [row.id for row in new_events + released]
+                _invalidate_macro_features(session, new_events, released)
+                session.commit()
+            with span("calendar"):
+                get_macro_calendar(session)
+        get_event_bus().publish(MACRO_COMMITTED, new_ids)
+        _update_health("macro", "success", details=_details(run))
+        observe_job("macro", "success", started)
     except Exception as exc:
         logger.exception("Macro ingestion failed")
-        _update_health("macro", "failed", str(exc))
+        _update_health("macro", "failed", str(exc), details=_details(run))
+        observe_job("macro", "failed", started)
+    finally:
+        record_rows("macro", inserted=inserted, updated=updated, skipped=skipped)
+
+
+def _invalidate_macro_features(session, events: list[MacroEvent], released: list[MacroEvent] = ()) -> None:
+    """Drop features touched by high-impact USD changes.
+
+    New events change `minutes_to_high_impact_usd` back to the previous event, and released actuals change
+    `usd_surprise_z_24h` from their own time.
+    """
+    times = [event.time for event in events if event.currency == "USD" and event.impact == "high"]
+    starts = [event.time for event in released if event.currency == "USD" and event.impact == "high"]
+    if times:
+        starts.append(
+            session.execute(
+                select(func.max(MacroEvent.time))
+                .where(MacroEvent.currency == "USD")
+                .where(MacroEvent.impact == "high")
+                .where(MacroEvent.time < min(times))
+            ).scalar()
+        )
+    if not starts:
+        return
+    invalidate_features(session, None if None in starts else min(starts))
 
 
-def run_prediction() -> None:
+def run_prediction(gated: bool = True) -> None:
+    """Score the latest bars. Ungated runs are the ones triggered by a price commit."""
+    started = time.perf_counter()
+    run = None
     try:
-        if not allow_run("predict", get_settings().predict_seconds):
+        if gated and not allow_run("predict", get_settings().predict_seconds):
+            observe_job("predict", "skipped", started)
             return
-        predict_and_store()
-        _update_health("predict", "success")
+        with _job_trace("predict") as run:
+            with _prices_batch_lock:
+                result = predict_and_store()
+        _update_health("predict", "success", details=_details(run))
+        observe_job("predict", "success", started)
+        record_rows("predict", inserted=len(result.get("signals", [])))
     except Exception as exc:
         logger.exception("Prediction failed")
-        _update_health("predict", "failed", str(exc))
+        _update_health("predict", "failed", str(exc), details=_details(run))
+        observe_job("predict", "failed", started)
+
+
+def request_prediction() -> None:
+    """Ask for a prediction as soon as the predict executor is free."""
+    global _prediction_requested_at
+    if _prediction_requested_at is None:
+        _prediction_requested_at = time.perf_counter()
+    _prediction_requested.set()
+    if scheduler.running:
+        scheduler.add_job(
+            _drain_prediction_requests,
+            id="predict-trigger",
+            executor="predict",
+            replace_existing=True,
+            max_instances=2,
+            misfire_grace_time=None,
+        )
+
+
+def _drain_prediction_requests() -> None:
+    global _prediction_requested_at
+    # A second instance may start while the first is finishing; whichever holds the lock
+    # re-checks the flag after releasing it, so no request is lost.
+    while _prediction_requested.is_set():
+        if not _prediction_lock.acquire(blocking=False):
+            return
+        try:
+            while _prediction_requested.is_set():
+                _prediction_requested.clear()
+                requested_at, _prediction_requested_at = _prediction_requested_at, None
+                run_prediction(gated=False)
+                if requested_at is not None:
+                    SIGNAL_DELAY.observe(time.perf_counter() - requested_at)
+        finally:
+            _prediction_lock.release()
+
+
+def _on_bars_committed(event: Event) -> None:
+    request_prediction()
+
+
+def _scheduled_prediction() -> None:
+    """Fallback cadence for periods without new bars, e.g. to pick up fresh news."""
+    with _prediction_lock:
+        run_prediction()
+
+
+def _on_job_missed(event: JobEvent) -> None:
+    reason = "max_instances" if event.code == EVENT_JOB_MAX_INSTANCES else "misfire"
+    if event.job_id == "predict-trigger":
+        return  # folded into the running drain loop
+    logger.warning("Job %s skipped (%s): previous run still in progress or scheduler overloaded", event.job_id, reason)
+    JOB_MISSED.labels(job=event.job_id, reason=reason).inc()
 
 
 def start_scheduler() -> None:
     settings = get_settings()
     if scheduler.running:
         return
-    scheduler.add_job(ingest_prices, "interval", seconds=settings.poll_prices_seconds, id="prices")
-    scheduler.add_job(ingest_news, "interval", seconds=settings.poll_news_seconds, id="news")
-    scheduler.add_job(ingest_macro, "interval", seconds=settings.poll_macro_seconds, id="macro")
-    scheduler.add_job(run_prediction, "interval", seconds=settings.predict_seconds, id="predict")
+    scheduler.configure(
+        executors={
+            "default": ThreadPoolExecutor(settings.scheduler_ingest_workers),
+            "predict": ThreadPoolExecutor(1),
+        },
+        job_defaults={
+            "coalesce": True,
+            "max_instances": 1,
+            "misfire_grace_time": settings.scheduler_misfire_grace_seconds,
+        },
+    )
+    scheduler.add_listener(_on_job_missed, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+    get_event_bus().start_consumer("prediction", [BARS_COMMITTED], _on_bars_committed)
+    start_alerting()
+    jitter = settings.scheduler_jitter_seconds or None
+    scheduler.add_job(ingest_prices, "interval", seconds=settings.poll_prices_seconds, jitter=jitter, id="prices")
+    scheduler.add_job(ingest_news, "interval", seconds=settings.poll_news_seconds, jitter=jitter, id="news")
+    scheduler.add_job(ingest_macro, "interval", seconds=settings.poll_macro_seconds, jitter=jitter, id="macro")
+    scheduler.add_job(
+        _scheduled_prediction,
+        "interval",
+        seconds=settings.predict_seconds,
+        jitter=jitter,
+        executor="predict",
+        id="predict",
+    )
     scheduler.start()
 
 
 def _aggregate_timeframes(session, instrument_id: int) -> None:
-    rows = (
-        session.query(TickOrBar)
-        .filter(TickOrBar.instrument_id == instrument_id, TickOrBar.timeframe == "1m")
-        .order_by(TickOrBar.ts)
-        .all()
-    )
+    """Upsert 5m/1h/1d bars from 1m bars.
+
+    Only bars from the newest stored bucket of each timeframe onward can change (new 1m bars
+    always come after the stored ones), so just that tail of the 1m history is read.
+    """
+    latest = {
+        timeframe: session.execute(
+            select(func.max(TickOrBar.ts))
+            .where(TickOrBar.instrument_id == instrument_id)
+            .where(TickOrBar.timeframe == timeframe)
+        ).scalar()
+        for timeframe in AGGREGATE_RULES
+    }
+    query = session.query(TickOrBar).filter(TickOrBar.instrument_id == instrument_id, TickOrBar.timeframe == "1m")
+    if None not in latest.values():
+        query = query.filter(TickOrBar.ts >= min(latest.values()))
+    rows = query.order_by(TickOrBar.ts).all()
     if not rows:
         return
     df = pd.DataFrame(
@@ -273,8 +589,10 @@ def _aggregate_timeframes(session, instrument_id: int) -> None:
         ]
     )
     df = df.set_index("ts")
-    for timeframe, rule in {"5m": "5min", "1h": "1H", "1d": "1D"}.items():
-        agg = df.resample(rule).agg(
+    for timeframe, rule in AGGREGATE_RULES.items():
+        since = latest[timeframe]
+        minute = df if since is None else df[df.index >= since]
+        agg = minute.resample(rule).agg(
             {
                 "open": "first",
                 "high": "max",
@@ -283,28 +601,23 @@ def _aggregate_timeframes(session, instrument_id: int) -> None:
                 "volume": "sum",
             }
         ).dropna()
-        for ts, row in agg.iterrows():
-            exists = (
-                session.query(TickOrBar)
-                .filter(
+        # Buckets are upserted: the newest one keeps changing until it closes.
+        existing = {}
+        if since is not None:
+            existing = {
+                pd.Timestamp(bar.ts): bar
+                for bar in session.query(TickOrBar).filter(
                     TickOrBar.instrument_id == instrument_id,
                     TickOrBar.timeframe == timeframe,
-                    TickOrBar.ts == ts.to_pydatetime(),
-                )
-                .first()
-            )
-            if exists:
-                continue
-            session.add(
-                TickOrBar(
-                    instrument_id=instrument_id,
-                    timeframe=timeframe,
-                    ts=ts.to_pydatetime(),
-                    open=float(row["open"]),
-                    high=float(row["high"]),
-                    low=float(row["low"]),
-                    close=float(row["close"]),
-                    volume=float(row["volume"]),
+                    TickOrBar.ts >= since,
                 )
-            )
+            }
+        for ts, row in agg.iterrows():
+            values = {name: float(row[name]) for name in ("open", "high", "low", "close", "volume")}
+            bar = existing.get(ts)
+            if bar is None:
+                session.add(TickOrBar(instrument_id=instrument_id, timeframe=timeframe, ts=ts.to_pydatetime(), **values))
+            elif any(getattr(bar, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(bar, name, value)
         session.commit()
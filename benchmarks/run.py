@@ -0,0 +1,273 @@
+"""Time the ingestion, feature, analysis, training, inference and API hot paths.
+
+Usage:
+    python -m benchmarks.run --sizes micro,small
+    python -m benchmarks.run --sizes small --baseline benchmarks/results/<previous>.json
+
+Each size runs against a fresh SQLite database. Results are written as JSON to
+benchmarks/results/ so runs from different releases can be compared.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_bars, make_macro, make_news
+
+SIZES: dict[str, dict[str, Any]] = {
+    "micro": {"instruments": 1, "days": 1, "news": 200},
+    "small": {"instruments": 2, "days": 7, "news": 1000},
+    "medium": {"instruments": 6, "days": 30, "news": 5000},
+    "large": {"instruments": 6, "days": 90, "news": 20000},
+}
+STAGES = [
+    "ingest_prices",
+    "aggregate_timeframes",
+    "ingest_news",
+    "ingest_macro",
+    "compute_features",
+    "add_news_features",
+    "add_macro_features",
+    "analyze_news",
+    "train_model",
+    "predict_and_store",
+    "score_single_row",
+    "api_prices",
+    "api_prices_arrow",
+    "api_news",
+    "api_signals",
+    "api_indicators",
+    "api_dashboard_snapshot",
+]
+RESULTS_DIR = Path(__file__).parent / "results"
+REGRESSION_RATIO = 1.2
+
+
+def run_size(name: str, stages: list[str] | None = None, repeat: int = 3) -> list[dict[str, Any]]:
+    params = SIZES[name]
+    wanted = set(stages or STAGES)
+    bars = make_bars(params["instruments"], params["days"])
+    news = make_news(params["news"], params["days"])
+    macro = make_macro(params["days"])
+    results: list[dict[str, Any]] = []
+
+    def record(stage: str, rows: int, fn: Callable[[], Any], runs: int = 1) -> Any:
+        if stage not in wanted:
+            return None
+        timings = []
+        value = None
+        for _ in range(runs):
+            started = time.perf_counter()
+            value = fn()
+            timings.append(time.perf_counter() - started)
+        seconds = min(timings)
+        results.append(
+            {
+                "size": name,
+                "stage": stage,
+                "rows": rows,
+                "seconds": round(seconds, 6),
+                "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+            }
+        )
+        print(f"{name:>7} {stage:<24} rows={rows:<8} {seconds * 1000:10.2f} ms", flush=True)
+        return value
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        modules = _load_app(f"sqlite+pysqlite:///{tmpdir}/bench.db", f"{tmpdir}/models")
+        scheduler, engineering, analysis = modules["scheduler"], modules["engineering"], modules["news_analysis"]
+        _install_providers(scheduler, bars, news, macro)
+
+        record("ingest_prices", len(bars), scheduler.ingest_prices)
+        with modules["session"].JobSessionLocal() as session:
+            record(
+                "aggregate_timeframes",
+                len(bars),
+                lambda: [scheduler._aggregate_timeframes(session, instrument_id) for instrument_id in _instrument_ids(modules)],
+            )
+        record("ingest_news", len(news), scheduler.ingest_news)
+        record("ingest_macro", len(macro), scheduler.ingest_macro)
+
+        frame = bars[bars["symbol"] == "XAUUSD"][["ts", "open", "high", "low", "close", "volume"]].reset_index(drop=True)
+        news_df = news.assign(sentiment=0.1)[["published_at", "sentiment"]]
+        feats = record("compute_features", len(frame), lambda: engineering.compute_features(frame), repeat)
+        if feats is None:
+            feats = engineering.compute_features(frame)
+        record("add_news_features", len(feats), lambda: engineering.add_news_features(feats, news_df), repeat)
+        record("add_macro_features", len(feats), lambda: engineering.add_macro_features(feats, macro), repeat)
+        analyzer = analysis.RuleBasedNewsAnalyzer()
+        record(
+            "analyze_news",
+            len(news),
+            lambda: [analyzer.analyze(title=row.title, summary=row.summary) for row in news.itertuples()],
+            repeat,
+        )
+        record("train_model", len(bars), modules["train"].train_model)
+        record("predict_and_store", len(frame), modules["predict"].predict_and_store, repeat)
+        trained = modules["predict"].latest_model()
+        if trained:
+            _, payload = trained
+            compiled = next(iter(payload["models"].values()))["compiled"]
+            row = np.zeros((1, len(payload["features"])))
+            # Per-signal scoring cost: rows is the number of single-row calls timed together.
+            record("score_single_row", 1000, lambda: [compiled.predict_proba(row) for _ in range(1000)], repeat)
+
+        client = _api_client(modules)
+        limit = min(5000, len(frame))
+        api_calls = {
+            "api_prices": ("/prices", {"instrument_id": 1, "timeframe": "1m", "limit": limit}, {}),
+            "api_prices_arrow": (
+                "/prices",
+                {"instrument_id": 1, "timeframe": "1m", "limit": limit},
+                {"Accept": "application/vnd.apache.arrow.stream"},
+            ),
+            "api_news": ("/news", {"limit": 200}, {}),
+            "api_signals": ("/signals", {"limit": 200}, {}),
+            "api_indicators": ("/indicators", {"instrument_id": 1, "timeframe": "1m", "limit": limit}, {}),
+            "api_dashboard_snapshot": (
+                "/dashboard/snapshot",
+                {"instrument_id": 1, "timeframe": "1m", "limit": 500},
+                {},
+            ),
+        }
+        for stage, (path, query, headers) in api_calls.items():
+            record(stage, query.get("limit", 0), lambda: client.get(path, params=query, headers=headers), repeat)
+    return results
+
+
+def _load_app(database_url: str, model_dir: str) -> dict[str, Any]:
+    """Point the app at a throwaway database, reloading modules that bind sessions at import."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["MODEL_DIR"] = model_dir
+    os.environ["PROFILE_JOBS"] = ""
+    import app.core.config as config
+
+    config.get_settings.cache_clear()
+    modules: dict[str, Any] = {"config": importlib.reload(config)}
+    for key, module_name in [
+        ("session", "app.db.session"),
+        ("init_db", "app.db.init_db"),
+        ("engineering", "app.features.engineering"),
+        ("news_analysis", "app.analytics.news_analysis"),
+        ("predict", "app.ml.predict"),
+        ("train", "app.ml.train"),
+        ("scheduler", "app.services.scheduler"),
+        ("routes", "app.api.routes"),
+    ]:
+        modules[key] = importlib.reload(importlib.import_module(module_name))
+    modules["init_db"].init_db()
+    return modules
+
+
+def _install_providers(scheduler, bars: pd.DataFrame, news: pd.DataFrame, macro: pd.DataFrame) -> None:
+    from app.ingestion.base import MacroProvider, NewsProvider, PriceProvider
+
+    bars_by_symbol = {symbol: group.to_dict(orient="records") for symbol, group in bars.groupby("symbol")}
+
+    class FramePriceProvider(PriceProvider):
+        def fetch_bars(self, symbol, timeframe, start):
+            return [bar for bar in bars_by_symbol.get(symbol, []) if start is None or bar["ts"] > start]
+
+    class FrameNewsProvider(NewsProvider):
+        def fetch_news(self, since):
+            return news.to_dict(orient="records")
+
+    class FrameMacroProvider(MacroProvider):
+        def fetch_events(self, since):
+            return macro.to_dict(orient="records")
+
+    scheduler._get_price_provider = lambda settings: FramePriceProvider()
+    scheduler._get_news_provider = lambda settings: FrameNewsProvider()
+    scheduler._get_macro_provider = lambda settings: FrameMacroProvider()
+    scheduler.allow_run = lambda name, min_interval_seconds: True
+
+
+def _instrument_ids(modules: dict[str, Any]) -> list[int]:
+    from sqlalchemy import select
+
+    from app.db.models import Instrument
+
+    with modules["session"].JobSessionLocal() as session:
+        return list(session.execute(select(Instrument.id)).scalars())
+
+
+def _api_client(modules: dict[str, Any]):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    api = FastAPI()
+    api.include_router(modules["routes"].router)
+    return TestClient(api)
+
+
+def _metadata() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+    }
+
+
+def compare(current: list[dict[str, Any]], baseline_path: Path) -> list[dict[str, Any]]:
+    baseline = {(row["size"], row["stage"]): row for row in json.loads(baseline_path.read_text())["results"]}
+    rows = []
+    for row in current:
+        previous = baseline.get((row["size"], row["stage"]))
+        if previous is None or not previous["seconds"]:
+            continue
+        ratio = row["seconds"] / previous["seconds"]
+        rows.append({**row, "baseline_seconds": previous["seconds"], "ratio": round(ratio, 3)})
+        flag = "  REGRESSION" if ratio > REGRESSION_RATIO else ""
+        print(f"{row['size']:>7} {row['stage']:<24} {previous['seconds']:.4f}s -> {row['seconds']:.4f}s x{ratio:.2f}{flag}")
+    return rows
+
+
+def main(argv: list[str] | None = None) -> Path:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="micro,small", help=f"comma-separated presets from {', '.join(SIZES)}")
+    parser.add_argument("--stages", default="", help="comma-separated subset of stages (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="best-of repeats for side-effect-free stages")
+    parser.add_argument("--output", type=Path, default=None, help="result file (default: benchmarks/results/<utc>.json)")
+    parser.add_argument("--baseline", type=Path, default=None, help="earlier result file to compare against")
+    args = parser.parse_args(argv)
+    # Convergence and deprecation chatter from the model stages drowns out the timings.
+    warnings.simplefilter("ignore")
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()] or None
+    results = []
+    for size in (size.strip() for size in args.sizes.split(",") if size.strip()):
+        results.extend(run_size(size, stages, args.repeat))
+    payload = {"meta": _metadata(), "sizes": {name: SIZES[name] for name in {row["size"] for row in results}}, "results": results}
+    if args.baseline:
+        payload["comparison"] = compare(results, args.baseline)
+    output = args.output or RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, indent=2))
+    print(f"Results written to {output}")
+    return output
+
+
+if __name__ == "__main__":
+    main()
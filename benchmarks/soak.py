@@ -0,0 +1,142 @@
+"""Run the ingest -> predict pipeline against the simulation providers for a while.
+
+Usage:
+    python -m benchmarks.soak --minutes 5 --instruments 20 --speed 120 --subscribers 50
+
+Prices, news and macro come from `app.ingestion.simulation` (no network), the
+scheduler jobs run back to back on a throwaway SQLite database (or
+`--database-url`), and `--subscribers` event-bus groups follow NEWS_COMMITTED
+to measure fan-out lag. The report gives sustained rows/s per job and p50/p95
+job durations.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import warnings
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from benchmarks.run import _load_app
+
+JOBS = ["ingest_prices", "ingest_news", "ingest_macro", "run_prediction"]
+
+
+def soak(
+    minutes: float, instruments: int, subscribers: int, database_url: str | None = None
+) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        modules = _load_app(database_url or f"sqlite+pysqlite:///{tmpdir}/soak.db", f"{tmpdir}/models")
+        scheduler = modules["scheduler"]
+        scheduler.allow_run = lambda name, min_interval_seconds: True
+        _add_instruments(modules, instruments)
+
+        from app.ingestion.simulation import reset_simulation
+        from app.services.events import NEWS_COMMITTED, get_event_bus, reset_event_bus
+
+        reset_simulation()
+        reset_event_bus()
+        bus = get_event_bus()
+        groups = [f"soak-{index}" for index in range(subscribers)]
+        for group in groups:
+            bus.join(group, [NEWS_COMMITTED])
+
+        counts_before = _row_counts(modules)
+        durations: dict[str, list[float]] = {job: [] for job in JOBS}
+        lags: list[float] = []
+        started = time.perf_counter()
+        deadline = started + minutes * 60
+        while time.perf_counter() < deadline:
+            for job in JOBS:
+                fn = getattr(scheduler, job)
+                job_started = time.perf_counter()
+                fn(gated=False) if job == "run_prediction" else fn()
+                durations[job].append(time.perf_counter() - job_started)
+            for group in groups:
+                events = bus.read(group, "soak", [NEWS_COMMITTED], block_ms=0)
+                received = time.time()
+                lags.extend(received - event.ts.timestamp() for event in events)
+                bus.ack(group, events)
+        elapsed = time.perf_counter() - started
+        counts_after = _row_counts(modules)
+
+    rows = {table: counts_after[table] - counts_before[table] for table in counts_after}
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "instruments": instruments,
+        "subscribers": subscribers,
+        "rows": rows,
+        "rows_per_second": {table: round(count / elapsed, 1) for table, count in rows.items()},
+        "jobs": {job: _percentiles(values) for job, values in durations.items()},
+        "fanout_lag_seconds": _percentiles(lags),
+    }
+
+
+def _add_instruments(modules: dict[str, Any], count: int) -> None:
+    from sqlalchemy import func, select
+
+    from app.db.models import Instrument
+
+    with modules["session"].JobSessionLocal() as session:
+        existing = session.execute(select(func.count(Instrument.id))).scalar_one()
+        for index in range(existing, count):
+            session.add(Instrument(symbol=f"SIM{index:04d}", type="synthetic", pip_value=0.01))
+        session.commit()
+
+
+def _row_counts(modules: dict[str, Any]) -> dict[str, int]:
+    from sqlalchemy import func, select
+
+    from app.db.models import MacroEvent, News, Signal, TickOrBar
+
+    with modules["session"].JobSessionLocal() as session:
+        return {
+            model.__tablename__: session.execute(select(func.count()).select_from(model)).scalar_one()
+            for model in (TickOrBar, News, MacroEvent, Signal)
+        }
+
+
+def _percentiles(values: list[float]) -> dict[str, float | int | None]:
+    if not values:
+        return {"count": 0, "p50": None, "p95": None}
+    array = np.asarray(values)
+    return {
+        "count": len(values),
+        "p50": round(float(np.percentile(array, 50)), 4),
+        "p95": round(float(np.percentile(array, 95)), 4),
+    }
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=5.0, help="wall-clock duration of the run")
+    parser.add_argument("--instruments", type=int, default=10, help="total instruments to simulate")
+    parser.add_argument("--subscribers", type=int, default=10, help="event-bus groups following news")
+    parser.add_argument("--speed", type=float, default=None, help="simulated seconds per wall second")
+    parser.add_argument("--replay", type=Path, default=None, help="price CSV to replay instead of random walks")
+    parser.add_argument("--database-url", default=None, help="database to soak (default: temporary SQLite)")
+    parser.add_argument("--output", type=Path, default=None, help="write the report as JSON")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+
+    for kind in ("PRICE", "NEWS", "MACRO"):
+        os.environ[f"{kind}_PROVIDER"] = "simulation"
+    if args.speed is not None:
+        os.environ["SIMULATION_SPEED"] = str(args.speed)
+    if args.replay is not None:
+        os.environ["SIMULATION_REPLAY_PATH"] = str(args.replay)
+    report = soak(args.minutes, args.instruments, args.subscribers, args.database_url)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Seeded synthetic market data for benchmarks."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+SYMBOLS = ["XAUUSD", "EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD"]
+_BASE_PRICES = {"XAUUSD": 2350.0, "EURUSD": 1.09, "GBPUSD": 1.27, "USDJPY": 148.0, "AUDUSD": 0.66, "USDCAD": 1.35}
+_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+_HEADLINES = [
+    ("US CPI beats forecasts as core prices stay firm", "Inflation pressures complicate the FOMC rate path."),
+    ("ECB holds policy rate, signals patience", "Guidance points to data dependence on wage growth."),
+    ("Gold climbs on geopolitical tension", "Safe-haven demand lifts bullion as conflict headlines spread."),
+    ("Dollar slips after weak retail sales", "Growth concerns weigh on yields and the greenback."),
+    ("BoJ minutes show debate over yield curve control", "Some members favour an earlier exit from easing."),
+    ("Oil rallies as supply cuts extend", "Crude gains feed into inflation expectations."),
+    ("Risk-on mood lifts equities and commodity FX", "Stocks rise while volatility drops to multi-month lows."),
+    ("Jobs report surprises to the upside", "NFP strength pushes back expectations of a rate cut."),
+]
+_MACRO_CALENDAR = [
+    ("USD", "high", "Non-Farm Payrolls", 180000.0, 25000.0),
+    ("USD", "high", "CPI m/m", 0.3, 0.1),
+    ("USD", "medium", "ISM Services PMI", 52.0, 1.5),
+    ("EUR", "high", "ECB Rate Decision", 4.0, 0.1),
+    ("GBP", "medium", "GDP q/q", 0.2, 0.2),
+    ("JPY", "medium", "Tankan Index", 12.0, 3.0),
+]
+
+
+def make_bars(n_instruments: int, days: float, seed: int = 7) -> pd.DataFrame:
+    """1m OHLCV random walks for the first `n_instruments` seeded symbols."""
+    rng = np.random.default_rng(seed)
+    periods = int(days * 24 * 60)
+    ts = pd.date_range(_START, periods=periods, freq="min")
+    frames = []
+    for symbol in SYMBOLS[:n_instruments]:
+        base = _BASE_PRICES[symbol]
+        returns = rng.normal(0, 0.0004, periods)
+        close = base * np.exp(np.cumsum(returns))
+        open_ = np.concatenate([[base], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.0002, periods)) * close
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": symbol,
+                    "timeframe": "1m",
+                    "ts": ts,
+                    "open": open_,
+                    "high": np.maximum(open_, close) + spread,
+                    "low": np.minimum(open_, close) - spread,
+                    "close": close,
+                    "volume": rng.integers(100, 5000, periods).astype(float),
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def make_news(count: int, days: float, seed: int = 11) -> pd.DataFrame:
+    """News items spread uniformly over `days`, cycling through canned headlines."""
+    rng = np.random.default_rng(seed)
+    offsets = np.sort(rng.uniform(0, days * 24 * 60, count))
+    published = [_START + pd.Timedelta(minutes=float(offset)) for offset in offsets]
+    picks = rng.integers(0, len(_HEADLINES), count)
+    return pd.DataFrame(
+        {
+            "source": rng.choice(["DemoWire", "MarketDesk", "FXStreet"], count),
+            "published_at": published,
+            "title": [f"{_HEADLINES[pick][0]} ({index})" for index, pick in enumerate(picks)],
+            "summary": [_HEADLINES[pick][1] for pick in picks],
+            "url": [f"https://example.com/bench/{index}" for index in range(count)],
+        }
+    )
+
+
+def make_macro(days: float, events_per_day: int = 4, seed: int = 13) -> pd.DataFrame:
+    """Scheduled macro releases at round hours with actuals scattered around forecasts."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for day in range(int(np.ceil(days))):
+        for slot in range(events_per_day):
+            currency, impact, name, forecast, scale = _MACRO_CALENDAR[rng.integers(0, len(_MACRO_CALENDAR))]
+            rows.append(
+                {
+                    "time": _START + pd.Timedelta(days=day, hours=8 + slot * 2, minutes=30),
+                    "currency": currency,
+                    "impact": impact,
+                    "name": name,
+                    "forecast": forecast,
+                    "previous": forecast + rng.normal(0, scale),
+                    "actual": forecast + rng.normal(0, scale),
+                    "source": "SyntheticCalendar",
+                }
+            )
+    return pd.DataFrame(rows)
@@ -6,10 +6,18 @@ from datetime import datetime
 import pandas as pd
 import plotly.graph_objects as go
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
 import streamlit.components.v1 as components
 
 API_URL = os.getenv("API_URL", "http://api:8000")
+# The snapshot cannot change faster than the quickest ingestion job; the ETag
+# makes refreshing an unchanged snapshot a cheap 304.
+SNAPSHOT_TTL_SECONDS = int(os.getenv("POLL_PRICES_SECONDS", "60"))
+INSTRUMENTS_TTL_SECONDS = 3600
+HISTORY_DAYS = {"Latest rows": None, "1 day": 1, "1 week": 7, "1 month": 30}
+CHART_POINTS = 800
+_ETAG_ENTRIES = 64
 
 st.set_page_config(page_title="NewsTracker", layout="wide")
 
@@ -42,23 +50,55 @@ st.title("NewsTracker: Real-Time Forex News Intelligence")
 st.caption("Signals are probabilistic analytics, not financial advice.")
 
 
+@st.cache_resource
+def http_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_resource
+def etag_store() -> dict:
+    return {}
+
+
 def fetch_json(path: str, params: dict | None = None):
-    response = requests.get(f"{API_URL}{path}", params=params, timeout=10)
+    response = http_session().get(f"{API_URL}{path}", params=params, timeout=10)
     response.raise_for_status()
     return response.json()
 
 
-def _rsi(series: pd.Series, period: int) -> pd.Series:
-    delta = series.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(period).mean()
-    avg_loss = loss.rolling(period).mean()
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
+@st.cache_data(ttl=INSTRUMENTS_TTL_SECONDS)
+def load_instruments() -> list[dict]:
+    return fetch_json("/instruments")
+
+
+@st.cache_data(ttl=SNAPSHOT_TTL_SECONDS, max_entries=_ETAG_ENTRIES)
+def load_snapshot(params: dict) -> dict:
+    store = etag_store()
+    key = tuple(sorted(params.items()))
+    cached = store.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = http_session().get(f"{API_URL}/dashboard/snapshot", params=params, headers=headers, timeout=10)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    response.raise_for_status()
+    payload = response.json()
+    store.pop(key, None)
+    store[key] = (response.headers.get("ETag", ""), payload)
+    while len(store) > _ETAG_ENTRIES:
+        store.pop(next(iter(store)))
+    return payload
+
+
+@st.cache_data(ttl=SNAPSHOT_TTL_SECONDS)
+def load_news_impact(instrument_id: int) -> list[dict]:
+    return fetch_json("/news/impact", {"group_by": "impact_level", "instrument_id": instrument_id})
 
 
-instruments = fetch_json("/instruments")
+instruments = load_instruments()
 instrument_symbols = [item["symbol"] for item in instruments]
 instrument_map = {item["symbol"]: item["id"] for item in instruments}
 
@@ -66,42 +106,54 @@ with st.sidebar:
     st.header("Filters")
     instrument = st.selectbox("Instrument", instrument_symbols, index=0)
     limit = st.slider("Rows", 50, 500, 200)
+    history = st.selectbox("History", list(HISTORY_DAYS), index=0)
     timeframe = st.selectbox("Timeframe", ["1m", "5m", "1h", "1d"], index=0)
     impact_filter = st.selectbox("Impact level", ["all", "high", "medium", "low"], index=0)
     sentiment_filter = st.selectbox("Sentiment", ["all", "bullish", "bearish", "neutral"], index=0)
     fundamental_only = st.toggle("Fundamental only", value=True)
     search_query = st.text_input("Search")
 
-prices = fetch_json(
-    "/prices",
-    {"instrument_id": instrument_map.get(instrument, 1), "timeframe": timeframe, "limit": limit},
-)
-news_params = {
-    "limit": 200,
+snapshot_params = {
+    "instrument_id": instrument_map.get(instrument, 1),
+    "timeframe": timeframe,
+    "limit": limit,
+    "indicator_names": "rsi_14,macd,macd_signal",
+    "news_limit": 200,
     "instrument": instrument,
     "fundamental_only": fundamental_only,
+    "macro_limit": 50,
+    "signals_limit": 5,
 }
+if HISTORY_DAYS[history]:
+    # Hour-aligned so the snapshot cache key only changes once an hour.
+    history_start = pd.Timestamp.now(tz="UTC").floor("h") - pd.Timedelta(days=HISTORY_DAYS[history])
+    snapshot_params["start"] = history_start.isoformat()
+    snapshot_params["points"] = CHART_POINTS
 if impact_filter != "all":
-    news_params["impact"] = impact_filter
+    snapshot_params["impact"] = impact_filter
 if sentiment_filter != "all":
-    news_params["sentiment"] = sentiment_filter
+    snapshot_params["sentiment"] = sentiment_filter
 if search_query:
-    news_params["q"] = search_query
-news = fetch_json("/news", news_params)
-macro = fetch_json("/macro", {"limit": 50})
-signals = fetch_json("/signals", {"limit": 5})
+    snapshot_params["q"] = search_query
+snapshot = load_snapshot(snapshot_params)
+prices = pd.DataFrame(snapshot["prices"])
+indicators = pd.DataFrame(snapshot["indicators"])
+news = snapshot["news"]
+macro = snapshot["macro"]
+signals = snapshot["signals"]
 
 st.subheader("Live Ticker")
 columns = st.columns(4)
 with columns[0]:
     st.markdown("**Latest Price**")
-    if prices:
-        st.write(f"{prices[-1]['close']:.2f}")
+    if not prices.empty:
+        st.write(f"{prices['close'].iloc[-1]:.2f}")
 with columns[1]:
     st.markdown("**Latest Signal**")
     if signals:
         latest_signal = signals[0]
-        st.write(f"{latest_signal['label']} ({latest_signal['confidence']:.2f})")
+        horizon = f"{latest_signal.get('timeframe', '1m')}/{latest_signal.get('horizon_minutes', 60)}m"
+        st.write(f"{latest_signal['label']} ({latest_signal['confidence']:.2f}, {horizon})")
 with columns[2]:
     st.markdown("**Latest News**")
     if news:
@@ -130,11 +182,11 @@ components.html(
                 <div><strong>${{item.title}}</strong></div>
                 <div class="${{impactClass}}">${{item.impact_level.toUpperCase()}}</div>
             </div>
-            <div style="font-size:12px; opacity:0.8;">${{new Date(item.published_at).toUTCString()}} · ${item.source}</div>
+            <div style="font-size:12px; opacity:0.8;">${{new Date(item.published_at).toUTCString()}} · ${{item.source}}</div>
             <div style="margin:6px 0;">${{item.analysis_summary || item.summary}}</div>
-            <div style="font-size:12px;">Assets: ${item.impacted_assets?.join(", ") || ""}</div>
-            <div style="font-size:12px;" class="${{sentimentClass}}">Sentiment: ${item.sentiment_label}</div>
-            <div style="font-size:12px; opacity:0.8;">Why: ${item.rationale || ""}</div>
+            <div style="font-size:12px;">Assets: ${{item.impacted_assets?.join(", ") || ""}}</div>
+            <div style="font-size:12px;" class="${{sentimentClass}}">Sentiment: ${{item.sentiment_label}}</div>
+            <div style="font-size:12px; opacity:0.8;">Why: ${{item.rationale || ""}}</div>
         `;
         feed.prepend(card);
     }}
@@ -147,12 +199,10 @@ components.html(
     height=460,
 )
 
-if prices:
-    df = pd.DataFrame(prices)
+if not prices.empty:
+    df = prices
     df["ts"] = pd.to_datetime(df["ts"])
-    df["rsi_14"] = _rsi(df["close"], 14)
-    df["macd"] = df["close"].ewm(span=12, adjust=False).mean() - df["close"].ewm(span=26, adjust=False).mean()
-    df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
+    indicators["ts"] = pd.to_datetime(indicators["ts"])
 
     st.subheader(f"{instrument} Price Chart with News")
     fig = go.Figure(
@@ -185,29 +235,21 @@ if prices:
 
     st.subheader("RSI & MACD")
     rsi_fig = go.Figure()
-    rsi_fig.add_trace(go.Scatter(x=df["ts"], y=df["rsi_14"], name="RSI 14"))
+    rsi_fig.add_trace(go.Scatter(x=indicators["ts"], y=indicators["rsi_14"], name="RSI 14"))
     rsi_fig.update_layout(yaxis_title="RSI")
     st.plotly_chart(rsi_fig, use_container_width=True)
 
     macd_fig = go.Figure()
-    macd_fig.add_trace(go.Scatter(x=df["ts"], y=df["macd"], name="MACD"))
-    macd_fig.add_trace(go.Scatter(x=df["ts"], y=df["macd_signal"], name="Signal"))
+    macd_fig.add_trace(go.Scatter(x=indicators["ts"], y=indicators["macd"], name="MACD"))
+    macd_fig.add_trace(go.Scatter(x=indicators["ts"], y=indicators["macd_signal"], name="Signal"))
     st.plotly_chart(macd_fig, use_container_width=True)
 
-    if news:
-        news_df = pd.DataFrame(news)
-        news_df["published_at"] = pd.to_datetime(news_df["published_at"])
-        df = df.sort_values("ts")
-        df["return_5"] = df["close"].pct_change(5)
-        merged = pd.merge_asof(
-            news_df.sort_values("published_at"),
-            df[["ts", "return_5"]].rename(columns={"ts": "published_at"}),
-            on="published_at",
-        )
-        merged = merged.dropna()
-        if not merged.empty:
-            corr = merged["return_5"].corr(merged["sentiment"].astype(float))
-            st.metric("News/Price Correlation (5 bars)", f"{corr:.2f}")
+    impact = load_news_impact(instrument_map.get(instrument, 1))
+    if impact:
+        st.subheader("Average Move After News")
+        impact_df = pd.DataFrame(impact).pivot(index="impact_level", columns="horizon_minutes", values="mean_abs_return")
+        impact_df.columns = [f"{minutes}m" for minutes in impact_df.columns]
+        st.dataframe((impact_df * 100).round(3))
 
 st.subheader("Latest News")
 for item in news[:20]:
@@ -0,0 +1,77 @@
+import importlib
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from app.services.events import NEWS_COMMITTED, SIGNAL_CREATED, Event
+
+
+def test_alert_rules_dedupe_and_throttle():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.init_db as init_db
+        import app.db.models as models
+        import app.services.alerts as alerts
+
+        importlib.reload(init_db)
+        init_db.init_db()
+        now = datetime.now(timezone.utc)
+        with session.JobSessionLocal() as db:
+            gold = db.query(models.Instrument).filter_by(symbol="XAUUSD").one()
+            labels = [("Bullish", 0.55), ("Bearish", 0.8), ("Bearish", 0.9)]
+            for index, (label, confidence) in enumerate(labels):
+                db.add(
+                    models.Signal(
+                        instrument_id=gold.id,
+                        ts=now + timedelta(minutes=index),
+                        label=label,
+                        confidence=confidence,
+                        explanation_json={},
+                        model_version="test",
+                    )
+                )
+            db.add_all(
+                [
+                    models.News(source="wire", published_at=now, title="Fed hikes", url="u1", impact_level="high", impacted_assets=["XAUUSD"]),
+                    models.News(source="wire", published_at=now, title="BoJ", url="u2", impact_level="high", impacted_assets=["USDJPY"]),
+                ]
+            )
+            db.commit()
+
+        sent = []
+        engine = alerts.AlertEngine(
+            [
+                alerts.ConfidenceRule(0.65, throttle_seconds=3600),
+                alerts.LabelFlipRule(),
+                alerts.HighImpactNewsRule(symbols=["XAUUSD"]),
+            ],
+            sent.extend,
+            session_factory=session.JobSessionLocal,
+        )
+        engine.handle(Event(type=SIGNAL_CREATED, ids=[1]))
+        second = engine.handle(Event(type=SIGNAL_CREATED, ids=[2]))
+        assert sorted(alert.rule for alert in second) == ["confidence", "label_flip"]
+        # Redelivery of the same signal is deduped; a new confident signal is throttled.
+        assert engine.handle(Event(type=SIGNAL_CREATED, ids=[2])) == []
+        assert engine.handle(Event(type=SIGNAL_CREATED, ids=[3])) == []
+        news = engine.handle(Event(type=NEWS_COMMITTED, ids=[1, 2]))
+        assert [alert.payload["news_id"] for alert in news] == [1]
+        assert len(sent) == 3
+
+
+def test_dispatcher_batches_to_file_sink(tmp_path):
+    from app.services.alerts import Alert, AlertDispatcher, FileSink
+
+    path = tmp_path / "alerts.jsonl"
+    dispatcher = AlertDispatcher([FileSink(path)], batch_size=10, flush_seconds=0.05)
+    dispatcher.start()
+    dispatcher.submit([Alert(rule="confidence", symbol="XAUUSD", message=f"m{i}", payload={"i": i}) for i in range(3)])
+    dispatcher.stop()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["payload"]["i"] for line in lines] == [0, 1, 2]
@@ -1,10 +1,11 @@
 import importlib
 import os
 import tempfile
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+import pytest
 
 
 def test_health_endpoint():
@@ -40,3 +41,505 @@ def test_health_endpoint():
         payload = response.json()
         assert payload["status"] == "ok"
         assert payload["jobs"][0]["job_name"] == "prices"
+
+
+def test_prices_columnar_formats():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_url = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        os.environ["DATABASE_URL"] = db_url
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.models as models
+        import app.db.init_db as init_db
+        import app.api.routes as routes
+
+        importlib.reload(init_db)
+        importlib.reload(routes)
+        init_db.init_db()
+        with session.SessionLocal() as db:
+            instrument = db.query(models.Instrument).first()
+            for minute in range(3):
+                db.add(
+                    models.TickOrBar(
+                        instrument_id=instrument.id,
+                        timeframe="1m",
+                        ts=datetime(2024, 1, 1, 0, minute, tzinfo=timezone.utc),
+                        open=1.0 + minute,
+                        high=2.0 + minute,
+                        low=0.5 + minute,
+                        close=1.5 + minute,
+                        volume=10.0,
+                    )
+                )
+            db.commit()
+            instrument_id = instrument.id
+        app = FastAPI()
+        app.include_router(routes.router)
+        client = TestClient(app)
+        params = {"instrument_id": instrument_id, "timeframe": "1m"}
+
+        rows = client.get("/prices", params=params).json()
+        columns = client.get("/prices", params={**params, "format": "columns"}).json()
+        assert columns["close"] == [row["close"] for row in rows] == [1.5, 2.5, 3.5]
+        assert len(columns["ts"]) == 3
+
+        response = client.get("/prices", params=params, headers={"Accept": "application/vnd.apache.arrow.stream"})
+        assert response.headers["content-type"].startswith("application/vnd.apache.arrow.stream")
+        import pyarrow as pa
+
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.column("close").to_pylist() == [1.5, 2.5, 3.5]
+
+
+def test_indicators_endpoint_refreshes_on_new_bars():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_url = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        os.environ["DATABASE_URL"] = db_url
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.models as models
+        import app.db.init_db as init_db
+        import app.api.routes as routes
+
+        importlib.reload(init_db)
+        importlib.reload(routes)
+        init_db.init_db()
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        with session.SessionLocal() as db:
+            instrument_id = db.query(models.Instrument).first().id
+            for minute in range(120):
+                price = 100 + (minute % 7) - minute * 0.05
+                db.add(
+                    models.TickOrBar(
+                        instrument_id=instrument_id,
+                        timeframe="1m",
+                        ts=start + timedelta(minutes=minute),
+                        open=price,
+                        high=price + 0.5,
+                        low=price - 0.5,
+                        close=price + 0.1,
+                        volume=10.0,
+                    )
+                )
+            db.commit()
+        app = FastAPI()
+        app.include_router(routes.router)
+        client = TestClient(app)
+        params = {"instrument_id": instrument_id, "timeframe": "1m", "limit": 20, "names": "rsi_14,macd"}
+
+        first = client.get("/indicators", params=params).json()
+        assert len(first["ts"]) == 20
+        assert set(first) == {"ts", "rsi_14", "macd"}
+        assert client.get("/indicators", params={**params, "names": "bogus"}).status_code == 400
+
+        with session.SessionLocal() as db:
+            db.add(
+                models.TickOrBar(
+                    instrument_id=instrument_id,
+                    timeframe="1m",
+                    ts=start + timedelta(minutes=120),
+                    open=200,
+                    high=201,
+                    low=199,
+                    close=200,
+                    volume=10.0,
+                )
+            )
+            db.commit()
+        second = client.get("/indicators", params=params).json()
+        assert second["ts"][:-1] == first["ts"][1:]
+        assert second["macd"][-1] > first["macd"][-1]
+
+        # The open bar is rewritten in place (same ts) after the feature store caught up with it.
+        from app.features.store import update_features
+        from app.services.indicators import clear_indicator_cache
+
+        with session.SessionLocal() as db:
+            update_features(db, instrument_id, "1m")
+            db.commit()
+        assert client.get("/indicators", params=params).json() == second
+        with session.SessionLocal() as db:
+            bar = db.query(models.TickOrBar).filter(models.TickOrBar.ts == start + timedelta(minutes=120)).one()
+            bar.close = 500.0
+            db.commit()
+        rewritten = client.get("/indicators", params=params).json()
+        assert rewritten["ts"] == second["ts"]
+        assert rewritten["macd"][-1] > second["macd"][-1]
+        clear_indicator_cache()
+        assert client.get("/indicators", params=params).json() == rewritten
+
+
+def test_dashboard_snapshot_etag():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_url = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        os.environ["DATABASE_URL"] = db_url
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.models as models
+        import app.db.init_db as init_db
+        import app.api.routes as routes
+
+        importlib.reload(init_db)
+        importlib.reload(routes)
+        init_db.init_db()
+        app = FastAPI()
+        app.include_router(routes.router)
+        client = TestClient(app)
+        params = {"instrument_id": 1, "timeframe": "1m", "limit": 50}
+
+        first = client.get("/dashboard/snapshot", params=params)
+        assert first.status_code == 200
+        assert set(first.json()) == {"instruments", "prices", "indicators", "news", "macro", "signals"}
+        etag = first.headers["etag"]
+        assert client.get("/dashboard/snapshot", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+        with session.SessionLocal() as db:
+            db.add(
+                models.News(
+                    source="DemoWire",
+                    published_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                    title="Gold steadies",
+                    url="https://example.com/gold",
+                )
+            )
+            db.commit()
+        refreshed = client.get("/dashboard/snapshot", params=params, headers={"If-None-Match": etag})
+        assert refreshed.status_code == 200
+        assert refreshed.headers["etag"] != etag
+        assert refreshed.json()["news"][0]["title"] == "Gold steadies"
+
+        # In-place edits must change the ETag too: re-analyzed news, revised actuals, a rewritten open bar.
+        with session.SessionLocal() as db:
+            when = datetime(2024, 1, 1, tzinfo=timezone.utc)
+            db.add(models.MacroEvent(time=when, currency="USD", impact="high", name="CPI", source="test"))
+            db.add(
+                models.TickOrBar(instrument_id=1, timeframe="1m", ts=when, open=1.0, high=1.0, low=1.0, close=1.0)
+            )
+            db.commit()
+        etag = client.get("/dashboard/snapshot", params=params).headers["etag"]
+        edits = [
+            (models.News, "sentiment", 0.7),
+            (models.MacroEvent, "actual", 3.1),
+            (models.MacroEvent, "actual", 3.2),
+            (models.TickOrBar, "close", 1.5),
+        ]
+        for model, column, value in edits:
+            with session.SessionLocal() as db:
+                setattr(db.query(model).one(), column, value)
+                db.commit()
+            response = client.get("/dashboard/snapshot", params=params, headers={"If-None-Match": etag})
+            assert response.status_code == 200, (model.__name__, column, value)
+            etag = response.headers["etag"]
+
+
+def test_db_pool_metrics_endpoint():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.init_db as init_db
+        import app.api.routes as routes
+
+        importlib.reload(routes)
+        init_db.init_db()
+        app = FastAPI()
+        app.include_router(routes.router)
+        client = TestClient(app)
+        client.get("/instruments")
+        pools = {pool["name"]: pool for pool in client.get("/metrics/db").json()["pools"]}
+        assert set(pools) == {"api", "jobs"}
+        assert pools["api"]["pool_class"] == "InstrumentedQueuePool"
+        assert pools["api"]["checkouts"] >= 1
+        assert pools["api"]["queries"] >= 1
+        assert pools["api"]["checked_out"] == 0
+
+
+def test_prometheus_metrics_endpoint():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.init_db as init_db
+        import app.api.routes as routes
+        from app.core.metrics import metrics_middleware
+
+        importlib.reload(routes)
+        init_db.init_db()
+        app = FastAPI()
+        app.middleware("http")(metrics_middleware)
+        app.include_router(routes.router)
+        client = TestClient(app)
+        client.get("/instruments")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        body = response.text
+        assert 'newstracker_http_request_duration_seconds_count{method="GET",route="/instruments",status="200"}' in body
+        assert 'newstracker_db_pool_checked_out{pool="api"}' in body
+        assert "newstracker_job_duration_seconds" in body
+
+
+def test_signals_filter_by_timeframe_and_horizon():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.models as models
+        import app.db.init_db as init_db
+        import app.api.routes as routes
+
+        importlib.reload(init_db)
+        importlib.reload(routes)
+        init_db.init_db()
+        now = datetime.now(timezone.utc)
+        with session.SessionLocal() as db:
+            for timeframe, horizon in [("1m", 15), ("1m", 60), ("5m", 60)]:
+                db.add(
+                    models.Signal(
+                        instrument_id=1,
+                        ts=now,
+                        timeframe=timeframe,
+                        horizon_minutes=horizon,
+                        label="Bullish",
+                        confidence=0.7,
+                        explanation_json={},
+                        model_version="test",
+                    )
+                )
+            db.commit()
+        app = FastAPI()
+        app.include_router(routes.router)
+        client = TestClient(app)
+        assert len(client.get("/signals").json()) == 3
+        rows = client.get("/signals", params={"horizon_minutes": 60, "timeframe": "5m"}).json()
+        assert [(row["timeframe"], row["horizon_minutes"]) for row in rows] == [("5m", 60)]
+
+
+def test_signal_history_filters_buckets_and_pages():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.models as models
+        import app.db.init_db as init_db
+        import app.api.routes as routes
+
+        importlib.reload(init_db)
+        importlib.reload(routes)
+        init_db.init_db()
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        with session.SessionLocal() as db:
+            for minute in range(120):
+                for instrument_id, horizon in [(1, 15), (1, 60), (2, 60)]:
+                    db.add(
+                        models.Signal(
+                            instrument_id=instrument_id,
+                            ts=start + timedelta(minutes=minute),
+                            timeframe="1m",
+                            horizon_minutes=horizon,
+                            label=["Bullish", "Bearish", "Neutral"][minute % 3],
+                            confidence=0.5 + (minute % 2) * 0.2,
+                            explanation_json={},
+                            model_version="v2" if minute >= 60 else "v1",
+                        )
+                    )
+            db.commit()
+        app = FastAPI()
+        app.include_router(routes.router)
+        client = TestClient(app)
+
+        params = {"instrument_id": 1, "horizon_minutes": 60, "limit": 50}
+        first = client.get("/signals", params=params)
+        second = client.get("/signals", params={**params, "cursor": first.headers["X-Next-Cursor"]})
+        third = client.get("/signals", params={**params, "cursor": second.headers["X-Next-Cursor"]})
+        pages = first.json() + second.json() + third.json()
+        assert len(pages) == 120 and "X-Next-Cursor" not in third.headers
+        assert [row["ts"] for row in pages] == sorted((row["ts"] for row in pages), reverse=True)
+        assert len({row["ts"] for row in pages}) == 120
+
+        ranged = client.get(
+            "/signals",
+            params={**params, "model_version": "v1", "label": "Bullish", "start": "2024-01-01T00:30:00Z", "limit": 500},
+        ).json()
+        assert len(ranged) == 10 and {row["model_version"] for row in ranged} == {"v1"}
+
+        buckets = client.get("/signals", params={"instrument_id": 1, "bucket_minutes": 60}).json()
+        assert [(row["ts"][:13], row["horizon_minutes"]) for row in buckets] == [
+            ("2024-01-01T01", 15),
+            ("2024-01-01T01", 60),
+            ("2024-01-01T00", 15),
+            ("2024-01-01T00", 60),
+        ]
+        assert all(row["signals"] == 60 and row["bullish"] == row["bearish"] == row["neutral"] == 20 for row in buckets)
+        assert abs(buckets[0]["avg_confidence"] - 0.6) < 1e-9
+
+        paged = []
+        cursor = None
+        while True:
+            response = client.get(
+                "/signals", params={"bucket_minutes": 30, "limit": 3, **({"cursor": cursor} if cursor else {})}
+            )
+            paged += response.json()
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert len(paged) == 8 and sum(row["signals"] for row in paged) == 360
+        assert client.get("/signals", params={"bucket_minutes": 30, "cursor": first.headers["X-Next-Cursor"]}).status_code == 400
+
+
+def test_price_ranges_are_downsampled_to_the_point_budget():
+    import numpy as np
+    import pandas as pd
+
+    from app.analytics.downsample import lttb_indices
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.models as models
+        import app.db.init_db as init_db
+        import app.api.routes as routes
+
+        importlib.reload(init_db)
+        importlib.reload(routes)
+        init_db.init_db()
+        rng = np.random.default_rng(0)
+        index = pd.date_range("2024-01-01", periods=3 * 1440, freq="1min", tz="UTC")
+        close = 2000 + rng.normal(0, 1, len(index)).cumsum()
+        minute = pd.DataFrame(
+            {"open": close, "high": close + 0.5, "low": close - 0.5, "close": close, "volume": 1.0}, index=index
+        )
+        five = minute.resample("5min").agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+        with session.SessionLocal() as db:
+            for timeframe, frame in (("1m", minute), ("5m", five)):
+                db.add_all(
+                    models.TickOrBar(instrument_id=1, timeframe=timeframe, ts=ts.to_pydatetime(), **row)
+                    for ts, row in zip(frame.index, frame.to_dict("records"))
+                )
+            db.commit()
+        app = FastAPI()
+        app.include_router(routes.router)
+        client = TestClient(app)
+
+        response = client.get("/prices", params={"instrument_id": 1, "timeframe": "1m", "points": 500})
+        rows = response.json()
+        assert response.headers["X-Price-Timeframe"] == "5m"
+        assert response.headers["X-Price-Bucket-Seconds"] == "600"
+        expected = five.resample("10min").agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+        assert len(rows) == len(expected) <= 500
+        assert np.allclose([row["open"] for row in rows], expected["open"])
+        assert np.allclose([row["high"] for row in rows], expected["high"])
+        assert np.allclose([row["close"] for row in rows], expected["close"])
+        assert np.allclose([row["volume"] for row in rows], expected["volume"])
+
+        line = client.get("/prices", params={"instrument_id": 1, "timeframe": "1m", "points": 300, "shape": "line"}).json()
+        assert len(line) == 300
+        assert (line[0]["ts"], line[-1]["ts"]) == (rows[0]["ts"], five.index[-1].strftime("%Y-%m-%dT%H:%M:%S"))
+
+        short = client.get(
+            "/prices",
+            params={"instrument_id": 1, "timeframe": "1m", "start": "2024-01-02T00:00:00Z", "end": "2024-01-02T02:00:00Z"},
+        )
+        assert short.headers["X-Price-Timeframe"] == "1m" and len(short.json()) == 121
+        assert len(client.get("/prices", params={"instrument_id": 1, "timeframe": "1m", "limit": 10}).json()) == 10
+        assert client.get("/prices", params={"instrument_id": 1, "timeframe": "2m", "points": 50}).status_code == 400
+
+        # History mode: indicators cover the same span as the price range, one value per bucket close.
+        history = {"instrument_id": 1, "timeframe": "1m", "start": "2024-01-02T00:00:00Z", "points": 200}
+        snapshot = client.get("/dashboard/snapshot", params={**history, "indicator_names": "rsi_14"}).json()
+        prices, indicators = snapshot["prices"], snapshot["indicators"]
+        assert 0 < len(prices["ts"]) <= 200 and indicators["ts"] == prices["ts"]
+        source = client.get(
+            "/indicators",
+            params={"instrument_id": 1, "timeframe": "5m", "names": "rsi_14", "start": history["start"], "limit": 1000},
+        ).json()
+        by_ts = dict(zip(source["ts"], source["rsi_14"]))
+        last_bar = pd.Timestamp(prices["ts"][1]) - pd.Timestamp(prices["ts"][0]) - pd.Timedelta(minutes=5)
+        closes = [(pd.Timestamp(ts) + last_bar).strftime("%Y-%m-%dT%H:%M:%S") for ts in prices["ts"]]
+        assert indicators["rsi_14"][:-1] == [by_ts[ts] for ts in closes[:-1]]
+
+    x = np.arange(1000.0)
+    y = np.sin(x / 50)
+    kept = lttb_indices(x, y, 100)
+    assert len(kept) == 100 and kept[0] == 0 and kept[-1] == 999 and np.all(np.diff(kept) > 0)
+    assert y[kept].max() > 0.99 and y[kept].min() < -0.99
+
+
+def test_macro_filters_surprises_and_next_event():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.models as models
+        import app.db.init_db as init_db
+        import app.api.routes as routes
+
+        importlib.reload(init_db)
+        importlib.reload(routes)
+        init_db.init_db()
+        start = datetime(2024, 1, 1, 13, 30, tzinfo=timezone.utc)
+        with session.SessionLocal() as db:
+            for day, actual in enumerate([101.0, 99.0, 100.0, 104.0, None]):
+                db.add(
+                    models.MacroEvent(
+                        time=start + timedelta(days=day),
+                        currency="USD",
+                        impact="high",
+                        name="CPI",
+                        forecast=100.0,
+                        actual=actual,
+                        source="test",
+                    )
+                )
+            db.add(
+                models.MacroEvent(
+                    time=start + timedelta(hours=1), currency="EUR", impact="medium", name="PMI", source="test"
+                )
+            )
+            db.commit()
+        app = FastAPI()
+        app.include_router(routes.router)
+        client = TestClient(app)
+
+        rows = client.get("/macro", params={"currency": "USD", "impact": "high"}).json()
+        assert len(rows) == 5 and {row["currency"] for row in rows} == {"USD"}
+        assert rows[1]["surprise"] == pytest.approx(4.0)
+        assert rows[1]["surprise_z"] == pytest.approx(4.0)  # prior surprises 1, -1, 0: mean 0, std 1
+        assert rows[0]["surprise"] is None and rows[-1]["surprise_z"] is None
+        assert [row["name"] for row in client.get("/macro", params={"currency": "EUR"}).json()] == ["PMI"]
+
+        at = (start + timedelta(minutes=30)).isoformat()
+        lookup = client.get("/macro/next", params={"at": at}).json()
+        assert lookup["previous"]["name"] == "CPI" and lookup["next"]["name"] == "PMI"
+        lookup = client.get("/macro/next", params={"at": at, "currency": "USD"}).json()
+        assert lookup["next"]["time"].startswith("2024-01-02T13:30")
+        exact = client.get("/macro/next", params={"at": start.isoformat(), "currency": "USD"}).json()
+        assert exact["previous"]["time"].startswith("2024-01-01T13:30")
+        assert exact["next"]["time"].startswith("2024-01-02T13:30")
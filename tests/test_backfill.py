@@ -0,0 +1,130 @@
+import importlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _reload_app(tmpdir):
+    os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+    import app.core.config as config
+
+    importlib.reload(config)
+    import app.db.session as session
+    importlib.reload(session)
+    import app.db.init_db as init_db
+    import app.ingestion.backfill as backfill
+
+    importlib.reload(init_db)
+    importlib.reload(backfill)
+    init_db.init_db()
+    return session, backfill
+
+
+def test_prices_backfill_resumes_and_aggregates(monkeypatch):
+    from app.db.models import TickOrBar
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        session, backfill = _reload_app(tmpdir)
+        ts = pd.date_range("2024-01-01", periods=600, freq="min", tz="UTC")
+        close = 2000 + np.cumsum(np.ones(600))
+        frame = pd.DataFrame({"symbol": "XAUUSD", "ts": ts, "open": close, "high": close + 1, "low": close - 1, "close": close})
+        frame = pd.concat([frame, frame.head(5).assign(symbol="UNKNOWN")], ignore_index=True)
+        path = os.path.join(tmpdir, "prices.csv")
+        frame.to_csv(path, index=False)
+
+        original = backfill.bulk_insert
+        calls = {"n": 0}
+
+        def flaky(*args, **kwargs):
+            calls["n"] += 1
+            if calls["n"] == 3:
+                raise RuntimeError("connection lost")
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(backfill, "bulk_insert", flaky)
+        with pytest.raises(RuntimeError):
+            backfill.backfill("prices", backfill.Path(path), chunk_size=200)
+        state = backfill.backfill("prices", backfill.Path(path), chunk_size=200)
+
+        assert state["phase"] == "done"
+        assert state["rows_done"] == 605
+        assert state["inserted"] == 600
+        assert state["dropped"] == 5
+        with session.JobSessionLocal() as db:
+            counts = {
+                timeframe: db.query(TickOrBar).filter(TickOrBar.timeframe == timeframe).count()
+                for timeframe in ("1m", "5m", "1h")
+            }
+        assert counts == {"1m": 600, "5m": 120, "1h": 10}
+
+
+def test_parquet_chunks_skip_rows(tmp_path):
+    from app.ingestion.backfill import read_chunks
+
+    path = tmp_path / "rows.parquet"
+    pd.DataFrame({"value": range(10)}).to_parquet(path, row_group_size=4)
+    chunks = list(read_chunks(path, chunk_size=3, skip_rows=5))
+    assert pd.concat(chunks)["value"].tolist() == [5, 6, 7, 8, 9]
+
+
+def test_news_backfill_analyzes_in_batch():
+    from app.db.models import News
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        session, backfill = _reload_app(tmpdir)
+        path = os.path.join(tmpdir, "news.csv")
+        pd.DataFrame(
+            {
+                "published_at": ["2024-01-01T12:00:00Z", "2024-01-01T13:00:00Z"],
+                "title": ["Fed signals rate hike as inflation climbs", "Gold rallies"],
+                "url": ["https://example.com/a", "https://example.com/b"],
+            }
+        ).to_csv(path, index=False)
+        state = backfill.backfill("news", backfill.Path(path))
+        assert state["analyzed"] == 2
+        with session.JobSessionLocal() as db:
+            assert db.query(News).filter(News.sentiment.is_(None)).count() == 0
+
+
+def test_news_backfill_clusters_duplicates_and_indexes_after_commit():
+    from app.db.models import News
+    from app.services.news_clusters import get_news_index, news_signature, reset_news_index
+
+    title, summary = "Fed holds rates steady", "Policymakers kept the benchmark rate unchanged and signalled patience."
+    with tempfile.TemporaryDirectory() as tmpdir:
+        session, backfill = _reload_app(tmpdir)
+        reset_news_index()
+        path = os.path.join(tmpdir, "news.csv")
+        pd.DataFrame(
+            {
+                "published_at": ["2024-01-01T12:00:00Z", "2024-01-01T12:05:00Z", "2024-01-01T13:00:00Z"],
+                "title": [title, title, "Gold rallies"],
+                "summary": [summary, summary, "Bullion rose."],
+                "url": ["https://a.example/fed", "https://b.example/fed", "https://example.com/gold"],
+            }
+        ).to_csv(path, index=False)
+        backfill.backfill("news", backfill.Path(path), post_process=False)
+
+        with session.JobSessionLocal() as db:
+            assert db.query(News).filter(News.updated_at.is_(None)).count() == 0
+
+            def fail():
+                raise RuntimeError("database went away")
+
+            commit, db.commit = db.commit, fail
+            with pytest.raises(RuntimeError):
+                backfill.analyze_pending_news(db)
+            db.rollback()
+            assert get_news_index(db).match(news_signature(title, summary)) is None
+
+            db.commit = commit
+            assert backfill.analyze_pending_news(db) == 3
+            rows = {row.url: row for row in db.query(News)}
+        first, copy = rows["https://a.example/fed"], rows["https://b.example/fed"]
+        assert first.cluster_id == copy.cluster_id == first.id
+        assert copy.sentiment == first.sentiment
+        assert rows["https://example.com/gold"].cluster_id == rows["https://example.com/gold"].id
+        reset_news_index()
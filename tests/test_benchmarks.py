@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+
+from benchmarks.synthetic import make_bars, make_macro, make_news
+
+
+def test_synthetic_generators_shapes():
+    bars = make_bars(n_instruments=2, days=1)
+    assert len(bars) == 2 * 24 * 60
+    assert set(bars["symbol"]) == {"XAUUSD", "EURUSD"}
+    assert (bars["high"] >= bars[["open", "close"]].max(axis=1)).all()
+    assert (bars["low"] <= bars[["open", "close"]].min(axis=1)).all()
+    news = make_news(50, days=1)
+    assert news["url"].is_unique
+    assert news["published_at"].is_monotonic_increasing
+    assert len(make_macro(days=2, events_per_day=3)) == 6
+
+
+def test_runner_writes_selected_stages(tmp_path):
+    # The runner repoints app modules at its own database, so keep it out of this process.
+    output = tmp_path / "bench.json"
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.run",
+            "--sizes",
+            "micro",
+            "--stages",
+            "compute_features,analyze_news,api_prices",
+            "--repeat",
+            "1",
+            "--output",
+            str(output),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    results = json.loads(output.read_text())["results"]
+    assert [row["stage"] for row in results] == ["compute_features", "analyze_news", "api_prices"]
+    assert all(row["seconds"] > 0 and row["size"] == "micro" for row in results)
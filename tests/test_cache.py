@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from app.core import cache
+from app.core.config import get_settings
+
+
+@pytest.fixture
+def dead_redis(monkeypatch):
+    monkeypatch.setenv("REDIS_URL", "redis://127.0.0.1:1/0")
+    monkeypatch.setenv("REDIS_BREAKER_FAILURES", "2")
+    get_settings.cache_clear()
+    cache.close_redis()
+    yield
+    cache.close_redis()
+    get_settings.cache_clear()
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = cache.CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_helpers_degrade_and_breaker_stops_connecting(dead_redis):
+    assert cache.mget(["a", "b"]) == [None, None]
+    assert cache.mset({"a": 1}) is False
+    assert cache.redis_breaker_state() == "open"
+    assert cache.get_redis() is None
+
+
+def test_json_codec_round_trip():
+    codec = cache.get_codec("json")
+    value = {"label": "Bullish", "confidence": 0.7, "ids": [1, 2]}
+    assert codec.loads(codec.dumps(value)) == value
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.linear_model import LogisticRegression
+
+from app.ml.compiled import compile_model
+
+
+def _data(classes, rows=600, features=13, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, features)) * rng.uniform(0.1, 50, features)
+    y = np.asarray(classes)[(X[:, 0] + rng.normal(0, 20, rows) > 0).astype(int) + (X[:, 1] > 20)]
+    return X, y
+
+
+@pytest.mark.parametrize("classes", [["Bearish", "Bullish", "Neutral"], ["Bearish", "Bullish", "Bullish"]])
+def test_compiled_probabilities_match_sklearn(classes):
+    X, y = _data(classes)
+    model = CalibratedClassifierCV(LogisticRegression(max_iter=200), cv=3).fit(X, y)
+    compiled = compile_model(model, [f"f{i}" for i in range(X.shape[1])])
+
+    assert list(compiled.classes) == list(model.classes_)
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), atol=1e-12)
+    np.testing.assert_allclose(compiled.predict_proba(X[-1]), model.predict_proba(X[-1:]), atol=1e-12)
+
+
+
+def test_isotonic_models_are_rejected():
+    X, y = _data(["Bearish", "Bullish", "Neutral"])
+    model = CalibratedClassifierCV(LogisticRegression(max_iter=200), method="isotonic", cv=3).fit(X, y)
+    with pytest.raises(ValueError):
+        compile_model(model, [f"f{i}" for i in range(X.shape[1])])
@@ -48,3 +48,160 @@ def test_bar_deduplication():
             db.add(dup)
             with pytest.raises(IntegrityError):
                 db.commit()
+
+
+def test_minhash_index_finds_rewritten_copies_only():
+    from datetime import timedelta
+
+    from app.analytics.minhash import MinHasher, similarity
+    from app.services.news_clusters import InProcessNewsIndex
+
+    hasher = MinHasher(128)
+    original = hasher.signature(
+        "ECB holds rates steady as Lagarde signals patience on cuts. The European Central Bank kept its deposit "
+        "rate unchanged on Thursday and said inflation was easing but still above target."
+    )
+    copy = hasher.signature(
+        "ECB holds rates steady as Lagarde signals patience on cuts - Reuters. The European Central Bank kept its "
+        "deposit rate unchanged on Thursday and said inflation was easing but still above target."
+    )
+    other = hasher.signature("Gold climbs to record as Treasury yields slide after weak US jobs report.")
+    assert similarity(original, copy) > 0.8 > 0.2 > similarity(original, other)
+    assert hasher.signature("...") is None
+
+    index = InProcessNewsIndex(bands=32, threshold=0.8, window=timedelta(hours=72))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    index.add(1, 1, original, start)
+    assert index.match(copy) == 1
+    assert index.match(other) is None
+    index.add(2, 2, other, start + timedelta(hours=100))  # pushes story 1 out of the window
+    assert index.match(copy) is None and len(index) == 1
+
+
+def test_ingest_news_reuses_analysis_within_a_cluster(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.init_db as init_db
+        import app.db.models as models
+        import app.services.scheduler as scheduler
+        from app.analytics.news_analysis import RuleBasedNewsAnalyzer
+        from app.services.news_clusters import reset_news_index
+
+        importlib.reload(init_db)
+        importlib.reload(scheduler)
+        init_db.init_db()
+        reset_news_index()
+        published = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+        body = "Consumer prices rose 0.4% in March, above forecasts, lifting bets on a later Fed rate cut."
+        items = [
+            {"source": "wire-a", "url": "https://a.example/cpi", "title": "US CPI beats forecasts", "summary": body},
+            {"source": "wire-b", "url": "https://b.example/cpi-hot", "title": "US CPI beats forecasts", "summary": body + " Reuters"},
+            {"source": "wire-c", "url": "https://c.example/gold", "title": "Gold slips as dollar firms", "summary": "Bullion fell."},
+        ]
+
+        class Provider:
+            def fetch_news(self, since):
+                return [dict(item, published_at=published) for item in items]
+
+        calls = []
+        analyze = RuleBasedNewsAnalyzer.analyze
+        monkeypatch.setattr(RuleBasedNewsAnalyzer, "analyze", lambda self, **kw: calls.append(kw["title"]) or analyze(self, **kw))
+        monkeypatch.setattr(scheduler, "_get_news_provider", lambda settings: Provider())
+        monkeypatch.setattr(scheduler, "allow_run", lambda name, min_interval_seconds: True)
+        scheduler.ingest_news()
+
+        with session.SessionLocal() as db:
+            rows = {row.source: row for row in db.query(models.News)}
+        assert calls == ["US CPI beats forecasts", "Gold slips as dollar firms"]
+        assert rows["wire-b"].cluster_id == rows["wire-a"].cluster_id == rows["wire-a"].id
+        assert rows["wire-c"].cluster_id == rows["wire-c"].id
+        assert rows["wire-b"].sentiment == rows["wire-a"].sentiment
+        assert rows["wire-b"].topics == rows["wire-a"].topics
+        reset_news_index()
+
+
+def test_stale_index_match_falls_back_to_the_batch_representative(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.init_db as init_db
+        import app.db.models as models
+        import app.services.scheduler as scheduler
+        from app.services.news_clusters import get_news_index, news_signature, reset_news_index
+
+        importlib.reload(init_db)
+        importlib.reload(scheduler)
+        init_db.init_db()
+        reset_news_index()
+        published = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+        title, body = "Fed holds rates steady", "Policymakers kept the benchmark rate unchanged and signalled patience."
+        with session.SessionLocal() as db:
+            # An indexed story that was never committed, e.g. left behind by another worker.
+            get_news_index(db).add(999, 999, news_signature(title, body), published)
+
+        class Provider:
+            def fetch_news(self, since):
+                return [
+                    dict(source=source, url=f"https://{source}.example/fed", title=title, summary=body, published_at=published)
+                    for source in ("wire-a", "wire-b")
+                ]
+
+        monkeypatch.setattr(scheduler, "_get_news_provider", lambda settings: Provider())
+        monkeypatch.setattr(scheduler, "allow_run", lambda name, min_interval_seconds: True)
+        scheduler.ingest_news()
+
+        with session.SessionLocal() as db:
+            rows = {row.source: row for row in db.query(models.News)}
+            assert rows["wire-a"].cluster_id == rows["wire-a"].id
+            assert rows["wire-b"].cluster_id == rows["wire-a"].id
+        reset_news_index()
+
+
+def test_failed_news_commit_leaves_the_index_untouched(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.init_db as init_db
+        import app.services.scheduler as scheduler
+        from app.services.news_clusters import get_news_index, news_signature, reset_news_index
+
+        importlib.reload(init_db)
+        importlib.reload(scheduler)
+        init_db.init_db()
+        reset_news_index()
+        item = {
+            "source": "wire-a",
+            "url": "https://a.example/fed",
+            "title": "Fed holds rates steady",
+            "summary": "Policymakers kept the benchmark rate unchanged and signalled patience.",
+            "published_at": datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        }
+
+        class Provider:
+            def fetch_news(self, since):
+                return [item]
+
+        def fail(session, ids):
+            raise RuntimeError("database went away")
+
+        monkeypatch.setattr(scheduler, "_get_news_provider", lambda settings: Provider())
+        monkeypatch.setattr(scheduler, "allow_run", lambda name, min_interval_seconds: True)
+        monkeypatch.setattr(scheduler, "invalidate_news_impact", fail)
+        scheduler.ingest_news()
+
+        with session.SessionLocal() as db:
+            assert get_news_index(db).match(news_signature(item["title"], item["summary"])) is None
+        reset_news_index()
@@ -0,0 +1,48 @@
+import threading
+
+from app.services.events import BARS_COMMITTED, NEWS_COMMITTED, InProcessEventBus
+
+
+def test_groups_start_at_tail_and_each_get_every_event():
+    bus = InProcessEventBus()
+    bus.publish(NEWS_COMMITTED, [1])
+    bus.join("sse-a", [NEWS_COMMITTED])
+    bus.join("sse-b", [NEWS_COMMITTED])
+    bus.publish(NEWS_COMMITTED, [2, 3], updated_ids=[])
+    bus.publish(BARS_COMMITTED, [10], instrument_id=1)
+
+    for group in ("sse-a", "sse-b"):
+        events = bus.read(group, "worker", [NEWS_COMMITTED], block_ms=0)
+        assert [event.ids for event in events] == [[2, 3]]
+        bus.ack(group, events)
+        assert bus.read(group, "worker", [NEWS_COMMITTED], block_ms=0) == []
+
+
+def test_unacked_events_are_redelivered():
+    bus = InProcessEventBus(claim_idle_ms=0)
+    bus.join("prediction", [BARS_COMMITTED])
+    bus.publish(BARS_COMMITTED, [5], instrument_id=1)
+    first = bus.read("prediction", "a", [BARS_COMMITTED], block_ms=0)
+    again = bus.read("prediction", "b", [BARS_COMMITTED], block_ms=0)
+    assert [event.id for event in again] == [event.id for event in first]
+    bus.ack("prediction", again)
+    assert bus.read("prediction", "a", [BARS_COMMITTED], block_ms=0) == []
+
+
+def test_consumer_retries_failed_handler():
+    bus = InProcessEventBus(claim_idle_ms=0)
+    seen = []
+    done = threading.Event()
+
+    def handler(event):
+        seen.append(event.ids)
+        if len(seen) == 1:
+            raise RuntimeError("transient")
+        done.set()
+
+    bus.join("alerts", [BARS_COMMITTED])
+    stop = bus.start_consumer("alerts", [BARS_COMMITTED], handler)
+    bus.publish(BARS_COMMITTED, [7])
+    assert done.wait(5)
+    stop.set()
+    assert seen == [[7], [7]]
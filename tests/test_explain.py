@@ -0,0 +1,89 @@
+import importlib
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.linear_model import LogisticRegression
+
+from app.ml.compiled import compile_model
+from app.ml.explain import build_explanation, top_contributions
+
+
+def _model(rows=900, seed=1):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack(
+        [
+            rng.normal(2350, 5, rows),  # large but uninformative, like ema_200
+            rng.normal(0, 1, rows),  # the only driver
+            rng.normal(0, 1, rows),
+        ]
+    )
+    y = np.asarray(["Bearish", "Neutral", "Bullish"])[np.digitize(X[:, 1] + rng.normal(0, 0.3, rows), [-0.5, 0.5])]
+    model = CalibratedClassifierCV(LogisticRegression(max_iter=500), cv=3).fit(X, y)
+    return compile_model(model, ["ema_200", "rsi_14", "noise"], X.mean(axis=0)), X
+
+
+def test_top_features_follow_contributions_not_magnitude():
+    compiled, X = _model()
+    batch = top_contributions(compiled, X[:200], k=2)
+
+    assert len(batch) == 200
+    strong = [row for row, value in zip(batch, X[:200, 1]) if abs(value) > 1.5]
+    assert strong and all(row[0]["name"] == "rsi_14" for row in strong)
+    assert batch[7] == top_contributions(compiled, X[7], k=2)[0]
+
+    # A contribution moves the predicted class's log-odds the way its sign says.
+    centered = X[:1].copy()
+    centered[0] = compiled.means
+    centered[0, 1] += 2.0
+    bullish = list(compiled.classes).index("Bullish")
+    assert compiled.contributions(centered)[0, bullish, 1] > 0
+    assert compiled.predict_proba(centered)[0, bullish] > compiled.predict_proba(compiled.means)[0, bullish]
+
+    explanation = build_explanation(pd.Series({"news_sentiment_24h": 0.2}), {"Bullish": 1.0}, {"regime": "trend"}, batch[0])
+    assert explanation["top_features"] == batch[0]
+    assert explanation["recent_news"] == []
+
+
+def test_recent_high_impact_news_uses_one_window_per_timestamp(tmp_path):
+    os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmp_path}/test.db"
+    import app.core.config as config
+
+    importlib.reload(config)
+    import app.db.session as session
+    importlib.reload(session)
+    import app.db.init_db as init_db
+    from app.db.models import News
+    from app.ml.explain import recent_high_impact_news
+
+    importlib.reload(init_db)
+    init_db.init_db()
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with session.SessionLocal() as db:
+        for hour, impact, assets in [
+            (0, "high", ["XAUUSD"]),
+            (5, "low", ["XAUUSD"]),
+            (10, "high", ["EURUSD"]),
+            (20, "high", ["XAUUSD", "EURUSD"]),
+            (30, "high", ["XAUUSD"]),
+        ]:
+            db.add(
+                News(
+                    source="test",
+                    published_at=start + timedelta(hours=hour),
+                    title=f"story {hour}",
+                    url=f"https://example.com/{hour}",
+                    impact_level=impact,
+                    impacted_assets=assets,
+                )
+            )
+        db.commit()
+        ids = {row.title: row.id for row in db.query(News)}
+        result = recent_high_impact_news(
+            db, "XAUUSD", [start + timedelta(hours=1), start + timedelta(hours=21), start + timedelta(hours=40)], hours=24
+        )
+        assert result == [[ids["story 0"]], [ids["story 20"], ids["story 0"]], [ids["story 30"], ids["story 20"]]]
+        assert recent_high_impact_news(db, "XAUUSD", [start + timedelta(hours=21)], hours=24, limit=1) == [[ids["story 20"]]]
+        assert recent_high_impact_news(db, "XAUUSD", []) == []
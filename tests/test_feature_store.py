@@ -0,0 +1,78 @@
+import importlib
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+
+def _reload_app(tmpdir):
+    os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+    import app.core.config as config
+
+    importlib.reload(config)
+    import app.db.session as session
+    importlib.reload(session)
+    import app.db.init_db as init_db
+
+    importlib.reload(init_db)
+    init_db.init_db()
+    return session
+
+
+def _add_bars(db, instrument_id, start, count, offset=0):
+    from app.db.models import TickOrBar
+
+    rng = np.random.default_rng(offset)
+    for i in range(count):
+        close = 2000 + (offset + i) * 0.1 + float(rng.normal(0, 0.5))
+        db.add(
+            TickOrBar(
+                instrument_id=instrument_id,
+                timeframe="1m",
+                ts=start + timedelta(minutes=offset + i),
+                open=close - 0.05,
+                high=close + 0.3,
+                low=close - 0.3,
+                close=close,
+                volume=1000.0,
+            )
+        )
+    db.commit()
+
+
+def test_incremental_updates_match_a_full_recompute():
+    from app.db.models import MacroEvent, News
+    from app.features.engineering import add_macro_features, add_news_features, compute_features
+    from app.features.store import FEATURE_COLUMNS, invalidate_features, read_features, update_features
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        session = _reload_app(tmpdir)
+        with session.SessionLocal() as db:
+            db.add(MacroEvent(time=start + timedelta(hours=5), currency="USD", impact="high", name="CPI", source="test"))
+            db.commit()
+            _add_bars(db, 1, start, 300)
+            assert update_features(db, 1, "1m", warmup=1000) == 300
+            _add_bars(db, 1, start, 100, offset=300)
+            assert update_features(db, 1, "1m", warmup=1000) == 101
+            db.add(News(source="t", published_at=start + timedelta(minutes=350), title="t", url="u", sentiment=0.8))
+            db.flush()
+            invalidate_features(db, start + timedelta(minutes=350))
+            update_features(db, 1, "1m", warmup=1000)
+            db.commit()
+
+            stored = read_features(db, 1, "1m", dropna=True)
+            bars = pd.read_sql("select ts, open, high, low, close, volume from ticks_or_bars", db.bind, parse_dates=["ts"])
+            expected = compute_features(bars)
+            naive = pd.Timestamp(start).tz_localize(None)
+            news = pd.DataFrame({"published_at": [naive + timedelta(minutes=350)], "sentiment": [0.8]})
+            macro = pd.DataFrame({"time": [naive + timedelta(hours=5)], "currency": ["USD"], "impact": ["high"]})
+            expected = add_macro_features(add_news_features(expected, news), macro)
+            assert len(stored) == len(expected) == 400 - 60
+            np.testing.assert_allclose(stored[FEATURE_COLUMNS].to_numpy(), expected[FEATURE_COLUMNS].to_numpy(), rtol=1e-9)
+            assert stored["news_sentiment_24h"].iloc[-1] == 0.8
+
+            tail = read_features(db, 1, "1m", limit=10)
+            assert len(tail) == 10 and tail["ts"].iloc[-1] == stored["ts"].iloc[-1]
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+from app.ingestion.file_cache import CachedCsv
+from app.ingestion.prices_provider_demo import DemoPriceProvider
+
+HEADER = "symbol,timeframe,ts,open,high,low,close,volume\n"
+
+
+def _row(symbol, minute):
+    return f"{symbol},1m,2024-01-01T00:{minute:02d}:00Z,1,1,1,1,1\n"
+
+
+def test_tails_appended_rows_and_filters_by_binary_search(tmp_path, monkeypatch):
+    path = tmp_path / "prices.csv"
+    path.write_text(HEADER + "".join(_row("XAUUSD", minute) for minute in range(5)))
+    cache = CachedCsv(path, "ts")
+    assert len(cache.frame()) == 5
+
+    loads = []
+    monkeypatch.setattr(cache, "_load", lambda: loads.append(1))
+    with path.open("a") as handle:
+        handle.write(_row("EURUSD", 5) + _row("XAUUSD", 6) + "XAUUSD,1m,2024-01-01T00:07")
+    since = datetime(2024, 1, 1, 0, 3)
+    rows = cache.since(since, "symbol", "XAUUSD")
+    assert list(rows["ts"].dt.minute) == [4, 6]
+    assert loads == []
+
+    with path.open("a") as handle:
+        handle.write(":00Z,1,1,1,1,1\n")
+    rows = cache.since(since.replace(tzinfo=timezone.utc), "symbol", "XAUUSD")
+    assert list(rows["ts"].dt.minute) == [4, 6, 7]
+    assert loads == []
+
+
+def test_rewritten_file_is_reloaded(tmp_path):
+    path = tmp_path / "prices.csv"
+    path.write_text(HEADER + _row("XAUUSD", 1) + _row("XAUUSD", 2))
+    provider = DemoPriceProvider(str(path))
+    assert len(provider.fetch_bars("XAUUSD", "1m", None)) == 2
+    path.write_text(HEADER + _row("XAUUSD", 9) + _row("XAUUSD", 8) + _row("XAUUSD", 7))
+    bars = provider.fetch_bars("XAUUSD", "1m", None)
+    assert [bar["ts"].minute for bar in bars] == [7, 8, 9]
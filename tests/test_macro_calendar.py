@@ -0,0 +1,143 @@
+import importlib
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _event(models, when, name="NFP", currency="USD", impact="high", forecast=100.0, actual=None):
+    return models.MacroEvent(
+        time=when, currency=currency, impact=impact, name=name, forecast=forecast, actual=actual, source="test"
+    )
+
+
+def test_calendar_lookups_and_surprise_zscores_refresh_incrementally(tmp_path):
+    os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmp_path}/test.db"
+    import app.core.config as config
+
+    importlib.reload(config)
+    import app.db.session as session
+    importlib.reload(session)
+    import app.db.init_db as init_db
+    import app.db.models as models
+    from app.services.macro_calendar import MIN_SURPRISE_HISTORY, MacroCalendar
+
+    importlib.reload(init_db)
+    init_db.init_db()
+    start = datetime(2024, 1, 1)
+    actuals = [101.0, 97.0, 104.0, 99.0, 110.0]
+    with session.SessionLocal() as db:
+        db.add_all(_event(models, start + timedelta(days=day), actual=value) for day, value in enumerate(actuals))
+        db.add(_event(models, start + timedelta(days=2, hours=3), name="ECB", currency="EUR", actual=1.0))
+        db.add(_event(models, start + timedelta(days=5), actual=None))
+        db.commit()
+        calendar = MacroCalendar()
+        assert calendar.refresh(db) and not calendar.refresh(db)
+
+        after = start + timedelta(days=2, hours=1)
+        assert calendar.next_event(after)["name"] == "ECB"
+        assert calendar.next_event(after, "USD", "high")["time"] == start + timedelta(days=3)
+        assert calendar.previous_event(after, "USD")["time"] == start + timedelta(days=2)
+        assert calendar.previous_event(start + timedelta(days=2), "USD")["time"] == start + timedelta(days=2)
+        assert calendar.previous_event(start - timedelta(days=1)) is None
+        assert calendar.next_event(start + timedelta(days=6)) is None
+
+        surprises = np.array(actuals) - 100.0
+        frame = calendar.events("USD", "high")
+        assert list(frame["time"]) == [start + timedelta(days=day) for day in range(6)]
+        assert frame["surprise_z"].iloc[:MIN_SURPRISE_HISTORY].isna().all()
+        for index in range(MIN_SURPRISE_HISTORY, len(actuals)):
+            prior = surprises[:index]
+            expected = (surprises[index] - prior.mean()) / prior.std(ddof=1)
+            assert frame["surprise_z"].iloc[index] == pytest.approx(expected)
+
+        pending = db.query(models.MacroEvent).filter(models.MacroEvent.actual.is_(None)).one()
+        pending.actual = 95.0
+        db.commit()
+        assert calendar.refresh(db)
+        expected = (-5.0 - surprises.mean()) / surprises.std(ddof=1)
+        assert calendar.surprise(pending.id) == (pytest.approx(-5.0), pytest.approx(expected))
+
+        # A release older than the latest one recomputes that event name in time order.
+        db.add(_event(models, start - timedelta(days=1), actual=100.0))
+        db.commit()
+        calendar.refresh(db)
+        ordered = np.concatenate([[0.0], surprises])
+        frame = calendar.events("USD", "high")
+        prior = ordered[:MIN_SURPRISE_HISTORY]
+        expected = (ordered[MIN_SURPRISE_HISTORY] - prior.mean()) / prior.std(ddof=1)
+        assert frame["surprise_z"].iloc[MIN_SURPRISE_HISTORY] == pytest.approx(expected)
+
+
+def test_macro_features_match_per_bar_scan():
+    from app.features.engineering import add_macro_features
+
+    start = pd.Timestamp("2024-01-01")
+    bars = pd.DataFrame({"ts": pd.date_range(start, periods=3000, freq="1min")})
+    rng = np.random.default_rng(3)
+    times = start + pd.to_timedelta(np.sort(rng.integers(-600, 3600, 40)), unit="min")
+    macro = pd.DataFrame(
+        {
+            "time": times,
+            "currency": rng.choice(["USD", "EUR"], 40),
+            "impact": rng.choice(["high", "low"], 40),
+            "surprise_z": np.where(rng.random(40) < 0.3, np.nan, rng.normal(size=40)),
+        }
+    )
+    result = add_macro_features(bars, macro)
+    usd = macro[(macro["currency"] == "USD") & (macro["impact"] == "high")]
+    scored = usd.dropna(subset=["surprise_z"])
+    for ts, minutes, surprise in result[["ts", "minutes_to_high_impact_usd", "usd_surprise_z_24h"]].itertuples(index=False):
+        future = usd[usd["time"] >= ts]
+        assert minutes == pytest.approx((future["time"].iloc[0] - ts).total_seconds() / 60 if len(future) else 0.0)
+        window = scored[(scored["time"] <= ts) & (scored["time"] >= ts - pd.Timedelta(hours=24))]
+        assert surprise == pytest.approx(window["surprise_z"].iloc[-1] if len(window) else 0.0)
+
+    assert (add_macro_features(bars, macro.drop(columns="surprise_z"))["usd_surprise_z_24h"] == 0).all()
+
+
+def test_ingest_macro_records_actuals_released_after_the_event_was_stored(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmpdir}/test.db"
+        import app.core.config as config
+
+        importlib.reload(config)
+        import app.db.session as session
+        importlib.reload(session)
+        import app.db.init_db as init_db
+        import app.db.models as models
+        import app.services.scheduler as scheduler
+        from app.services.macro_calendar import get_macro_calendar, reset_macro_calendar
+
+        importlib.reload(init_db)
+        importlib.reload(scheduler)
+        init_db.init_db()
+        reset_macro_calendar()
+        start = datetime(2024, 1, 1, 13, 30, tzinfo=timezone.utc)
+        schedule = {start + timedelta(days=day): None for day in range(3)}
+        requested = []
+
+        class Provider:
+            def fetch_events(self, since):
+                requested.append(since)
+                return [
+                    {"time": when, "currency": "USD", "impact": "high", "name": "CPI", "forecast": 100.0, "actual": actual}
+                    for when, actual in schedule.items()
+                    if since is None or when > since.replace(tzinfo=timezone.utc)
+                ]
+
+        monkeypatch.setattr(scheduler, "_get_macro_provider", lambda settings: Provider())
+        monkeypatch.setattr(scheduler, "allow_run", lambda name, min_interval_seconds: True)
+        scheduler.ingest_macro()
+        schedule[start] = 103.0
+        scheduler.ingest_macro()
+
+        assert requested[0] is None and requested[1].replace(tzinfo=timezone.utc) < start
+        with session.SessionLocal() as db:
+            rows = db.query(models.MacroEvent).order_by(models.MacroEvent.time).all()
+            assert [row.actual for row in rows] == [103.0, None, None]
+            assert get_macro_calendar(db).surprise(rows[0].id)[0] == pytest.approx(3.0)
+        reset_macro_calendar()
@@ -0,0 +1,84 @@
+import importlib
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+def _bars(models, start, minutes, offset=0):
+    # close = 100 + minute index, so returns are easy to predict.
+    return [
+        models.TickOrBar(
+            instrument_id=1,
+            timeframe="1m",
+            ts=start + timedelta(minutes=minute),
+            open=100.0 + minute,
+            high=100.0 + minute,
+            low=100.0 + minute,
+            close=100.0 + minute,
+            volume=1.0,
+        )
+        for minute in range(offset, offset + minutes)
+    ]
+
+
+def test_news_impact_is_computed_incrementally_and_aggregated(tmp_path):
+    os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmp_path}/test.db"
+    import app.core.config as config
+
+    importlib.reload(config)
+    import app.db.session as session
+    importlib.reload(session)
+    import app.db.init_db as init_db
+    import app.db.models as models
+    from app.services.news_impact import impact_stats, invalidate_news_impact, update_news_impact
+
+    importlib.reload(init_db)
+    init_db.init_db()
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with session.SessionLocal() as db:
+        db.add_all(_bars(models, start, 120))
+        stories = [
+            ("a", 10, "high", {"rates": 3, "macro": 1}, ["XAUUSD"]),
+            ("b", 30, "low", {}, ["XAUUSD", "EURUSD"]),
+            ("c", 40, "high", {"inflation": 2}, ["EURUSD"]),
+        ]
+        for name, minute, impact, topics, assets in stories:
+            db.add(
+                models.News(
+                    source=f"wire-{name}",
+                    published_at=start + timedelta(minutes=minute, seconds=30),
+                    title=name,
+                    url=f"https://example.com/{name}",
+                    sentiment=0.5,
+                    impact_level=impact,
+                    impacted_assets=assets,
+                    topics=topics,
+                )
+            )
+        db.commit()
+
+        assert update_news_impact(db, 1, "XAUUSD") == 6  # 5m, 15m and 60m for both stories; 240m not elapsed yet
+        db.commit()
+        assert update_news_impact(db, 1, "XAUUSD") == 0
+        rows = {(row.topic, row.horizon_minutes): row for row in db.query(models.NewsImpact)}
+        assert rows[("rates", 5)].return_pct == pytest.approx(115 / 110 - 1)
+        assert rows[("none", 60)].return_pct == pytest.approx(190 / 130 - 1)
+        assert {row.impact_level for row in rows.values()} == {"high", "low"}
+
+        db.add_all(_bars(models, start, 300, offset=120))
+        db.commit()
+        assert update_news_impact(db, 1, "XAUUSD") == 2
+        db.commit()
+
+        stats = impact_stats(db, "impact_level", instrument_id=1, horizon_minutes=240)
+        assert [(row["impact_level"], row["stories"]) for row in stats] == [("high", 1), ("low", 1)]
+        assert stats[0]["mean_abs_return"] == pytest.approx(350 / 110 - 1)
+        assert len(impact_stats(db, "source")) == 8
+        with pytest.raises(ValueError):
+            impact_stats(db, "title")
+
+        story = db.query(models.News).filter(models.News.title == "a").one()
+        invalidate_news_impact(db, [story.id])
+        db.commit()
+        assert update_news_impact(db, 1, "XAUUSD") == 4
@@ -0,0 +1,38 @@
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import RateLimitExceeded, SlidingWindowLimiter, TokenBucketLimiter, allow_run, rate_limited
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(rate_limit, "get_redis", lambda: None)
+
+
+def test_token_bucket_falls_back_to_local_limit():
+    limiter = TokenBucketLimiter("test-bucket", capacity=2, refill_per_second=0.5)
+    assert limiter.try_acquire()[0]
+    assert limiter.try_acquire()[0]
+    allowed, wait = limiter.try_acquire()
+    assert not allowed
+    assert 0 < wait <= 2
+
+
+def test_sliding_window_decorator_raises_when_exhausted():
+    limiter = SlidingWindowLimiter("test-window", limit=1, window_seconds=30)
+    calls = []
+
+    @rate_limited(limiter, timeout=0.1)
+    def fetch():
+        calls.append(1)
+
+    fetch()
+    with pytest.raises(RateLimitExceeded):
+        fetch()
+    assert len(calls) == 1
+
+
+def test_allow_run_gates_locally_without_redis():
+    assert allow_run("test-job", 60)
+    assert not allow_run("test-job", 60)
+    assert allow_run("other-job", 60)
@@ -0,0 +1,66 @@
+import importlib
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from app.analytics.regime import IndexableSkiplist, volatility_percentiles
+
+
+def test_rolling_percentile_matches_pandas_rank():
+    rng = np.random.default_rng(3)
+    values = np.round(rng.normal(size=2000), 2)  # rounding forces ties
+    expected = pd.Series(values).rolling(300, min_periods=1).rank(pct=True).to_numpy()
+    np.testing.assert_allclose(volatility_percentiles(values, 300), expected)
+
+    skiplist = IndexableSkiplist(64)
+    for value in values[:100]:
+        skiplist.insert(value)
+    for value in values[:50]:
+        skiplist.remove(value)
+    remaining = np.sort(values[50:100])
+    assert len(skiplist) == 50
+    assert all(skiplist.count_below(value) == np.searchsorted(remaining, value) for value in values[:100])
+
+
+def test_tracker_records_transitions_incrementally(tmp_path):
+    os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmp_path}/test.db"
+    import app.core.config as config
+
+    importlib.reload(config)
+    import app.db.session as session
+    importlib.reload(session)
+    import app.db.init_db as init_db
+    from app.db.models import TickOrBar
+    from app.features.store import update_features
+    from app.services.regimes import current_regime, regime_history, reset_regime_trackers
+
+    importlib.reload(init_db)
+    init_db.init_db()
+    reset_regime_trackers()
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rng = np.random.default_rng(0)
+
+    def add(offset, count, scale):
+        with session.SessionLocal() as db:
+            close = 2000 + np.cumsum(rng.normal(0, scale, count))
+            for i, value in enumerate(close):
+                ts = start + timedelta(minutes=offset + i)
+                db.add(TickOrBar(instrument_id=1, timeframe="1m", ts=ts, open=value, high=value + scale, low=value - scale, close=value, volume=1.0))
+            db.commit()
+            update_features(db, 1, "1m")
+            db.commit()
+
+    add(0, 400, 0.1)
+    with session.SessionLocal() as db:
+        first = current_regime(db, 1, "1m", lookback=300)
+        db.commit()
+        assert [row["regime"] for row in regime_history(db, 1)] == [first["regime"]]
+    add(400, 100, 5.0)  # a volatility spike
+    with session.SessionLocal() as db:
+        assert current_regime(db, 1, "1m", lookback=300)["regime"] == "volatile"
+        db.commit()
+        history = regime_history(db, 1)
+    assert history[-1]["regime"] == "volatile"
+    assert all(a["regime"] != b["regime"] for a, b in zip(history, history[1:]))
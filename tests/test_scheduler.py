@@ -0,0 +1,79 @@
+from app.services import scheduler
+
+
+def test_prediction_requests_during_a_run_trigger_one_rerun(monkeypatch):
+    calls = []
+
+    def fake_run(gated=True):
+        calls.append(gated)
+        if len(calls) == 1:
+            # New bars land while the first prediction is running.
+            scheduler.request_prediction()
+            scheduler.request_prediction()
+
+    monkeypatch.setattr(scheduler, "run_prediction", fake_run)
+    scheduler.request_prediction()
+    scheduler._drain_prediction_requests()
+    assert calls == [False, False]
+    assert not scheduler._prediction_requested.is_set()
+
+
+def test_start_scheduler_configures_executors_and_jitter(monkeypatch):
+    monkeypatch.setattr(scheduler, "scheduler", scheduler.BackgroundScheduler())
+    scheduler.start_scheduler()
+    try:
+        jobs = {job.id: job for job in scheduler.scheduler.get_jobs()}
+        assert jobs["predict"].executor == "predict"
+        assert jobs["prices"].max_instances == 1
+        assert jobs["prices"].coalesce
+        assert jobs["prices"].trigger.jitter
+    finally:
+        scheduler.scheduler.shutdown(wait=False)
+
+
+def test_aggregation_revises_the_open_bucket(tmp_path):
+    import importlib
+    import os
+    from datetime import datetime, timedelta, timezone
+
+    os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmp_path}/test.db"
+    import app.core.config as config
+
+    importlib.reload(config)
+    import app.db.session as session
+    importlib.reload(session)
+    import app.db.init_db as init_db
+    import app.db.models as models
+
+    importlib.reload(init_db)
+    init_db.init_db()
+    start = datetime(2024, 1, 1, 0, 3, tzinfo=timezone.utc)
+
+    def add_bars(db, minutes):
+        for minute in minutes:
+            price = 100.0 + minute
+            db.add(
+                models.TickOrBar(
+                    instrument_id=1,
+                    timeframe="1m",
+                    ts=start + timedelta(minutes=minute),
+                    open=price,
+                    high=price + 0.5,
+                    low=price - 0.5,
+                    close=price,
+                    volume=1.0,
+                )
+            )
+        db.commit()
+
+    def five_minute_bars(db):
+        rows = db.query(models.TickOrBar).filter_by(timeframe="5m").order_by(models.TickOrBar.ts).all()
+        return [(row.ts.minute, row.open, row.high, row.close, row.volume) for row in rows]
+
+    with session.SessionLocal() as db:
+        add_bars(db, range(0, 4))  # 00:03-00:06 spans the 00:05 boundary
+        scheduler._aggregate_timeframes(db, 1)
+        assert five_minute_bars(db) == [(0, 100.0, 101.5, 101.0, 2.0), (5, 102.0, 103.5, 103.0, 2.0)]
+        add_bars(db, range(4, 7))  # 00:07-00:09 complete the 00:05 bucket
+        scheduler._aggregate_timeframes(db, 1)
+        assert five_minute_bars(db) == [(0, 100.0, 101.5, 101.0, 2.0), (5, 102.0, 106.5, 106.0, 5.0)]
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from app.core.config import Settings
+from app.ingestion.simulation import Simulation
+
+
+def _simulation(**overrides):
+    settings = Settings(simulation_speed=3600.0, simulation_warmup_bars=60, **overrides)
+    return Simulation(settings)
+
+
+def test_bars_extend_incrementally_and_are_deterministic():
+    simulation = _simulation()
+    bars = simulation.bars("XAUUSD", None)
+    assert len(bars) >= 60
+    assert all(bar["low"] <= min(bar["open"], bar["close"]) for bar in bars)
+    later = simulation.bars("XAUUSD", bars[-1]["ts"])
+    assert all(bar["ts"] > bars[-1]["ts"] for bar in later)
+    assert simulation.bars("NEWSYM", None)[0]["close"] < 200
+
+    again = _simulation(simulation_start=simulation.clock.origin)
+    assert again.bars("XAUUSD", None)[0]["close"] == bars[0]["close"]
+
+
+def test_news_and_macro_are_stable_across_overlapping_fetches():
+    simulation = _simulation(simulation_news_per_hour=120.0, simulation_news_burst_probability=0.5)
+    since = simulation.clock.now() - timedelta(minutes=30)
+    first = simulation.news(since)
+    second = simulation.news(since)
+    assert first
+    assert [item["url"] for item in second[: len(first)]] == [item["url"] for item in first]
+
+    events = simulation.macro(None)
+    now = simulation.clock.now()
+    assert events
+    assert all(event["actual"] is None for event in events if event["time"] > now)
+    assert any(event["actual"] is not None for event in events if event["time"] <= now)
+
+
+def test_news_items_do_not_depend_on_the_fetch_window():
+    simulation = _simulation(simulation_news_per_hour=120.0, simulation_news_burst_probability=0.5)
+    now = simulation.clock.now()
+    wide = {item["url"]: item for item in simulation.news(now - timedelta(minutes=50))}
+    narrow = {item["url"]: item for item in simulation.news(now - timedelta(minutes=20, seconds=30))}
+    shared = wide.keys() & narrow.keys()
+    assert len(shared) > 50
+    assert all(wide[url] == narrow[url] for url in shared)
+
+
+def test_news_accepts_a_naive_since():
+    simulation = _simulation(simulation_news_per_hour=120.0)
+    since = simulation.clock.now() - timedelta(minutes=30)
+    naive = simulation.news(since.replace(tzinfo=None))
+    aware = {item["url"]: item for item in simulation.news(since)}
+    assert naive and all(aware[item["url"]] == item for item in naive if item["url"] in aware)
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from app.core.tracing import span, trace
+from app.features.engineering import compute_features
+
+
+def test_trace_records_stages_and_rows(tmp_path):
+    data = pd.DataFrame(
+        {
+            "ts": pd.date_range("2024-01-01", periods=300, freq="min"),
+            "open": range(300),
+            "high": range(1, 301),
+            "low": range(300),
+            "close": range(1, 301),
+            "volume": range(300),
+        }
+    )
+    profile_path = tmp_path / "run.prof"
+    with trace("predict", profile_path=profile_path) as run:
+        for _ in range(2):
+            with span("load") as stage:
+                stage["rows"] = len(data)
+        feats = compute_features(data)
+    summary = run.summary()
+    stages = {stage["name"]: stage for stage in summary["stages"]}
+    assert stages["load"]["calls"] == 2
+    assert stages["load"]["rows"] == 600
+    assert stages["compute_features"]["rows"] == len(feats)
+    assert summary["total_ms"] >= stages["compute_features"]["duration_ms"]
+    assert profile_path.exists()
+
+
+def test_span_without_trace_is_noop():
+    with span("orphan") as stage:
+        stage["rows"] = 1
+    assert "duration_ms" not in stage
@@ -39,3 +39,30 @@ def test_training_pipeline_runs():
             db.commit()
         result = train.train_model()
         assert result["status"] in {"trained", "no_data"}
+
+
+def test_prediction_reports_insufficient_data_when_no_row_is_complete(tmp_path, monkeypatch):
+    import numpy as np
+    import pandas as pd
+
+    os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{tmp_path}/predict.db"
+    import app.core.config as config
+
+    importlib.reload(config)
+    import app.db.session as session
+    importlib.reload(session)
+    import app.db.init_db as init_db
+    import app.ml.predict as predict
+
+    importlib.reload(init_db)
+    importlib.reload(predict)
+    init_db.init_db()
+    # Enough bars, but every one still has a warm-up NaN somewhere.
+    frame = pd.DataFrame({"ts": pd.date_range("2024-01-01", periods=predict.MIN_BARS, freq="1min"), "rsi_14": np.nan})
+    monkeypatch.setattr(predict, "latest_model", lambda: ("lr_test", {"features": ["rsi_14"], "models": {("1m", 60): {}}}))
+    monkeypatch.setattr(predict, "update_features", lambda *args, **kwargs: 0)
+    monkeypatch.setattr(predict, "read_features", lambda *args, **kwargs: frame)
+
+    result = predict.predict_and_store()
+    assert result["status"] == "insufficient_data"
+    assert result["skipped"] == {"1m": "no bar with a complete feature vector"}